@@ -1,22 +1,149 @@
-from flask import Flask, request, render_template, jsonify, redirect, url_for
+from flask import Flask, request, render_template, jsonify, redirect, url_for, Response, stream_with_context
 import os
+import json
+import shutil
+import tempfile
+import threading
+import time
 import uuid
 from werkzeug.utils import secure_filename
 
-from models.detector import is_term_sheet
-from models.extractor import extract_data
-from models.validator import validate_term_sheet
-from models.summarizer import generate_summary
-from utils.ocr import perform_ocr
-from utils.file_handler import read_file_content, get_file_extension
+from utils.ocr import (configure_reader_pool, configure_page_pipeline,
+                       configure_preprocessing, preload_imaging, warm_up_ocr, get_ocr_stats)
+from utils.pipeline import analyze_term_sheet, configure_detection, NotATermSheetError
+from utils.jobs import JobQueue, QueueFullError
+from utils.result_store import create_result_store
+from utils.template_library import TemplateLibrary
+from utils.batch import collect_inputs, run_batch, summarize
+from utils.file_handler import read_file_content, configure_pdf_extraction, preload_readers, get_file_extension
+from utils.metrics import registry as metrics_registry, record_analysis
+from models.extractor import with_section_texts
+from utils.uploads import ChunkedUploads, UploadError, parse_size_limits
+from utils.responses import json_response, project
+from utils.supervisor import configure_stage_budgets
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max upload
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-# In-memory storage for processed results
-processed_results = {}
+# Page-parallel text extraction for PDFs with hundreds of pages
+app.config['PDF_PAGE_WORKERS'] = int(os.environ.get('PDF_PAGE_WORKERS', '1'))
+app.config['PDF_PARALLEL_MIN_PAGES'] = int(os.environ.get('PDF_PARALLEL_MIN_PAGES', '50'))
+configure_pdf_extraction(app.config['PDF_PAGE_WORKERS'], app.config['PDF_PARALLEL_MIN_PAGES'])
+
+# Term sheet detection only looks at the start of a document, so large
+# non-term-sheets are rejected without being read to the end
+app.config['DETECT_MAX_PAGES'] = int(os.environ.get('DETECT_MAX_PAGES', '10'))
+app.config['DETECT_MAX_CHARS'] = int(os.environ.get('DETECT_MAX_CHARS', '200000'))
+configure_detection(app.config['DETECT_MAX_PAGES'], app.config['DETECT_MAX_CHARS'])
+
+# Wall-clock/memory budgets per pipeline stage, e.g.
+# STAGE_BUDGETS=extracting=30s:512mb,summarizing=10s,ocr=600s. A stage that
+# runs out of budget is skipped or cut short with a warning.
+app.config['STAGE_BUDGETS'] = os.environ.get('STAGE_BUDGETS', '')
+configure_stage_budgets(app.config['STAGE_BUDGETS'])
+
+# OCR reader pool - models are loaded once and kept resident
+app.config['OCR_LANGUAGES'] = os.environ.get('OCR_LANGUAGES', 'en').split(',')
+app.config['OCR_POOL_SIZE'] = int(os.environ.get('OCR_POOL_SIZE', '1'))
+app.config['OCR_PRELOAD'] = os.environ.get('OCR_PRELOAD', 'false').lower() == 'true'
+app.config['OCR_MAX_PAGES'] = int(os.environ.get('OCR_MAX_PAGES', '100'))
+app.config['OCR_PAGE_WORKERS'] = int(os.environ.get('OCR_PAGE_WORKERS', str(min(4, os.cpu_count() or 1))))
+app.config['OCR_MIN_TEXT_CHARS'] = int(os.environ.get('OCR_MIN_TEXT_CHARS', '20'))
+configure_reader_pool(app.config['OCR_LANGUAGES'], app.config['OCR_POOL_SIZE'])
+configure_page_pipeline(app.config['OCR_MAX_PAGES'], app.config['OCR_PAGE_WORKERS'], app.config['OCR_MIN_TEXT_CHARS'])
+
+# OCR image preprocessing - trade accuracy for throughput per deployment
+app.config['OCR_PREPROCESS'] = os.environ.get('OCR_PREPROCESS', 'auto')
+app.config['OCR_TARGET_DPI'] = int(os.environ['OCR_TARGET_DPI']) if os.environ.get('OCR_TARGET_DPI') else None
+configure_preprocessing(app.config['OCR_PREPROCESS'], app.config['OCR_TARGET_DPI'])
+
+# Helper processes of the stage supervisor (and other worker processes started
+# by forkserver or spawn) import this script again as __mp_main__. They only
+# run pipeline stages, so the app's services are only started here.
+if __name__ != '__mp_main__':
+    if app.config['OCR_PRELOAD']:
+        warm_up_ocr()
+
+    # Heavy format libraries are imported on first use. Workers that will need
+    # them anyway can import them at boot instead, e.g. PRELOAD_FORMATS=pdf,xlsx,ocr
+    # ('all' for everything)
+    app.config['PRELOAD_FORMATS'] = [f.strip() for f in os.environ.get('PRELOAD_FORMATS', '').split(',') if f.strip()]
+    if app.config['PRELOAD_FORMATS']:
+        preload_all = 'all' in app.config['PRELOAD_FORMATS']
+        preload_readers(None if preload_all else app.config['PRELOAD_FORMATS'])
+        if preload_all or 'ocr' in app.config['PRELOAD_FORMATS']:
+            preload_imaging()
+
+    # Bounded storage for processed results (LRU + TTL + size budget). The
+    # sqlite backend is shared by every worker process.
+    app.config['RESULT_STORE'] = os.environ.get('RESULT_STORE', 'memory')
+    app.config['RESULT_STORE_PATH'] = os.environ.get('RESULT_STORE_PATH', os.path.join(app.instance_path, 'results.db'))
+    app.config['RESULT_TTL'] = int(os.environ.get('RESULT_TTL', '86400'))
+    app.config['RESULT_MAX_ENTRIES'] = int(os.environ.get('RESULT_MAX_ENTRIES', '1000'))
+    app.config['RESULT_MAX_MB'] = int(os.environ.get('RESULT_MAX_MB', '256'))
+    processed_results = create_result_store(
+        app.config['RESULT_STORE'],
+        path=app.config['RESULT_STORE_PATH'],
+        max_entries=app.config['RESULT_MAX_ENTRIES'],
+        ttl=app.config['RESULT_TTL'],
+        max_bytes=app.config['RESULT_MAX_MB'] * 1024 * 1024
+    )
+
+    # On-disk content-hash cache, so re-uploaded documents skip the pipeline
+    app.config['ANALYSIS_CACHE'] = os.environ.get('ANALYSIS_CACHE', 'true').lower() == 'true'
+    app.config['ANALYSIS_CACHE_PATH'] = os.environ.get('ANALYSIS_CACHE_PATH', os.path.join(app.instance_path, 'analysis_cache.db'))
+    app.config['ANALYSIS_CACHE_MAX_ENTRIES'] = int(os.environ.get('ANALYSIS_CACHE_MAX_ENTRIES', '5000'))
+    app.config['ANALYSIS_CACHE_MAX_MB'] = int(os.environ.get('ANALYSIS_CACHE_MAX_MB', '512'))
+    analysis_cache = None
+    if app.config['ANALYSIS_CACHE']:
+        analysis_cache = create_result_store(
+            'sqlite',
+            path=app.config['ANALYSIS_CACHE_PATH'],
+            max_entries=app.config['ANALYSIS_CACHE_MAX_ENTRIES'],
+            ttl=0,
+            max_bytes=app.config['ANALYSIS_CACHE_MAX_MB'] * 1024 * 1024
+        )
+
+    # Batch processing - worker processes per /api/batch request, batches run
+    # at the same time, and an optional server-side directory batches may be
+    # read from
+    app.config['BATCH_WORKERS'] = int(os.environ.get('BATCH_WORKERS', str(os.cpu_count() or 1)))
+    app.config['BATCH_ROOT'] = os.environ.get('BATCH_ROOT')
+    app.config['BATCH_CONCURRENCY'] = int(os.environ.get('BATCH_CONCURRENCY', '1'))
+    batch_slots = threading.BoundedSemaphore(app.config['BATCH_CONCURRENCY'])
+
+    # Named reference templates, parsed once and shared by all workers
+    app.config['TEMPLATE_LIBRARY_PATH'] = os.environ.get('TEMPLATE_LIBRARY_PATH', os.path.join(app.instance_path, 'templates'))
+    template_library = TemplateLibrary(app.config['TEMPLATE_LIBRARY_PATH'])
+
+    # Resumable chunked uploads for files past MAX_CONTENT_LENGTH. Each chunk is
+    # its own request, so UPLOAD_CHUNK_MB must stay below MAX_CONTENT_LENGTH.
+    app.config['UPLOAD_CHUNK_MB'] = int(os.environ.get('UPLOAD_CHUNK_MB', '8'))
+    app.config['UPLOAD_LIMITS'] = parse_size_limits(os.environ.get('UPLOAD_LIMITS', 'pdf=512,jpg=64,jpeg=64,png=64'),
+                                                    default_mb=int(os.environ.get('UPLOAD_DEFAULT_LIMIT_MB', '16')))
+    app.config['UPLOAD_SESSION_TTL'] = int(os.environ.get('UPLOAD_SESSION_TTL', '86400'))
+    chunked_uploads = ChunkedUploads(os.path.join(app.instance_path, 'partial_uploads'),
+                                     app.config['UPLOAD_LIMITS'], app.config['UPLOAD_SESSION_TTL'])
+
+    # Largest number of results /api/results returns in one response
+    app.config['RESULTS_BULK_MAX'] = int(os.environ.get('RESULTS_BULK_MAX', '200'))
+
+    # Background workers that run uploads through the pipeline
+    app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', '2'))
+    app.config['JOB_QUEUE_SIZE'] = int(os.environ.get('JOB_QUEUE_SIZE', '20'))
+    job_queue = JobQueue(app.config['JOB_WORKERS'], app.config['JOB_QUEUE_SIZE'])
+
+    # Point-in-time values sampled whenever /metrics is scraped
+    metrics_registry.gauge('termsheet_job_queue_depth', 'Uploads waiting for a worker', job_queue.depth)
+    metrics_registry.gauge('termsheet_result_store_entries', 'Results held in the result store',
+                           lambda: len(processed_results))
+    metrics_registry.gauge('termsheet_result_store_bytes', 'Serialized size of the stored results',
+                           lambda: processed_results.stats()['bytes'])
+    if analysis_cache is not None:
+        metrics_registry.gauge('termsheet_analysis_cache_entries', 'Entries in the content-hash analysis cache',
+                               lambda: len(analysis_cache))
 
 ALLOWED_EXTENSIONS = {'pdf', 'docx', 'xlsx', 'txt', 'jpg', 'jpeg', 'png'}
 
@@ -40,6 +167,12 @@ def upload_file():
     if not allowed_file(file.filename):
         return jsonify({'error': f'File type not allowed. Supported types: {", ".join(ALLOWED_EXTENSIONS)}'}), 400
     
+    # A stored template can be used instead of uploading a reference
+    template_id = request.form.get('template_id', '').strip()
+    template = resolve_template(template_id)
+    if template_id and template is None:
+        return jsonify({'error': f'Unknown reference template: {template_id}'}), 400
+    
     # Handle the file
     filename = secure_filename(file.filename)
     file_id = str(uuid.uuid4())
@@ -47,60 +180,429 @@ def upload_file():
     file.save(file_path)
     
     # Get reference template if provided
-    reference_template = None
-    if 'reference' in request.files and request.files['reference'].filename != '':
+    ref_path = None
+    if template is None and 'reference' in request.files and request.files['reference'].filename != '':
         ref_file = request.files['reference']
         if allowed_file(ref_file.filename):
             ref_filename = secure_filename(ref_file.filename)
             ref_path = os.path.join(app.config['UPLOAD_FOLDER'], f"ref_{file_id}_{ref_filename}")
             ref_file.save(ref_path)
-            reference_template = read_file_content(ref_path)
     
-    # Process based on file type and user choice
-    file_ext = get_file_extension(file_path)
-    use_ocr = request.form.get('use_ocr') == 'true'
+    use_ocr = ocr_option(request.form.get('use_ocr'))
     
-    # Extract text content
-    if use_ocr and file_ext in ['jpg', 'jpeg', 'png', 'pdf']:
-        text_content = perform_ocr(file_path)
-    else:
-        text_content = read_file_content(file_path)
+    return queue_analysis(file_id, filename, file_path, ref_path, use_ocr, template)
+
+def ocr_option(value):
+    """
+    Reads the use_ocr option: True, False, or 'auto' to OCR only the PDF pages without a text layer
+    """
+    if isinstance(value, str):
+        value = value.strip().lower()
+        return 'auto' if value == 'auto' else value == 'true'
+    return bool(value)
+
+def resolve_template(template_id):
+    """
+    Returns 'auto', the stored template record, or None for no/unknown template
+    """
+    if template_id == 'auto':
+        return 'auto'
+    return template_library.get(template_id) if template_id else None
+
+def queue_analysis(file_id, filename, file_path, ref_path, use_ocr, template, file_hash=None,
+                   cleanup=True, details=None):
+    """
+    Queues the analysis of a saved upload and returns the 202 (or 429) response
+
+    With cleanup=False the saved files are left in place when the queue is
+    full; `details` are added to the 429 body.
+    """
+    # Queue the analysis and return straight away - clients poll the job status
+    try:
+        job_queue.submit(file_id, process_upload, file_id, filename, file_path, ref_path, use_ocr, template,
+                         file_hash=file_hash)
+    except QueueFullError as e:
+        if cleanup:
+            for path in (file_path, ref_path):
+                if path and os.path.exists(path):
+                    os.unlink(path)
+        response = jsonify({'error': f'{e}. Please try again shortly.', **(details or {})})
+        response.headers['Retry-After'] = '5'
+        return response, 429
+    
+    return jsonify({
+        'file_id': file_id,
+        'job_id': file_id,
+        'status_url': url_for('api_job_status', job_id=file_id),
+        'redirect': url_for('results', file_id=file_id)
+    }), 202
+
+@app.route('/api/uploads', methods=['POST'])
+def api_create_upload():
+    """
+    Starts a resumable upload: JSON with filename, size and optionally
+    sha256, use_ocr and template_id. Chunks are then PUT to upload_url.
+    """
+    data = request.get_json(silent=True) or {}
+    filename = secure_filename(str(data.get('filename', '')))
+    if not filename or not allowed_file(filename):
+        return jsonify({'error': f'File type not allowed. Supported types: {", ".join(ALLOWED_EXTENSIONS)}'}), 400
+    
+    template_id = str(data.get('template_id') or '').strip()
+    if template_id and resolve_template(template_id) is None:
+        return jsonify({'error': f'Unknown reference template: {template_id}'}), 400
+    
+    try:
+        session = chunked_uploads.create(filename, data.get('size'), data.get('sha256'), options={
+            'use_ocr': ocr_option(data.get('use_ocr')),
+            'template_id': template_id,
+        })
+    except UploadError as e:
+        return jsonify({'error': str(e), **e.details}), e.status
     
-    # Validate if it's a term sheet
-    if not is_term_sheet(text_content):
-        return jsonify({'error': 'The uploaded file does not appear to be a valid term sheet'}), 400
+    return jsonify({
+        'upload_id': session['upload_id'],
+        'offset': 0,
+        'size': session['size'],
+        'chunk_size': app.config['UPLOAD_CHUNK_MB'] * 1024 * 1024,
+        'upload_url': url_for('api_upload_chunk', upload_id=session['upload_id'])
+    }), 201
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+def api_upload_status(upload_id):
+    session = chunked_uploads.get(upload_id)
+    if session is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    return jsonify({key: session[key] for key in ('upload_id', 'filename', 'size', 'offset')})
+
+@app.route('/api/uploads/<upload_id>', methods=['PUT', 'PATCH'])
+def api_upload_chunk(upload_id):
+    """
+    Appends the request body at the Upload-Offset header (or ?offset=).
+    A mismatched offset gets 409 with the offset to resume from. The last
+    chunk verifies the SHA-256 and queues the analysis (202, like /upload).
+    If the queue is full (429) the upload is kept, and an empty PUT at the
+    final offset queues it again.
+    """
+    try:
+        offset = int(request.headers.get('Upload-Offset', request.args.get('offset', '')))
+    except ValueError:
+        return jsonify({'error': 'Upload-Offset header is required'}), 400
     
-    # Process the term sheet
-    extracted_data = extract_data(text_content)
-    validation_results = validate_term_sheet(extracted_data, reference_template)
-    summary = generate_summary(text_content)
+    try:
+        session = chunked_uploads.append(upload_id, offset, request.stream)
+    except UploadError as e:
+        return jsonify({'error': str(e), **e.details}), e.status
+    
+    if not session.get('complete'):
+        return jsonify({'upload_id': upload_id, 'offset': session['offset'], 'size': session['size']})
+    
+    file_id = str(uuid.uuid4())
+    file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{file_id}_{session['filename']}")
+    chunked_uploads.complete(upload_id, file_path)
+    options = session['options']
+    template = resolve_template(options.get('template_id'))
+    response, status = queue_analysis(file_id, session['filename'], file_path, None, options.get('use_ocr', False),
+                                      template, file_hash=session['digest'], cleanup=False,
+                                      details={'upload_id': upload_id, 'offset': session['offset']})
+    if status == 429:
+        chunked_uploads.restore(upload_id, file_path)
+    else:
+        chunked_uploads.discard(upload_id)
+    return response, status
+
+@app.route('/api/uploads/<upload_id>', methods=['DELETE'])
+def api_cancel_upload(upload_id):
+    if chunked_uploads.get(upload_id) is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    chunked_uploads.discard(upload_id)
+    return '', 204
+
+def process_upload(file_id, filename, file_path, ref_path, use_ocr, template=None, file_hash=None, progress=None):
+    """
+    Runs an uploaded term sheet through the pipeline and stores the results
+    """
+    stats = {}
+    status = 'failed'
+    started = time.perf_counter()
+    try:
+        analysis = analyze_term_sheet(file_path, ref_path, use_ocr, progress, cache=analysis_cache,
+                                      template=template, template_library=template_library, stats=stats,
+                                      file_hash=file_hash, keep_text=True)
+        status = 'degraded' if analysis.get('degraded') else 'done'
+    except NotATermSheetError:
+        status = 'rejected'
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        record_analysis(get_file_extension(filename), use_ocr, status, elapsed, stats,
+                        size=os.path.getsize(file_path) if os.path.exists(file_path) else None)
     
     # Store results
     result = {
         'file_id': file_id,
         'filename': filename,
-        'extracted_data': extracted_data,
-        'validation_results': validation_results,
-        'summary': summary
+        'extracted_data': analysis['extracted_data'],
+        'validation_results': analysis['validation_results'],
+        'summary': analysis['summary'],
+        # Stages skipped or cut short for running out of budget
+        'degraded': analysis.get('degraded', []),
+        # Sections are spans into this one copy of the text
+        'text': analysis['text'],
+        'timings': {
+            'total': round(elapsed, 6),
+            'cached': stats.get('cached', False),
+            'pages': stats.get('pages', 0),
+            'stages': {stage: round(seconds, 6) for stage, seconds in stats.get('stages', {}).items()}
+        }
     }
-    processed_results[file_id] = result
+    processed_results.put(file_id, result)
+
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        # The job may have run in another worker process
+        if job_id in processed_results:
+            job = {'job_id': job_id, 'status': 'done', 'stage': None, 'progress': 100, 'error': None}
+        else:
+            return jsonify({'error': 'Job not found'}), 404
     
-    return jsonify({'file_id': file_id, 'redirect': url_for('results', file_id=file_id)})
+    if job['status'] == 'done':
+        job['redirect'] = url_for('results', file_id=job_id)
+    return jsonify(job)
 
 @app.route('/results/<file_id>')
 def results(file_id):
-    if file_id not in processed_results:
+    result = processed_results.get(file_id)
+    if result is None:
         return redirect(url_for('index'))
     
-    result = processed_results[file_id]
     return render_template('results.html', result=result)
 
+def as_list(value):
+    """
+    Accepts a comma-separated string or a list (query string or JSON body)
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    return [str(item).strip() for item in value if str(item).strip()]
+
+def result_payload(result, options):
+    """
+    Builds the API view of a stored result
+    
+    Options (query string or JSON body): timings=true adds the per-stage
+    timing breakdown, sections=spans skips materializing the section texts,
+    and fields=a,b.c keeps only those keys (file_id is always kept).
+    """
+    # The per-stage timing breakdown is only included on request
+    hidden = {'text'} if str(options.get('timings', 'false')).lower() == 'true' else {'text', 'timings'}
+    payload = {key: value for key, value in result.items() if key not in hidden}
+    fields = as_list(options.get('fields'))
+    
+    # Section texts are materialized from their spans unless only the spans
+    # are wanted, or extracted_data isn't requested at all
+    wants_sections = not fields or any(field.split('.')[0] == 'extracted_data' for field in fields)
+    if options.get('sections') != 'spans' and wants_sections:
+        payload['extracted_data'] = with_section_texts(result['extracted_data'], result.get('text', ''))
+    
+    if fields:
+        payload = project(payload, ['file_id'] + fields)
+    return payload
+
 @app.route('/api/results/<file_id>')
 def api_results(file_id):
-    if file_id not in processed_results:
+    result = processed_results.get(file_id)
+    if result is None:
+        return jsonify({'error': 'Results not found'}), 404
+    
+    # ETag + gzip/br, so dashboards polling an unchanged result get a 304
+    return json_response(result_payload(result, request.args), request)
+
+@app.route('/api/results', methods=['GET', 'POST'])
+def api_results_bulk():
+    """
+    Many results in one response: ids (comma-separated or a JSON list) plus
+    the same timings/sections/fields options as /api/results/<file_id>
+    """
+    options = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args
+    file_ids = as_list(options.get('ids'))
+    if not file_ids:
+        return jsonify({'error': 'No result ids given'}), 400
+    if len(file_ids) > app.config['RESULTS_BULK_MAX']:
+        return jsonify({'error': f"At most {app.config['RESULTS_BULK_MAX']} results per request"}), 400
+    
+    results = {}
+    missing = []
+    for file_id in dict.fromkeys(file_ids):
+        result = processed_results.get(file_id)
+        if result is None:
+            missing.append(file_id)
+        else:
+            results[file_id] = result_payload(result, options)
+    return json_response({'results': results, 'missing': missing}, request)
+
+@app.route('/api/results/<file_id>/sections/<path:name>')
+def api_result_section(file_id, name):
+    result = processed_results.get(file_id)
+    if result is None:
         return jsonify({'error': 'Results not found'}), 404
     
-    return jsonify(processed_results[file_id])
+    sections = result['extracted_data'].get('sections', [])
+    wanted = ' '.join(name.lower().split())
+    # Exact heading first, then ignoring case and spacing; the last
+    # occurrence wins, as in the materialized sections
+    matches = ([section for section in sections if section['name'] == name] or
+               [section for section in sections if ' '.join(section['name'].lower().split()) == wanted])
+    if not matches:
+        return jsonify({'error': f'Section not found: {name}'}), 404
+    section = matches[-1]
+    return jsonify(dict(section, text=result['text'][section['start']:section['end']]))
+
+@app.route('/api/batch', methods=['POST'])
+def api_batch():
+    # Every batch runs its own pool of BATCH_WORKERS processes, so only
+    # BATCH_CONCURRENCY batches run at a time
+    if not batch_slots.acquire(blocking=False):
+        response = jsonify({'error': 'Too many batches are running. Please try again shortly.'})
+        response.headers['Retry-After'] = '30'
+        return response, 429
+    batch_dir = tempfile.mkdtemp(dir=app.config['UPLOAD_FOLDER'])
+    
+    def finish():
+        shutil.rmtree(batch_dir, ignore_errors=True)
+        batch_slots.release()
+    
+    try:
+        response = batch_response(batch_dir)
+    except Exception:
+        finish()
+        raise
+    if isinstance(response, tuple):
+        finish()
+    else:
+        # Once the stream has been sent (or the client went away)
+        response.call_on_close(finish)
+    return response
+
+def batch_response(batch_dir):
+    """
+    Collects the files of a /api/batch request into batch_dir and returns
+    the streaming JSON Lines response (or a 400)
+    """
+    sources = []
+    
+    # Uploaded files and zip archives. Each is saved in a directory of its
+    # own, so uploads with the same file name don't overwrite each other.
+    for upload in request.files.getlist('files'):
+        filename = secure_filename(upload.filename or '')
+        if not filename or not (allowed_file(filename) or filename.lower().endswith('.zip')):
+            continue
+        path = os.path.join(tempfile.mkdtemp(dir=batch_dir), filename)
+        upload.save(path)
+        sources.append(path)
+    
+    # A directory on the server, only below BATCH_ROOT
+    directory = request.form.get('directory')
+    if directory:
+        root = app.config['BATCH_ROOT']
+        directory = os.path.realpath(os.path.join(root, directory)) if root else None
+        if not directory or os.path.commonpath([directory, os.path.realpath(root)]) != os.path.realpath(root):
+            return jsonify({'error': 'Directory batches are not allowed here'}), 400
+        sources.append(directory)
+    
+    ref_path = None
+    if 'reference' in request.files and request.files['reference'].filename != '':
+        ref_file = request.files['reference']
+        if allowed_file(ref_file.filename):
+            ref_path = os.path.join(batch_dir, f"ref_{secure_filename(ref_file.filename)}")
+            ref_file.save(ref_path)
+    
+    items = collect_inputs(sources, batch_dir)
+    if not items:
+        return jsonify({'error': 'No supported files in the batch'}), 400
+    
+    # Names from an interrupted run that the client already has
+    skip = set(request.form.getlist('skip'))
+    use_ocr = ocr_option(request.form.get('use_ocr'))
+    
+    # Uploaded files are named by their file name rather than the temp path
+    prefix = batch_dir + os.sep
+    items = [(name[len(prefix):].split(os.sep, 1)[1] if name.startswith(prefix) else name, path)
+             for name, path in items]
+    
+    def generate():
+        counts = {}
+        records_seen = 0
+        bytes_seen = 0
+        start = time.perf_counter()
+        for record in run_batch(items, app.config['BATCH_WORKERS'], ref_path, use_ocr, skip):
+            records_seen += 1
+            bytes_seen += record['bytes']
+            counts[record['status']] = counts.get(record['status'], 0) + 1
+            yield json.dumps(record) + '\n'
+        yield json.dumps({'batch_summary': summarize(records_seen, bytes_seen, counts, time.perf_counter() - start)}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/templates', methods=['GET'])
+def api_list_templates():
+    return jsonify(template_library.list())
+
+@app.route('/api/templates', methods=['POST'])
+def api_register_template():
+    if 'template' not in request.files or request.files['template'].filename == '':
+        return jsonify({'error': 'No file part'}), 400
+    
+    template_file = request.files['template']
+    if not allowed_file(template_file.filename):
+        return jsonify({'error': f'File type not allowed. Supported types: {", ".join(ALLOWED_EXTENSIONS)}'}), 400
+    
+    filename = secure_filename(template_file.filename)
+    template_path = os.path.join(app.config['UPLOAD_FOLDER'], f"template_{uuid.uuid4()}_{filename}")
+    template_file.save(template_path)
+    try:
+        text = read_file_content(template_path)
+    finally:
+        os.unlink(template_path)
+    
+    name = request.form.get('name', '').strip() or os.path.splitext(filename)[0]
+    return jsonify(template_library.register(name, text, filename)), 201
+
+@app.route('/api/templates/<template_id>', methods=['GET'])
+def api_get_template(template_id):
+    template = template_library.get(template_id)
+    if template is None:
+        return jsonify({'error': 'Template not found'}), 404
+    
+    summary = template_library.summary(template)
+    summary['fields'] = template['profile']['fields']
+    summary['sections'] = sorted(template['profile']['sections'])
+    return jsonify(summary)
+
+@app.route('/api/templates/<template_id>', methods=['DELETE'])
+def api_delete_template(template_id):
+    if not template_library.remove(template_id):
+        return jsonify({'error': 'Template not found'}), 404
+    return '', 204
+
+@app.route('/api/store/stats')
+def api_store_stats():
+    stats = processed_results.stats()
+    if analysis_cache is not None:
+        stats['analysis_cache'] = analysis_cache.stats()
+    return jsonify(stats)
+
+@app.route('/metrics')
+def metrics():
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/ocr/stats')
+def api_ocr_stats():
+    return jsonify(get_ocr_stats())
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
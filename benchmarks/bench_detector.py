@@ -0,0 +1,85 @@
+"""
+Microbenchmark for models/detector.py on multi-MB inputs
+
+Compares the windowed early-exit detector (one prefix-factored alternation
+of all indicators per window) with the previous approach (lowercase the
+whole text, then one substring scan per indicator) and with a flat
+case-insensitive regex alternation over the whole text.
+
+Usage: python benchmarks/bench_detector.py [--mb 1 5 20] [--repeat 3]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.detector import TERM_SHEET_INDICATORS, HEADER_PATTERN, detect_term_sheet
+
+FILLER = "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt. "
+ALTERNATION = re.compile('|'.join(re.escape(indicator) for indicator in
+                                  sorted(TERM_SHEET_INDICATORS, key=len, reverse=True)), re.IGNORECASE)
+
+
+def build_documents(size):
+    body = FILLER * (size // len(FILLER))
+    return {
+        'header first': "TERM SHEET\n" + body,
+        'indicators at end': body + "\nValuation, governing law and confidentiality apply.",
+        'not a term sheet': body,
+    }
+
+
+def full_scan(text):
+    """
+    The previous approach - a full lowercase copy and one scan per indicator
+    """
+    text_lower = text.lower()
+    indicator_count = sum(1 for indicator in TERM_SHEET_INDICATORS if indicator in text_lower)
+    return bool(HEADER_PATTERN.search(text_lower)) or indicator_count >= 3
+
+
+def alternation(text):
+    found = {match.lower() for match in ALTERNATION.findall(text)}
+    return bool(HEADER_PATTERN.search(text.lower())) or len(found) >= 3
+
+
+def windowed(text):
+    return detect_term_sheet(text)['is_term_sheet']
+
+
+def best_time(func, text, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mb', type=float, nargs='+', default=[1, 5, 20])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-alternation', action='store_true', help='Skip the slow flat regex alternation')
+    args = parser.parse_args()
+
+    print(f"{'MB':>5} {'document':<18} {'full scan (ms)':>15} {'alternation (ms)':>17} {'windowed (ms)':>14}")
+    for mb in args.mb:
+        for name, text in build_documents(int(mb * 1024 * 1024)).items():
+            baseline, expected = best_time(full_scan, text, args.repeat)
+            scanned, actual = best_time(windowed, text, args.repeat)
+            assert expected == actual, f"detectors disagree on '{name}'"
+            if args.skip_alternation:
+                regex = '-'
+            else:
+                regex_time, regex_result = best_time(alternation, text, 1)
+                assert regex_result == expected
+                regex = f"{regex_time * 1000:.1f}"
+            print(f"{mb:>5} {name:<18} {baseline * 1000:>15.1f} {regex:>17} {scanned * 1000:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
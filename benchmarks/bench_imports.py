@@ -0,0 +1,56 @@
+"""
+Measures app boot time, peak RSS and which heavy libraries get imported
+
+Each scenario imports the Flask app in a fresh interpreter.
+
+Usage: python benchmarks/bench_imports.py [--repeat 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['pandas', 'numpy', 'cv2', 'PIL.Image', 'PyPDF2', 'docx']
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'seconds': elapsed,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'loaded': [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+SCENARIOS = {
+    'lazy (default)': {},
+    'PRELOAD_FORMATS=all': {'PRELOAD_FORMATS': 'all'},
+}
+
+
+def probe(extra_env):
+    env = dict(os.environ, ANALYSIS_CACHE='false', **extra_env)
+    output = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<22} {'import (s)':>10} {'max RSS (MB)':>13}  heavy modules loaded")
+    for name, extra_env in SCENARIOS.items():
+        runs = [probe(extra_env) for _ in range(args.repeat)]
+        best = min(runs, key=lambda run: run['seconds'])
+        print(f"{name:<22} {best['seconds']:>10.3f} {best['max_rss_mb']:>13.1f}  {', '.join(best['loaded']) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Benchmark harness for the whole pipeline on the synthetic corpus
+
+Times read_file_content, perform_ocr (with --ocr), is_term_sheet,
+extract_data, validate_term_sheet and generate_summary separately, plus
+analyze_term_sheet end to end, for every format and size. Reports p50/p99
+latency, throughput and peak traced memory per stage. Results can be saved
+as a JSON baseline and later runs compared against it.
+
+Usage: python benchmarks/bench_pipeline.py [--pages 1 10 100] [--formats txt pdf docx xlsx]
+           [--repeat 5] [--ocr] [--save-baseline FILE] [--baseline FILE] [--tolerance 0.2]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import CURRENCIES, DATE_FORMATS, FORMATS, generate_term_sheet, render
+from models.detector import is_term_sheet
+from models.extractor import extract_data
+from models.validator import validate_term_sheet
+from models.summarizer import generate_summary
+from utils.file_handler import read_file_content
+from utils.pipeline import analyze_term_sheet, NotATermSheetError
+
+OCR_FORMATS = {'pdf', 'png'}
+
+
+def percentile(samples, fraction):
+    """
+    Nearest-rank percentile of a list of numbers
+    """
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def measure(func, repeat):
+    """
+    Runs func `repeat` times for latency, then once more under tracemalloc
+
+    Returns:
+        tuple: (stats dict, result of the last call)
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+
+    # Tracing slows allocation down, so peak memory gets its own run
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50_ms': round(percentile(timings, 0.50) * 1000, 3),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 3),
+        'mean_ms': round(sum(timings) / len(timings) * 1000, 3),
+        'peak_kb': round(peak / 1024, 1),
+    }, result
+
+
+def analyze(path, use_ocr):
+    # Rejected documents (e.g. --density 0) still went through detection
+    try:
+        return analyze_term_sheet(path, use_ocr=use_ocr)
+    except NotATermSheetError:
+        return None
+
+
+def bench_file(path, file_format, repeat, use_ocr):
+    """
+    Benchmarks every stage on one document
+
+    Returns:
+        dict: stage -> stats
+    """
+    stages = {}
+    stages['read_file_content'], text = measure(lambda: read_file_content(path), repeat)
+    if use_ocr and file_format in OCR_FORMATS:
+        from utils.ocr import perform_ocr
+        stages['perform_ocr'], text = measure(lambda: perform_ocr(path), max(1, repeat // 5))
+    stages['is_term_sheet'], _ = measure(lambda: is_term_sheet(text), repeat)
+    stages['extract_data'], extracted = measure(lambda: extract_data(text), repeat)
+    stages['validate_term_sheet'], _ = measure(lambda: validate_term_sheet(extracted), repeat)
+    stages['generate_summary'], _ = measure(lambda: generate_summary(text), repeat)
+    stages['end_to_end'], _ = measure(lambda: analyze(path, use_ocr), repeat)
+
+    size = os.path.getsize(path)
+    p50 = stages['end_to_end']['p50_ms'] / 1000
+    stages['end_to_end']['docs_per_s'] = round(1 / p50, 2) if p50 else None
+    stages['end_to_end']['mb_per_s'] = round(size / (1024 * 1024) / p50, 2) if p50 else None
+    return stages
+
+
+def compare(results, baseline, tolerance):
+    """
+    Lists the stages whose p50 grew by more than `tolerance` over the baseline
+    """
+    regressions = []
+    for case, stages in results.items():
+        for stage, stats in stages.items():
+            previous = baseline.get('results', {}).get(case, {}).get(stage)
+            if not previous or not previous.get('p50_ms'):
+                continue
+            ratio = stats['p50_ms'] / previous['p50_ms']
+            # Sub-millisecond stages are too noisy to flag
+            if ratio > 1 + tolerance and stats['p50_ms'] - previous['p50_ms'] > 1:
+                regressions.append((case, stage, previous['p50_ms'], stats['p50_ms'], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=['txt', 'pdf', 'docx', 'xlsx'])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--density', type=float, default=1.0, help='Fraction of optional fields (0-1)')
+    parser.add_argument('--date-format', choices=sorted(DATE_FORMATS), default='slash')
+    parser.add_argument('--currency', choices=CURRENCIES, default='$')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ocr', action='store_true', help='Also time perform_ocr on pdf/png (needs easyocr)')
+    parser.add_argument('--save-baseline', metavar='FILE', help='Write the results to FILE as JSON')
+    parser.add_argument('--baseline', metavar='FILE', help='Compare against a saved baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed p50 slowdown vs. the baseline')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='termsheet-bench-')
+    results = {}
+    try:
+        print(f"{'case':<14} {'stage':<20} {'p50 (ms)':>10} {'p99 (ms)':>10} {'peak (KB)':>10}")
+        for pages in args.pages:
+            document = generate_term_sheet(pages, args.density, args.date_format, args.currency, args.seed)
+            for file_format in args.formats:
+                # Images only have text with OCR, and only their first page
+                # is rendered, so one size is enough
+                if file_format == 'png' and (not args.ocr or pages != args.pages[0]):
+                    continue
+                path = os.path.join(workdir, f"termsheet_{pages}p.{file_format}")
+                render(document, file_format, path)
+                case = f"{file_format}/{pages}p"
+                results[case] = bench_file(path, file_format, args.repeat, args.ocr)
+                for stage, stats in results[case].items():
+                    print(f"{case:<14} {stage:<20} {stats['p50_ms']:>10.2f} {stats['p99_ms']:>10.2f} "
+                          f"{stats['peak_kb']:>10.1f}")
+                end_to_end = results[case]['end_to_end']
+                print(f"{case:<14} {'throughput':<20} {end_to_end['docs_per_s']} docs/s, {end_to_end['mb_per_s']} MB/s")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'options': {key: value for key, value in vars(args).items() if key not in ('save_baseline', 'baseline')},
+        'results': results,
+    }
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for case, stage, before, after, ratio in regressions:
+            print(f"REGRESSION {case} {stage}: {before:.2f} ms -> {after:.2f} ms ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} of {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark for models/summarizer.py - checks generate_summary scales linearly
+
+Usage: python benchmarks/bench_summarizer.py [--sentences 1000 10000 50000] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.summarizer import generate_summary
+
+SENTENCES = [
+    "The Company shall issue Series A Preferred Stock to the Investors.",
+    "The aggregate investment amount shall be $12,500,000.",
+    "The pre-money valuation of the Company is $40 million.",
+    "Closing is subject to customary conditions.",
+    "This term sheet is not binding.",
+    "Investors will have customary information and registration rights.",
+    "The board of directors shall consist of five members.",
+    "Each party shall bear its own legal costs.",
+]
+
+
+def build_document(sentence_count, seed=0):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(SENTENCES) for _ in range(sentence_count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sentences', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'sentences':>10} {'chars':>10} {'time (s)':>10} {'us/sentence':>12}")
+    for count in args.sentences:
+        text = build_document(count)
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            generate_summary(text)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        # Linear scaling shows up as a flat time per sentence
+        print(f"{count:>10} {len(text):>10} {best:>10.4f} {best / count * 1e6:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""
+Synthetic term sheet corpus for the benchmarks
+
+Generates reproducible term sheets of a given size, field density, date
+format and currency, and renders them to txt, docx, xlsx, pdf or png. PDFs
+are written directly (one Helvetica text page per page) so no PDF library is
+needed; docx, xlsx and png use python-docx, openpyxl and Pillow.
+
+Usage: python benchmarks/corpus.py --out corpus [--pages 1 10 100] [--formats txt pdf docx]
+"""
+import argparse
+import os
+import random
+from datetime import date, timedelta
+
+LINES_PER_PAGE = 45
+
+# strftime formats, keyed by the name used on the command line
+DATE_FORMATS = {
+    'slash': '%d/%m/%Y',
+    'short': '%d %b %Y',
+    'long': '%d %B %Y',
+    'iso': '%Y-%m-%d',
+}
+CURRENCIES = ['$', '€', '£', '¥']
+FORMATS = ['txt', 'docx', 'xlsx', 'pdf', 'png']
+
+ISSUERS = ['Acme Robotics Inc', 'Northwind Analytics Ltd', 'Globex Biotech GmbH', 'Initech Software Corp']
+INVESTORS = ['Blue Harbor Capital LP', 'Summit Ventures Fund II', 'Redwood Growth Partners', 'Atlas Seed Fund']
+LAWS = ['State of New York', 'England and Wales', 'State of Delaware', 'Singapore']
+SECTIONS = ['CONVERSION', 'LIQUIDATION PREFERENCE', 'ANTI-DILUTION', 'BOARD COMPOSITION',
+            'INFORMATION RIGHTS', 'CONFIDENTIALITY', 'EXCLUSIVITY', 'EXPENSES']
+CLAUSE_WORDS = (
+    'the investor shall be entitled to receive such rights preference shares holders company '
+    'subject to applicable law agreement consent majority written notice closing conditions '
+    'completion documentation warranties covenants redemption dividend participation series '
+    'valuation conversion ratio adjustment pro rata basis board observer meeting quorum'
+).split()
+
+
+def generate_term_sheet(pages=1, field_density=1.0, date_format='slash', currency='$', seed=0):
+    """
+    Generates a synthetic term sheet
+
+    The labelled fields come first (a `field_density` fraction of them,
+    at least issuer, investor and amount when density > 0), followed by
+    numbered clauses under upper-case section headings until the
+    requested number of pages is filled.
+
+    Args:
+        pages (int): Number of pages of LINES_PER_PAGE lines
+        field_density (float): Fraction of the optional fields to include (0-1)
+        date_format (str): Key of DATE_FORMATS
+        currency (str): Currency symbol used for amounts
+        seed (int): Random seed, so the same arguments give the same document
+
+    Returns:
+        dict: 'pages' (list of lists of lines), 'fields' (label -> value)
+            and 'text' (the whole document)
+    """
+    rng = random.Random(seed)
+    fmt = DATE_FORMATS[date_format]
+    effective = date(2024, 1, 1) + timedelta(days=rng.randrange(365))
+    amount = rng.randrange(1, 100) * 250000
+    required = [
+        ('Issuer', rng.choice(ISSUERS)),
+        ('Investor', rng.choice(INVESTORS)),
+        ('Amount', f"{currency}{amount:,}"),
+    ]
+    optional = [
+        ('Effective Date', effective.strftime(fmt)),
+        ('Closing Date', (effective + timedelta(days=rng.randrange(15, 90))).strftime(fmt)),
+        ('Expiry Date', (effective + timedelta(days=365 * rng.randrange(1, 6))).strftime(fmt)),
+        ('Valuation', f"{currency}{amount * rng.randrange(3, 10):,}"),
+        ('Price per share', f"{currency}{rng.randrange(50, 2000) / 100:.2f}"),
+        ('Governing Law', rng.choice(LAWS)),
+        ('Jurisdiction', 'the courts of ' + rng.choice(LAWS)),
+    ]
+    fields = required if field_density > 0 else []
+    fields = fields + optional[:round(len(optional) * max(0.0, min(1.0, field_density)))]
+
+    lines = ['TERM SHEET', f"Series A Preferred Stock Financing of {fields[0][1] if fields else 'the Company'}", '']
+    lines += [f"{label}: {value}" for label, value in fields]
+    clause = 0
+    while len(lines) < pages * LINES_PER_PAGE:
+        if clause % 6 == 0:
+            lines += ['', SECTIONS[(clause // 6) % len(SECTIONS)]]
+        clause += 1
+        words = rng.choices(CLAUSE_WORDS, k=rng.randrange(10, 18))
+        lines.append(f"{clause}. {' '.join(words).capitalize()}.")
+    lines = lines[:max(pages, 1) * LINES_PER_PAGE]
+
+    page_lines = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+    return {
+        'pages': page_lines,
+        'fields': dict(fields),
+        'text': "\n".join(lines) + "\n",
+    }
+
+
+def _pdf_string(line):
+    escaped = line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return escaped.encode('cp1252', errors='replace')
+
+
+def write_pdf(pages, path):
+    """
+    Writes a minimal text-layer PDF, one page per list of lines
+    """
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    pages_id = font + 2 * len(pages) + 1
+    page_ids = []
+    for lines in pages:
+        stream = b"BT /F1 10 Tf 50 770 Td 16 TL " + b" ".join(b"(" + _pdf_string(line) + b") Tj T*" for line in lines) + b" ET"
+        contents = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        page_ids.append(add(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+                            b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (pages_id, contents, font)))
+    add(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % i for i in page_ids), len(page_ids)))
+    catalog = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    with open(path, 'wb') as f:
+        f.write(output)
+
+
+def write_docx(document, path):
+    import docx
+    doc = docx.Document()
+    doc.add_heading(document['pages'][0][0], 0)
+    table = doc.add_table(rows=0, cols=2)
+    for label, value in document['fields'].items():
+        cells = table.add_row().cells
+        cells[0].text = label
+        cells[1].text = value
+    field_lines = {f"{label}: {value}" for label, value in document['fields'].items()}
+    for line in document['text'].splitlines()[1:]:
+        if line not in field_lines:
+            doc.add_paragraph(line)
+    doc.save(path)
+
+
+def write_xlsx(document, path):
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Term Sheet')
+    field_lines = {f"{label}: {value}" for label, value in document['fields'].items()}
+    for line in document['text'].splitlines():
+        if line in field_lines:
+            label, value = line.split(': ', 1)
+            sheet.append([label, value])
+        else:
+            sheet.append([line])
+    workbook.save(path)
+
+
+def write_png(pages, path, dpi=150):
+    """
+    Renders the first page as a grayscale scan-like image
+    """
+    from PIL import Image, ImageDraw, ImageFont
+    width, height = int(8.5 * dpi), int(11 * dpi)
+    image = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.truetype('DejaVuSans.ttf', int(dpi / 7))
+    except OSError:
+        font = ImageFont.load_default()
+    line_height = int(dpi / 4.5)
+    for number, line in enumerate(pages[0]):
+        draw.text((dpi // 2, dpi // 2 + number * line_height), line, fill=0, font=font)
+    image.save(path, dpi=(dpi, dpi))
+
+
+def render(document, file_format, path):
+    """
+    Writes a generated document in the given format
+
+    Args:
+        document (dict): Output of generate_term_sheet()
+        file_format (str): One of FORMATS
+        path (str): Destination file
+    """
+    if file_format == 'txt':
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(document['text'])
+    elif file_format == 'pdf':
+        write_pdf(document['pages'], path)
+    elif file_format == 'docx':
+        write_docx(document, path)
+    elif file_format == 'xlsx':
+        write_xlsx(document, path)
+    elif file_format == 'png':
+        write_png(document['pages'], path)
+    else:
+        raise ValueError(f"Unknown format: {file_format}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--out', required=True, help='Directory to write the corpus to')
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=['txt', 'pdf', 'docx', 'xlsx'])
+    parser.add_argument('--density', type=float, default=1.0, help='Fraction of optional fields (0-1)')
+    parser.add_argument('--date-format', choices=sorted(DATE_FORMATS), default='slash')
+    parser.add_argument('--currency', choices=CURRENCIES, default='$')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for pages in args.pages:
+        document = generate_term_sheet(pages, args.density, args.date_format, args.currency, args.seed)
+        for file_format in args.formats:
+            path = os.path.join(args.out, f"termsheet_{pages}p.{file_format}")
+            render(document, file_format, path)
+            print(path)
+
+
+if __name__ == '__main__':
+    main()
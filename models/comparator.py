@@ -0,0 +1,216 @@
+"""
+Reference comparison module - compares extracted term sheet data with a reference template
+"""
+import heapq
+import re
+import time
+import zlib
+
+from models.extractor import extract_data, section_texts
+
+SHINGLE_SIZE = 3        # Words per shingle
+EXACT_SET_LIMIT = 4096  # Larger shingle sets are reduced to a bottom-k sketch
+SKETCH_SIZE = 256       # Hashes kept in a bottom-k sketch
+MAX_TOKENS = 200000     # Tokens considered per text, the rest is ignored
+DEFAULT_TIME_BUDGET = 2.0  # Seconds
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+(?:[.,][0-9]+)*')
+
+def tokenize(text, limit=MAX_TOKENS):
+    """
+    Splits text into lowercase word tokens
+
+    Args:
+        text (str): Text to tokenize
+        limit (int): Maximum number of tokens returned
+
+    Returns:
+        tuple: (list of tokens, whether the text was cut at `limit`)
+    """
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        if len(tokens) >= limit:
+            return tokens, True
+        tokens.append(match.group())
+    return tokens, False
+
+def signature(text, limit=MAX_TOKENS):
+    """
+    Builds a similarity signature from the word shingles of a text
+
+    Small texts keep their full set of shingle hashes (exact Jaccard); large
+    ones keep only the SKETCH_SIZE smallest hashes (bottom-k MinHash), so the
+    signature has a fixed size whatever the length of the text. Hashes are
+    CRC32 so signatures can be stored and compared across processes.
+
+    Args:
+        text (str): Text to sign
+        limit (int): Maximum number of tokens considered
+
+    Returns:
+        dict: 'hashes' (sorted list), 'exact' flag and 'truncated' flag
+    """
+    tokens, truncated = tokenize(text, limit)
+    if len(tokens) < SHINGLE_SIZE:
+        shingles = {' '.join(tokens)} if tokens else set()
+    else:
+        shingles = {' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    hashes = {zlib.crc32(shingle.encode('utf-8')) for shingle in shingles}
+
+    exact = len(hashes) <= EXACT_SET_LIMIT
+    if not exact:
+        hashes = heapq.nsmallest(SKETCH_SIZE, hashes)
+    return {'hashes': sorted(hashes), 'exact': exact, 'truncated': truncated}
+
+def signature_similarity(first, second):
+    """
+    Estimates the Jaccard similarity of two signatures
+
+    Returns:
+        float: Similarity between 0 and 1
+    """
+    a, b = first['hashes'], second['hashes']
+    if not a and not b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    if first['exact'] and second['exact']:
+        a, b = set(a), set(b)
+        return len(a & b) / len(a | b)
+
+    # Bottom-k estimate: the k smallest hashes of the union are a uniform
+    # sample of it; count how many of them are in both sets
+    k = min(SKETCH_SIZE, len(a), len(b))
+    a, b = set(a[:k]), set(b[:k])
+    union_sample = heapq.nsmallest(k, a | b)
+    return sum(1 for h in union_sample if h in a and h in b) / len(union_sample)
+
+def token_set_similarity(first, second):
+    """
+    Jaccard similarity of the word sets of two short values (e.g. field values)
+    """
+    a = set(tokenize(first)[0])
+    b = set(tokenize(second)[0])
+    if not a and not b:
+        return 1.0 if first.strip().lower() == second.strip().lower() else 0.0
+    return len(a & b) / len(a | b)
+
+def _normalize_section(name):
+    return ' '.join(name.lower().split())
+
+def _field_values(extracted_data):
+    for group, fields in extracted_data.items():
+        if group in ('sections', 'raw_sections') or not isinstance(fields, dict):
+            continue
+        for field, value in fields.items():
+            yield f"{group}.{field}", value
+
+def parse_reference(reference_text):
+    """
+    Parses a reference template once into fields, sections and signatures
+
+    Args:
+        reference_text (str): Reference template text
+
+    Returns:
+        dict: Reference profile accepted by compare_to_reference()
+    """
+    extracted = extract_data(reference_text)
+    return {
+        'fields': dict(_field_values(extracted)),
+        'sections': {
+            _normalize_section(name): signature(text)
+            for name, text in section_texts(reference_text, extracted['sections']).items()
+        },
+        'signature': signature(reference_text),
+    }
+
+def compare_to_reference(extracted_data, reference, time_budget=DEFAULT_TIME_BUDGET, text=None):
+    """
+    Compares extracted term sheet data with a reference template
+
+    Fields are compared value by value (word-set Jaccard) and sections by
+    shingle signatures, which is near-linear in the size of the documents.
+    Once `time_budget` seconds have passed, remaining sections are skipped
+    and the result is flagged as truncated.
+
+    Args:
+        extracted_data (dict): Output of extract_data() for the term sheet
+        reference (str or dict): Reference template text or a parse_reference() profile
+        time_budget (float): Seconds the comparison may take
+        text (str, optional): The document text the section spans of
+            extracted_data point into; sections are skipped without it
+
+    Returns:
+        dict: Overall similarity (0-1), per-field diffs, per-section scores
+            and whether the comparison was truncated
+    """
+    deadline = time.perf_counter() + time_budget
+    if isinstance(reference, str):
+        reference = parse_reference(reference)
+    truncated = reference['signature']['truncated']
+
+    # Field by field
+    field_diffs = []
+    field_scores = []
+    for path, value in _field_values(extracted_data):
+        expected = reference['fields'].get(path)
+        if value is None and expected is None:
+            continue
+        if value is None:
+            score, status = 0.0, 'missing'
+        elif expected is None:
+            score, status = 0.0, 'not_in_reference'
+        else:
+            score = token_set_similarity(str(value), str(expected))
+            status = 'match' if score == 1.0 else 'differs'
+        field_scores.append(score)
+        field_diffs.append({
+            'field': path,
+            'value': value,
+            'reference': expected,
+            'similarity': round(score, 4),
+            'status': status,
+        })
+
+    # Section by section
+    if 'raw_sections' in extracted_data:
+        raw_sections = extracted_data['raw_sections']
+    else:
+        raw_sections = section_texts(text, extracted_data.get('sections', [])) if text is not None else {}
+    document_sections = {
+        _normalize_section(name): section
+        for name, section in raw_sections.items()
+    }
+    section_scores = {}
+    for name in sorted(set(document_sections) | set(reference['sections'])):
+        if time.perf_counter() > deadline:
+            truncated = True
+            break
+        if name not in document_sections or name not in reference['sections']:
+            section_scores[name] = 0.0
+            continue
+        section_signature = signature(document_sections[name])
+        truncated = truncated or section_signature['truncated']
+        section_scores[name] = round(signature_similarity(section_signature, reference['sections'][name]), 4)
+
+    # Whole document body against the whole reference
+    text_score = None
+    if document_sections and time.perf_counter() <= deadline:
+        text_score = signature_similarity(signature('\n'.join(document_sections.values())),
+                                          reference['signature'])
+
+    components = []
+    if field_scores:
+        components.append(sum(field_scores) / len(field_scores))
+    if section_scores:
+        components.append(sum(section_scores.values()) / len(section_scores))
+    if text_score is not None:
+        components.append(text_score)
+
+    return {
+        'similarity': sum(components) / len(components) if components else 0.0,
+        'field_diffs': field_diffs,
+        'section_scores': section_scores,
+        'truncated': truncated,
+    }
@@ -2,6 +2,7 @@
 Term sheet detection module - determines if a document is likely a term sheet
 """
 import re
+from itertools import islice
 
 # List of common term sheet keywords and phrases
 TERM_SHEET_INDICATORS = [
@@ -17,29 +18,168 @@ TERM_SHEET_INDICATORS = [
     'maturity date', 'interest rate', 'principal amount'
 ]
 
-def is_term_sheet(text):
+HEADER_PATTERN = re.compile(r'\b(term\s*sheet|termsheet|term\s*of\s*agreement)\b')
+
+def _alternation(words):
     """
-    Determines if the given text is likely a term sheet based on keyword presence
+    Builds one regex alternation of the words, factored by common prefixes
+    (a trie), so each position is tried against a few branches rather than
+    every word
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            # A word ends here - the longer words are optional
+            pattern = (pattern if len(branches) > 1 else '(?:' + pattern + ')') + '?'
+        return pattern
+    
+    return re.compile(build(trie))
+
+# Every indicator in a single matcher, so a window is scanned once rather
+# than once per indicator
+INDICATOR_PATTERN = _alternation(TERM_SHEET_INDICATORS)
+
+# Indicators found whenever an indicator is: the ones it contains (e.g.
+# 'valuation' in 'pre-money valuation')
+_CONTAINED = {indicator: [other for other in TERM_SHEET_INDICATORS if other in indicator]
+              for indicator in TERM_SHEET_INDICATORS}
+
+# Text is scanned in windows of this many characters, so only one window is
+# ever lowercased at a time and scanning stops as soon as the answer is known
+WINDOW_SIZE = 64 * 1024
+
+# Characters carried over between windows so matches spanning a window or
+# page boundary are still found
+WINDOW_OVERLAP = 128
+
+# Number of indicators that make a document a term sheet without a header
+MIN_INDICATORS = 3
+
+def _windows(chunks):
+    """
+    Splits a stream of chunks into windows of at most WINDOW_SIZE characters
+    """
+    for chunk in chunks:
+        for start in range(0, len(chunk), WINDOW_SIZE):
+            yield chunk[start:start + WINDOW_SIZE]
+
+def _find_header(window, final, start=0):
+    # Every header starts with "term" - only try the pattern where it occurs.
+    # Characters before `start` are only context for the \b check.
+    position = window.find('term', start)
+    while position != -1:
+        match = HEADER_PATTERN.match(window, position)
+        # A match touching the end of the window may continue into the next
+        # one (e.g. "term sheets"), so leave it to the overlap
+        if match and (final or match.end() < len(window)):
+            return True
+        position = window.find('term', position + 1)
+    return False
+
+def detect_term_sheet(text, max_chars=None, max_chunks=None, exhaustive=False):
+    """
+    Scores how likely the given text is a term sheet
+    
+    Indicators are looked up in lowercased windows of the text with a single
+    multi-pattern matcher, and the scan stops as soon as the decision is
+    certain (a header or MIN_INDICATORS indicators) unless `exhaustive` is set.
     
     Args:
-        text (str): The document text to analyze
+        text (str or iterable): The document text, or the document as a stream
+            of consecutive chunks (e.g. PDF pages). Chunks are consumed only
+            until the decision is certain.
+        max_chars (int, optional): Only look at the first N characters
+        max_chunks (int, optional): Only look at the first N chunks
+        exhaustive (bool): Keep scanning to collect every matched indicator
         
     Returns:
-        bool: True if the document is likely a term sheet, False otherwise
+        dict: Decision, confidence (0-1), whether a header was found, the
+            matched indicators and the number of characters scanned
     """
-    if not text or not isinstance(text, str):
-        return False
+    result = {
+        'is_term_sheet': False,
+        'confidence': 0.0,
+        'has_header': False,
+        'matched_indicators': [],
+        'chars_scanned': 0,
+    }
+    if not text:
+        return result
+    if isinstance(text, str):
+        chunks = [text]
+    elif hasattr(text, '__iter__'):
+        chunks = text
+    else:
+        return result
     
-    # Convert to lowercase for case-insensitive matching
-    text_lower = text.lower()
+    if max_chunks is not None:
+        # Stop pulling chunks from the stream once the limit is reached
+        chunks = islice(chunks, max_chunks)
     
-    # Count how many term sheet indicators are present
-    indicator_count = sum(1 for indicator in TERM_SHEET_INDICATORS if indicator in text_lower)
+    found = set()
+    tail = ''
+    start = 0
+    windows = _windows(chunks)
+    window = next(windows, None)
+    while window is not None:
+        if max_chars is not None:
+            window = window[:max(0, max_chars - result['chars_scanned'])]
+        result['chars_scanned'] += len(window)
+        upcoming = None
+        if max_chars is None or result['chars_scanned'] < max_chars:
+            upcoming = next(windows, None)
+        
+        # Convert to lowercase for case-insensitive matching
+        current = tail + window.lower()
+        
+        # Collect the term sheet indicators present, in a single pass. Each
+        # search restarts one character after the previous match, so
+        # overlapping indicators are found too.
+        match = INDICATOR_PATTERN.search(current)
+        while match:
+            found.update(_CONTAINED[match.group()])
+            match = INDICATOR_PATTERN.search(current, match.start() + 1)
+        
+        # Check for common term sheet headers
+        if not result['has_header']:
+            result['has_header'] = _find_header(current, upcoming is None, start)
+        
+        # A document is considered a term sheet if it has either:
+        # 1. A clear term sheet header, or
+        # 2. Multiple term sheet indicators (at least 3)
+        if not exhaustive and (result['has_header'] or len(found) >= MIN_INDICATORS):
+            break
+        # One more character than the overlap, as context for a header
+        # starting right at the overlap (e.g. the "term" of "xterm sheet")
+        start = 1 if len(current) > WINDOW_OVERLAP + 1 else 0
+        tail = current[-(WINDOW_OVERLAP + 1):]
+        window = upcoming
     
-    # Check for common term sheet headers
-    has_term_sheet_header = bool(re.search(r'\b(term\s*sheet|termsheet|term\s*of\s*agreement)\b', text_lower))
+    result['matched_indicators'] = [indicator for indicator in TERM_SHEET_INDICATORS if indicator in found]
+    result['is_term_sheet'] = result['has_header'] or len(found) >= MIN_INDICATORS
+    result['confidence'] = 1.0 if result['is_term_sheet'] else round(len(found) / MIN_INDICATORS, 2)
+    return result
+
+def is_term_sheet(text, max_chars=None, max_chunks=None):
+    """
+    Determines if the given text is likely a term sheet based on keyword presence
     
-    # A document is considered a term sheet if it has either:
-    # 1. A clear term sheet header, or
-    # 2. Multiple term sheet indicators (at least 3)
-    return has_term_sheet_header or indicator_count >= 3
\ No newline at end of file
+    Args:
+        text (str or iterable): The document text, or a stream of its chunks
+        max_chars (int, optional): Only look at the first N characters
+        max_chunks (int, optional): Only look at the first N chunks
+        
+    Returns:
+        bool: True if the document is likely a term sheet, False otherwise
+    """
+    return detect_term_sheet(text, max_chars, max_chunks)['is_term_sheet']
\ No newline at end of file
@@ -2,18 +2,201 @@
 Data extraction module - extracts structured data from term sheets
 """
 import re
+import heapq
 from datetime import datetime
 
-def extract_data(text):
+# Looking for dates in common formats
+DATE_PATTERN = r'(\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{2,4})'
+AMOUNT_PATTERN = r'([$€£¥]?\s*\d+(?:,\d{3})*(?:\.\d+)?(?:\s*(?:million|m|billion|b))?)'
+PRICE_PATTERN = r'([$€£¥]?\s*\d+(?:,\d{3})*(?:\.\d+)?)'
+
+# Field registry: (group, field, labels, value pattern). A field matches one
+# of its labels (case-insensitive, any whitespace between words), a
+# separator and the value; the first match in the document wins.
+FIELD_SPECS = [
+    ('parties', 'issuer', ['issuer', 'company', 'seller'], r'([^,\n]+)'),
+    ('parties', 'investor', ['investor', 'purchaser', 'buyer'], r'([^,\n]+)'),
+    ('dates', 'effective_date', ['effective date', 'date of agreement'], DATE_PATTERN),
+    ('dates', 'expiry_date', ['expiry date', 'expiration date', 'termination date'], DATE_PATTERN),
+    ('dates', 'closing_date', ['closing date'], DATE_PATTERN),
+    ('financial_terms', 'amount', ['amount', 'principal', 'investment'], AMOUNT_PATTERN),
+    ('financial_terms', 'valuation', ['valuation', 'company valuation', 'pre-money'], AMOUNT_PATTERN),
+    ('financial_terms', 'share_price', ['share price', 'price per share'], PRICE_PATTERN),
+    ('legal_terms', 'governing_law', ['governing law', 'law'], r'([^,\n.]+)'),
+    ('legal_terms', 'jurisdiction', ['jurisdiction'], r'([^,\n.]+)'),
+]
+
+def _label_pattern(labels):
+    return '(?:' + '|'.join(r'\s+'.join(re.escape(word) for word in label.split()) for label in labels) + ')'
+
+# Compiled once at import time: (group, field), pattern, first word of each label
+FIELD_PATTERNS = [
+    ((group, field),
+     re.compile(_label_pattern(labels) + r'[:\s]+' + value, re.IGNORECASE),
+     sorted({label.split()[0] for label in labels}))
+    for group, field, labels, value in FIELD_SPECS
+]
+
+# Normalized label -> (group, field, compiled value pattern), used to map
+# table label/value pairs without searching the text
+FIELD_LABELS = {
+    label: (group, field, re.compile(value, re.IGNORECASE))
+    for group, field, labels, value in FIELD_SPECS
+    for label in labels
+}
+
+# Characters that re.IGNORECASE folds onto ASCII letters but str.lower()
+# doesn't (or that change length when lowered). Texts containing them use
+# the plain per-field search so results stay identical.
+_UNSAFE_CASE_CHARS = re.compile('[\u0130\u0131\u017f\u212a]')
+
+CURRENCY_PATTERN = re.compile(r'([$€£¥])')
+SECTION_PATTERN = re.compile(r'(?:^|\n)([A-Z][A-Z\s]+)(?::|\.|\n)')
+
+def _word_offsets(text_lower, word):
+    offsets = []
+    position = text_lower.find(word)
+    while position != -1:
+        offsets.append(position)
+        position = text_lower.find(word, position + 1)
+    return offsets
+
+def _scan_fields(text, keys=None):
     """
-    Extracts structured data from term sheet text
+    Finds the first match of every registered field using a keyword index
+    
+    A field can only match where one of its labels starts, so the offsets
+    of each label's first word are collected once with str.find over a
+    lowercased copy of the text. Each field pattern is then tried only at
+    its candidate offsets, left to right, which gives the same result as a
+    separate re.search() per field without rescanning the whole document.
+    
+    Args:
+        text (str): The term sheet text
+        keys (set, optional): (group, field) keys to look for (default: all)
+        
+    Returns:
+        dict: (group, field) -> match object for every field that was found
+    """
+    found = {}
+    patterns = [spec for spec in FIELD_PATTERNS if keys is None or spec[0] in keys]
+    text_lower = text.lower()
+    if len(text_lower) != len(text) or _UNSAFE_CASE_CHARS.search(text):
+        for key, pattern, _ in patterns:
+            match = pattern.search(text)
+            if match:
+                found[key] = match
+        return found
+    
+    index = {}
+    for key, pattern, words in patterns:
+        for word in words:
+            if word not in index:
+                index[word] = _word_offsets(text_lower, word)
+        candidates = heapq.merge(*(index[word] for word in words))
+        for position in candidates:
+            match = pattern.match(text, position)
+            if match:
+                found[key] = match
+                break
+    return found
+
+def _match_pairs(pairs):
+    """
+    Maps table label/value pairs onto registered fields by their label
+    
+    The label must equal one of the field's labels (ignoring case, spacing
+    and a trailing colon) and the value must match the field's value
+    pattern; the first such pair per field wins.
+    
+    Args:
+        pairs (iterable): (label, value) pairs, e.g. from
+            utils.file_handler.read_structured_content
+        
+    Returns:
+        dict: (group, field) -> extracted value
+    """
+    found = {}
+    for label, value in pairs:
+        entry = FIELD_LABELS.get(" ".join(label.lower().rstrip(':').split()))
+        if not entry or (entry[0], entry[1]) in found:
+            continue
+        match = entry[2].match(value.strip())
+        if match:
+            found[(entry[0], entry[1])] = match.group(1).strip()
+    return found
+
+def _strip_span(text, start, end):
+    """
+    Narrows text[start:end] to the offsets of its .strip()ped content
+    """
+    segment = text[start:end]
+    stripped_start = start + len(segment) - len(segment.lstrip())
+    return stripped_start, max(stripped_start, start + len(segment.rstrip()))
+
+def find_sections(text):
+    """
+    Finds the upper-case headed sections of a document
+    
+    A section runs from its heading to the next heading (or the end of the
+    text), with surrounding whitespace trimmed.
     
     Args:
         text (str): The term sheet text
         
     Returns:
-        dict: Extracted data fields
+        list: {'name', 'start', 'end'} spans in document order
+    """
+    sections = []
+    for match in SECTION_PATTERN.finditer(text):
+        if sections:
+            sections[-1]['start'], sections[-1]['end'] = _strip_span(text, sections[-1]['start'], match.start())
+        sections.append({'name': match.group(1).strip(), 'start': match.start(), 'end': len(text)})
+    if sections:
+        sections[-1]['start'], sections[-1]['end'] = _strip_span(text, sections[-1]['start'], len(text))
+    return sections
+
+def section_texts(text, sections):
+    """
+    Materializes section spans into a name -> text dict
+    
+    Like the old raw_sections, a repeated heading keeps its first position
+    and its last text.
+    
+    Args:
+        text (str): The text the spans were found in
+        sections (list): Spans from find_sections()
+        
+    Returns:
+        dict: Section name -> section text
+    """
+    return {section['name']: text[section['start']:section['end']] for section in sections}
+
+def with_section_texts(extracted_data, text):
+    """
+    Returns a copy of extract_data() output with 'raw_sections' filled in from text
+    """
+    if 'sections' not in extracted_data:
+        return extracted_data
+    return dict(extracted_data, raw_sections=section_texts(text, extracted_data.get('sections', [])))
+
+def extract_data(text, pairs=None):
+    """
+    Extracts structured data from term sheet text
+    
+    Args:
+        text (str or iterable): The term sheet text, or consecutive chunks of it
+            (e.g. the pages yielded by utils.file_handler.iter_file_pages)
+        pairs (list, optional): Label/value pairs read from the document's
+            tables; fields found there skip the regex search over the text
+        
+    Returns:
+        dict: Extracted data fields; 'sections' holds {'name', 'start', 'end'}
+            spans over the text (see section_texts())
     """
+    if not isinstance(text, str):
+        text = "".join(text)
+    
     # Initialize extracted data structure
     extracted_data = {
         'parties': {
@@ -36,84 +219,28 @@ def extract_data(text):
             'jurisdiction': None,
             'confidentiality': None,
         },
-        'raw_sections': {}
+        'sections': []
     }
     
-    # Extract parties
-    issuer_match = re.search(r'(?:issuer|company|seller)[:\s]+([^,\n]+)', text, re.IGNORECASE)
-    if issuer_match:
-        extracted_data['parties']['issuer'] = issuer_match.group(1).strip()
-    
-    investor_match = re.search(r'(?:investor|purchaser|buyer)[:\s]+([^,\n]+)', text, re.IGNORECASE)
-    if investor_match:
-        extracted_data['parties']['investor'] = investor_match.group(1).strip()
-    
-    # Extract dates
-    # Looking for dates in common formats
-    date_pattern = r'(\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{2,4})'
-    
-    effective_match = re.search(r'(?:effective\s+date|date\s+of\s+agreement)[:\s]+' + date_pattern, text, re.IGNORECASE)
-    if effective_match:
-        extracted_data['dates']['effective_date'] = effective_match.group(1).strip()
-    
-    expiry_match = re.search(r'(?:expiry\s+date|expiration\s+date|termination\s+date)[:\s]+' + date_pattern, text, re.IGNORECASE)
-    if expiry_match:
-        extracted_data['dates']['expiry_date'] = expiry_match.group(1).strip()
-    
-    closing_match = re.search(r'(?:closing\s+date)[:\s]+' + date_pattern, text, re.IGNORECASE)
-    if closing_match:
-        extracted_data['dates']['closing_date'] = closing_match.group(1).strip()
-    
-    # Extract financial terms
-    # Find currency symbols and amounts
-    amount_match = re.search(r'(?:amount|principal|investment)[:\s]+([$€£¥]?\s*\d+(?:,\d{3})*(?:\.\d+)?(?:\s*(?:million|m|billion|b))?)', text, re.IGNORECASE)
-    if amount_match:
-        amount_str = amount_match.group(1).strip()
-        # Try to separate currency symbol from amount
-        currency_match = re.search(r'([$€£¥])', amount_str)
+    # Table cells first, then one keyword index over the text for the rest
+    structured = _match_pairs(pairs) if pairs else {}
+    for (group, field), value in structured.items():
+        extracted_data[group][field] = value
+    unresolved = {key for key, _, _ in FIELD_PATTERNS if key not in structured}
+    if unresolved:
+        for (group, field), match in _scan_fields(text, unresolved).items():
+            extracted_data[group][field] = match.group(1).strip()
+    
+    # Try to separate currency symbol from amount
+    amount_str = extracted_data['financial_terms']['amount']
+    if amount_str:
+        currency_match = CURRENCY_PATTERN.search(amount_str)
         if currency_match:
             extracted_data['financial_terms']['currency'] = currency_match.group(1)
-            amount_str = amount_str.replace(currency_match.group(1), '').strip()
-        
-        extracted_data['financial_terms']['amount'] = amount_str
-    
-    valuation_match = re.search(r'(?:valuation|company\s+valuation|pre-money)[:\s]+([$€£¥]?\s*\d+(?:,\d{3})*(?:\.\d+)?(?:\s*(?:million|m|billion|b))?)', text, re.IGNORECASE)
-    if valuation_match:
-        extracted_data['financial_terms']['valuation'] = valuation_match.group(1).strip()
-    
-    share_price_match = re.search(r'(?:share\s+price|price\s+per\s+share)[:\s]+([$€£¥]?\s*\d+(?:,\d{3})*(?:\.\d+)?)', text, re.IGNORECASE)
-    if share_price_match:
-        extracted_data['financial_terms']['share_price'] = share_price_match.group(1).strip()
-    
-    # Extract legal terms
-    law_match = re.search(r'(?:governing\s+law|law)[:\s]+([^,\n.]+)', text, re.IGNORECASE)
-    if law_match:
-        extracted_data['legal_terms']['governing_law'] = law_match.group(1).strip()
-    
-    jurisdiction_match = re.search(r'(?:jurisdiction)[:\s]+([^,\n.]+)', text, re.IGNORECASE)
-    if jurisdiction_match:
-        extracted_data['legal_terms']['jurisdiction'] = jurisdiction_match.group(1).strip()
-    
-    # Extract document sections - simple section detection
-    section_pattern = r'(?:^|\n)([A-Z][A-Z\s]+)(?::|\.|\n)'
-    sections = re.finditer(section_pattern, text)
-    current_section = None
-    section_starts = []
-    
-    for match in sections:
-        section_name = match.group(1).strip()
-        start_pos = match.start()
-        if current_section:
-            # Save the previous section with text up to this point
-            section_text = text[section_starts[-1]:start_pos].strip()
-            extracted_data['raw_sections'][current_section] = section_text
-        
-        current_section = section_name
-        section_starts.append(start_pos)
+            extracted_data['financial_terms']['amount'] = amount_str.replace(currency_match.group(1), '').strip()
     
-    # Don't forget the last section
-    if current_section and section_starts:
-        section_text = text[section_starts[-1]:].strip()
-        extracted_data['raw_sections'][current_section] = section_text
+    # Extract document sections - simple section detection. Sections are
+    # kept as (name, start, end) spans over the text rather than copies.
+    extracted_data['sections'] = find_sections(text)
     
     return extracted_data
\ No newline at end of file
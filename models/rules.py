@@ -0,0 +1,363 @@
+"""
+Validation rules module - declarative term sheet rules compiled into checkers
+
+Rules are plain dicts so they can be loaded from configuration:
+
+    {'type': 'required', 'field': 'parties.issuer', 'label': 'Issuer/Company name'}
+    {'type': 'date', 'fields': ['dates.effective_date', ...], 'formats': [...]}
+    {'type': 'amount', 'field': 'financial_terms.amount', 'min': 0, 'max': None}
+    {'type': 'after', 'field': 'dates.closing_date', 'other': 'dates.effective_date'}
+
+Every rule has an optional 'severity' ('error' or 'warning'). compile_rules()
+turns them into checkers that validate one record (check) or a whole
+column-oriented batch of records at once (check_columns).
+"""
+import re
+from datetime import datetime
+from functools import lru_cache
+
+DATE_FORMATS = ['%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y', '%m-%d-%Y',
+                '%d %b %Y', '%d %B %Y', '%b %d, %Y', '%B %d, %Y']
+
+DEFAULT_RULES = [
+    {'type': 'required', 'field': 'parties.issuer', 'label': 'Issuer/Company name'},
+    {'type': 'required', 'field': 'parties.investor', 'label': 'Investor name'},
+    {'type': 'required', 'field': 'financial_terms.amount', 'label': 'Investment amount'},
+    {'type': 'date', 'fields': ['dates.effective_date', 'dates.expiry_date', 'dates.closing_date']},
+    {'type': 'amount', 'field': 'financial_terms.amount', 'label': 'Investment amount', 'min': 0},
+    {'type': 'after', 'field': 'dates.closing_date', 'other': 'dates.effective_date',
+     'label': 'Closing date', 'other_label': 'effective date'},
+]
+
+# Amounts as the extractor finds them: optional symbol, digits with
+# thousands separators, optional million/billion suffix. The suffix must
+# be a whole word, so 'm' no longer matches any string containing an "m".
+AMOUNT_PATTERN = re.compile(
+    r'^\s*[$€£¥]?\s*(\d+(?:,\d{3})*(?:\.\d+)?|\.\d+)\s*(million|mn|m|billion|bn|b|thousand|k)?\.?\s*$',
+    re.IGNORECASE)
+AMOUNT_MULTIPLIERS = {
+    None: 1, 'thousand': 1e3, 'k': 1e3,
+    'million': 1e6, 'mn': 1e6, 'm': 1e6,
+    'billion': 1e9, 'bn': 1e9, 'b': 1e9,
+}
+
+_FORMAT_TOKENS = {
+    '%d': r'\d{1,2}', '%m': r'\d{1,2}', '%Y': r'\d{4}',
+    '%b': r'[A-Za-z]{3}', '%B': r'[A-Za-z]+',
+}
+
+
+def _literal_pattern(text):
+    # Like strptime, whitespace in a format matches any run of whitespace
+    return r'\s+'.join(re.escape(piece) for piece in re.split(r'\s+', text))
+
+
+def _format_pattern(fmt):
+    parts = re.split(r'(%[a-zA-Z])', fmt)
+    return re.compile('^' + ''.join(_FORMAT_TOKENS.get(part) or _literal_pattern(part) for part in parts) + '$')
+
+
+@lru_cache(maxsize=None)
+def _compiled_formats(formats):
+    # Cheap shape pre-checks, so strptime only runs for formats that can match
+    return tuple((fmt, _format_pattern(fmt)) for fmt in formats)
+
+
+@lru_cache(maxsize=65536)
+def parse_date(value, formats=tuple(DATE_FORMATS)):
+    """
+    Parses a date with the first of `formats` that fits
+
+    Results are cached, so repeated values (common across a batch) are
+    parsed once.
+
+    Args:
+        value (str): Date as extracted from the document
+        formats (tuple): strptime formats, tried in order
+
+    Returns:
+        tuple: (format, datetime) or (None, None) if no format fits
+    """
+    value = value.strip()
+    for fmt, pattern in _compiled_formats(formats):
+        if pattern.match(value):
+            try:
+                return fmt, datetime.strptime(value, fmt)
+            except ValueError:
+                continue
+    return None, None
+
+
+@lru_cache(maxsize=65536)
+def parse_amount(value):
+    """
+    Parses an extracted amount such as '$5,000,000' or '2.5 million'
+
+    Args:
+        value (str): Amount as extracted from the document
+
+    Returns:
+        float or None: The numeric amount, or None if it can't be parsed
+    """
+    match = AMOUNT_PATTERN.match(value)
+    if not match:
+        return None
+    suffix = match.group(2).lower() if match.group(2) else None
+    return float(match.group(1).replace(',', '')) * AMOUNT_MULTIPLIERS[suffix]
+
+
+def field_getter(path):
+    """
+    Compiles a dotted path such as 'parties.issuer' into a lookup function
+    """
+    parts = tuple(path.split('.'))
+
+    def get(record):
+        value = record
+        for part in parts:
+            value = value.get(part) if isinstance(value, dict) else None
+            if value is None:
+                return None
+        return value
+    return get
+
+
+class RequiredRule:
+    """The field must be present and non-empty"""
+
+    default_severity = 'error'
+
+    def __init__(self, spec):
+        self.field = spec['field']
+        self.label = spec.get('label', self.field)
+        self.severity = spec.get('severity', self.default_severity)
+        self.get = field_getter(self.field)
+
+    def check(self, record):
+        value = self.get(record)
+        if value is None or value == '':
+            return [(self.severity, f"Missing required field: {self.label}", self.label)]
+        return []
+
+    def check_columns(self, columns, np):
+        values = columns[self.field]
+        missing = np.flatnonzero(np.equal(values, None) | np.equal(values, ''))
+        return [(index, self.severity, f"Missing required field: {self.label}", self.label) for index in missing]
+
+
+class DateRule:
+    """Each field, when present, must parse with one of the formats"""
+
+    default_severity = 'warning'
+
+    def __init__(self, spec):
+        self.fields = spec.get('fields') or [spec['field']]
+        self.formats = tuple(spec.get('formats') or DATE_FORMATS)
+        self.severity = spec.get('severity', self.default_severity)
+        self.getters = [(field.rsplit('.', 1)[-1], field_getter(field)) for field in self.fields]
+
+    def _message(self, key, value):
+        return f"Date format for {key} may be invalid: {value}"
+
+    def check(self, record):
+        problems = []
+        for key, get in self.getters:
+            value = get(record)
+            if value and parse_date(value, self.formats)[0] is None:
+                problems.append((self.severity, self._message(key, value), None))
+        return problems
+
+    def check_columns(self, columns, np):
+        problems = []
+        for field, (key, _) in zip(self.fields, self.getters):
+            parsed = date_column(columns[field], self.formats, np)
+            values = columns[field]
+            invalid = np.flatnonzero(np.isnat(parsed) & ~(np.equal(values, None) | np.equal(values, '')))
+            problems.extend((index, self.severity, self._message(key, values[index]), None) for index in invalid)
+        # Keep each record's messages in field order, as check() gives them
+        problems.sort(key=lambda problem: problem[0])
+        return problems
+
+
+class AmountRule:
+    """The field, when present, must parse as an amount within [min, max]"""
+
+    default_severity = 'warning'
+
+    def __init__(self, spec):
+        self.field = spec['field']
+        self.label = spec.get('label', self.field)
+        self.minimum = spec.get('min')
+        self.maximum = spec.get('max')
+        self.severity = spec.get('severity', self.default_severity)
+        self.get = field_getter(self.field)
+
+    def _out_of_range(self, amount):
+        return ((self.minimum is not None and amount < self.minimum) or
+                (self.maximum is not None and amount > self.maximum))
+
+    def _range_message(self, value):
+        return f"{self.label} {value} is outside the expected range"
+
+    def check(self, record):
+        value = self.get(record)
+        if not value:
+            return []
+        amount = parse_amount(value)
+        if amount is None:
+            return [(self.severity, f"Could not parse amount value: {value}", None)]
+        if self._out_of_range(amount):
+            return [(self.severity, self._range_message(value), None)]
+        return []
+
+    def check_columns(self, columns, np):
+        values = columns[self.field]
+        amounts = amount_column(values, np)
+        present = ~(np.equal(values, None) | np.equal(values, ''))
+        unparsed = present & np.isnan(amounts)
+        out_of_range = np.zeros(len(values), dtype=bool)
+        if self.minimum is not None:
+            out_of_range |= amounts < self.minimum
+        if self.maximum is not None:
+            out_of_range |= amounts > self.maximum
+        problems = [(index, self.severity, f"Could not parse amount value: {values[index]}", None)
+                    for index in np.flatnonzero(unparsed)]
+        problems.extend((index, self.severity, self._range_message(values[index]), None)
+                        for index in np.flatnonzero(out_of_range))
+        problems.sort(key=lambda problem: problem[0])
+        return problems
+
+
+class AfterRule:
+    """When both dates parse, `field` must not be earlier than `other`"""
+
+    default_severity = 'warning'
+
+    def __init__(self, spec):
+        self.field = spec['field']
+        self.other = spec['other']
+        self.label = spec.get('label', self.field)
+        self.other_label = spec.get('other_label', self.other)
+        self.formats = tuple(spec.get('formats') or DATE_FORMATS)
+        self.severity = spec.get('severity', self.default_severity)
+        self.get = field_getter(self.field)
+        self.get_other = field_getter(self.other)
+
+    def _message(self, value, other):
+        return f"{self.label} ({value}) is before the {self.other_label} ({other})"
+
+    def check(self, record):
+        value, other = self.get(record), self.get_other(record)
+        if not value or not other:
+            return []
+        date, other_date = parse_date(value, self.formats)[1], parse_date(other, self.formats)[1]
+        if date is not None and other_date is not None and date < other_date:
+            return [(self.severity, self._message(value, other), None)]
+        return []
+
+    def check_columns(self, columns, np):
+        values, others = columns[self.field], columns[self.other]
+        # NaT compares False, so unparsed dates never fail the check
+        earlier = date_column(values, self.formats, np) < date_column(others, self.formats, np)
+        return [(index, self.severity, self._message(values[index], others[index]), None)
+                for index in np.flatnonzero(earlier)]
+
+
+RULE_TYPES = {
+    'required': RequiredRule,
+    'date': DateRule,
+    'amount': AmountRule,
+    'after': AfterRule,
+}
+
+
+def compile_rules(rules=None):
+    """
+    Compiles rule specs into checkers
+
+    Args:
+        rules (list, optional): Rule dicts (default: DEFAULT_RULES)
+
+    Returns:
+        list: Checker objects with check(record) and check_columns(columns, np)
+
+    Raises:
+        ValueError: For an unknown rule type
+    """
+    compiled = []
+    for spec in DEFAULT_RULES if rules is None else rules:
+        rule_type = RULE_TYPES.get(spec.get('type'))
+        if rule_type is None:
+            raise ValueError(f"Unknown validation rule type: {spec.get('type')}")
+        compiled.append(rule_type(spec))
+    return compiled
+
+
+def rule_fields(compiled):
+    """
+    Returns every field path the compiled rules read, in first-use order
+    """
+    fields = []
+    for rule in compiled:
+        for field in getattr(rule, 'fields', None) or [rule.field] + ([rule.other] if hasattr(rule, 'other') else []):
+            if field not in fields:
+                fields.append(field)
+    return fields
+
+
+def gather_columns(records, fields, np):
+    """
+    Builds one object array per dotted field path from a list of records
+
+    Intermediate dicts are looked up once per prefix, so fields sharing a
+    group (e.g. every 'dates.*' field) only walk the records' top level once.
+    """
+    levels = {'': list(records)}
+    columns = {}
+    for field in fields:
+        parts = field.split('.')
+        for depth in range(1, len(parts) + 1):
+            prefix = '.'.join(parts[:depth])
+            if prefix not in levels:
+                key = parts[depth - 1]
+                parent = levels['.'.join(parts[:depth - 1])]
+                levels[prefix] = [value.get(key) if isinstance(value, dict) else None for value in parent]
+        column = np.empty(len(levels['']), dtype=object)
+        column[:] = levels[field]
+        columns[field] = column
+    return columns
+
+
+def _unique_map(values, parse, np):
+    # Parse each distinct value once and scatter the results back
+    present = ~(np.equal(values, None) | np.equal(values, ''))
+    result_indices = np.flatnonzero(present)
+    if not len(result_indices):
+        return result_indices, [], np.array([], dtype=np.intp)
+    uniques, inverse = np.unique(values[present].astype(str), return_inverse=True)
+    return result_indices, [parse(value) for value in uniques], inverse
+
+
+def date_column(values, formats, np):
+    """
+    Parses an object array of date strings into datetime64 (NaT when missing/invalid)
+    """
+    dates = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[s]')
+    indices, parsed, inverse = _unique_map(values, lambda value: parse_date(value, formats)[1], np)
+    if len(indices):
+        lookup = np.array([np.datetime64(date, 's') if date else np.datetime64('NaT') for date in parsed],
+                          dtype='datetime64[s]')
+        dates[indices] = lookup[inverse]
+    return dates
+
+
+def amount_column(values, np):
+    """
+    Parses an object array of amount strings into float64 (NaN when missing/invalid)
+    """
+    amounts = np.full(len(values), np.nan)
+    indices, parsed, inverse = _unique_map(values, parse_amount, np)
+    if len(indices):
+        lookup = np.array([np.nan if amount is None else amount for amount in parsed])
+        amounts[indices] = lookup[inverse]
+    return amounts
@@ -2,67 +2,93 @@
 Summarization module - generates a summary of term sheet content
 """
 import re
+import heapq
 
-def generate_summary(text):
+# Extract key parts based on common term sheet sections
+KEY_SECTIONS = [
+    'parties', 'financing', 'amount', 'valuation', 'price', 
+    'rights', 'conditions', 'closing', 'governance'
+]
+
+# Sentence scoring weights, see generate_summary()
+SUMMARY_WEIGHTS = {
+    'position': 0.3,       # Sentences at the beginning often contain key information
+    'keyword': 0.5,        # Per key section mentioned
+    'short_penalty': 0.2,  # Avoid very short sentences
+    'number': 0.3,         # Sentences with numbers (often key terms)
+    'money': 0.4,          # Sentences containing monetary values
+}
+
+# Compiled once - every sentence is scored with the same matchers
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?])\s+')
+KEYWORD_PATTERN = re.compile(r'\b(?:' + '|'.join(KEY_SECTIONS) + r')\b', re.IGNORECASE)
+NUMBER_PATTERN = re.compile(r'\d')
+MONEY_PATTERN = re.compile(r'[$€£¥]\s*\d+')
+
+def score_sentences(sentences, weights=None):
     """
-    Generates a summary of term sheet content
+    Scores sentences on position, key section keywords, numbers and money
     
     Args:
-        text (str): The term sheet text
+        sentences (list): Sentences in document order
+        weights (dict, optional): Overrides for SUMMARY_WEIGHTS
         
     Returns:
-        str: Generated summary
+        list: One score per sentence, in the same order
     """
-    # For a lightweight approach, we'll use extractive summarization
-    # by identifying key sections and sentences
-    
-    # Extract key parts based on common term sheet sections
-    key_sections = [
-        'parties', 'financing', 'amount', 'valuation', 'price', 
-        'rights', 'conditions', 'closing', 'governance'
-    ]
-    
-    # Split text into sentences
-    sentences = re.split(r'(?<=[.!?])\s+', text)
-    
-    # Score sentences based on keyword presence and position
-    scored_sentences = []
+    weights = dict(SUMMARY_WEIGHTS, **(weights or {}))
+    count = len(sentences)
+    scores = []
     for i, sentence in enumerate(sentences):
-        score = 0
-        
-        # Position score - sentences at the beginning often contain key information
-        position_score = max(0, 1.0 - (i / len(sentences)))
-        score += position_score * 0.3
+        # Position score
+        score = max(0, 1.0 - (i / count)) * weights['position']
         
-        # Keyword score
-        for section in key_sections:
-            if re.search(r'\b' + section + r'\b', sentence, re.IGNORECASE):
-                score += 0.5
+        # Keyword score - each distinct key section counts once
+        for _ in {match.lower() for match in KEYWORD_PATTERN.findall(sentence)}:
+            score += weights['keyword']
         
-        # Length penalty - avoid very short sentences
+        # Length penalty
         if len(sentence.split()) < 5:
-            score -= 0.2
+            score -= weights['short_penalty']
         
-        # Prioritize sentences with numbers (often key terms)
-        if re.search(r'\d', sentence):
-            score += 0.3
+        if NUMBER_PATTERN.search(sentence):
+            score += weights['number']
             
-        # Additional score for sentences containing monetary values
-        if re.search(r'[$€£¥]\s*\d+', sentence):
-            score += 0.4
+            # Monetary values always contain a digit
+            if MONEY_PATTERN.search(sentence):
+                score += weights['money']
         
-        scored_sentences.append((sentence, score))
+        scores.append(score)
+    return scores
+
+def generate_summary(text, max_sentences=5, weights=None):
+    """
+    Generates a summary of term sheet content
+    
+    Args:
+        text (str or iterable): The term sheet text, or consecutive chunks of it
+        max_sentences (int): Number of top-scoring sentences to keep
+        weights (dict, optional): Overrides for SUMMARY_WEIGHTS
+        
+    Returns:
+        str: Generated summary
+    """
+    if not isinstance(text, str):
+        text = "".join(text)
+    
+    # For a lightweight approach, we'll use extractive summarization
+    # by identifying key sections and sentences
     
-    # Sort sentences by score and select top ones
-    top_sentences = sorted(scored_sentences, key=lambda x: x[1], reverse=True)[:5]
+    # Split text into sentences
+    sentences = SENTENCE_SPLIT_PATTERN.split(text)
+    scores = score_sentences(sentences, weights)
     
-    # Sort selected sentences back in original order
-    summary_sentences = sorted(
-        [(sentences.index(sentence), sentence) for sentence, score in top_sentences]
-    )
+    # Select the top sentences by index, so duplicate sentences keep their
+    # own positions; ties go to the earlier sentence
+    top_indices = heapq.nlargest(max_sentences, range(len(sentences)), key=scores.__getitem__)
     
-    # Combine sentences into a summary
-    summary = " ".join(sentence for _, sentence in summary_sentences)
+    # Combine sentences into a summary, in original order
+    summary = " ".join(sentences[i] for i in sorted(top_indices))
     
     # Add fallback if summary is too short
     if len(summary.split()) < 20:
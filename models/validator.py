@@ -1,17 +1,24 @@
 """
 Validation module - validates extracted term sheet data
 """
-import re
-import difflib
-from datetime import datetime
+from models.comparator import compare_to_reference
+from models.rules import compile_rules, gather_columns, rule_fields
 
-def validate_term_sheet(extracted_data, reference_template=None):
+# The default rules, compiled once at import time
+DEFAULT_CHECKS = compile_rules()
+
+def validate_term_sheet(extracted_data, reference_template=None, rules=None, text=None):
     """
     Validates the extracted term sheet data against rules and reference template
     
     Args:
         extracted_data (dict): Extracted data from the term sheet
-        reference_template (str, optional): Reference template text
+        reference_template (str or dict, optional): Reference template text,
+            or a profile from models.comparator.parse_reference()
+        rules (list, optional): Rule specs (see models.rules) to use instead
+            of the defaults
+        text (str, optional): Document text, needed to compare sections
+            with the reference template
         
     Returns:
         dict: Validation results
@@ -24,86 +31,30 @@ def validate_term_sheet(extracted_data, reference_template=None):
         'reference_comparison': None  # Comparison with reference template
     }
     
-    # Validate required fields
-    required_fields = [
-        ('parties.issuer', 'Issuer/Company name'),
-        ('parties.investor', 'Investor name'),
-        ('financial_terms.amount', 'Investment amount')
-    ]
-    
-    for field_path, field_name in required_fields:
-        # Navigate the nested dictionary
-        parts = field_path.split('.')
-        value = extracted_data
-        for part in parts:
-            value = value.get(part, None) if isinstance(value, dict) else None
-            if value is None:
-                break
-        
-        if value is None or value == '':
-            validation_results['missing_fields'].append(field_name)
-            validation_results['errors'].append(f"Missing required field: {field_name}")
-            validation_results['status'] = 'FAIL'
-    
-    # Validate dates if present
-    for date_key, date_value in extracted_data.get('dates', {}).items():
-        if date_value:
-            try:
-                # Try to parse various date formats
-                formats = ['%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y', '%m-%d-%Y', 
-                           '%d %b %Y', '%d %B %Y', '%b %d, %Y', '%B %d, %Y']
-                parsed = False
-                for fmt in formats:
-                    try:
-                        datetime.strptime(date_value, fmt)
-                        parsed = True
-                        break
-                    except ValueError:
-                        continue
-                
-                if not parsed:
-                    validation_results['warnings'].append(f"Date format for {date_key} may be invalid: {date_value}")
-            except Exception:
-                validation_results['warnings'].append(f"Could not validate date format for {date_key}: {date_value}")
-    
-    # Validate financial terms
-    amount = extracted_data.get('financial_terms', {}).get('amount')
-    if amount:
-        # Remove currency symbol, commas, and convert million/billion abbreviations
-        cleaned_amount = re.sub(r'[$€£¥,]', '', amount)
-        cleaned_amount = cleaned_amount.lower()
-        
-        if 'million' in cleaned_amount or 'm' in cleaned_amount:
-            cleaned_amount = cleaned_amount.replace('million', '').replace('m', '').strip()
-            try:
-                numeric_amount = float(cleaned_amount) * 1000000
-            except ValueError:
-                validation_results['warnings'].append(f"Could not parse amount value: {amount}")
-        elif 'billion' in cleaned_amount or 'b' in cleaned_amount:
-            cleaned_amount = cleaned_amount.replace('billion', '').replace('b', '').strip()
-            try:
-                numeric_amount = float(cleaned_amount) * 1000000000
-            except ValueError:
-                validation_results['warnings'].append(f"Could not parse amount value: {amount}")
-        else:
-            try:
-                numeric_amount = float(cleaned_amount)
-            except ValueError:
-                validation_results['warnings'].append(f"Could not parse amount value: {amount}")
+    # Required fields, date formats, amounts and cross-field checks
+    for rule in compile_rules(rules) if rules is not None else DEFAULT_CHECKS:
+        for severity, message, missing in rule.check(extracted_data):
+            validation_results['errors' if severity == 'error' else 'warnings'].append(message)
+            if missing:
+                validation_results['missing_fields'].append(missing)
     
     # Compare with reference template if provided
     if reference_template:
-        similarity = difflib.SequenceMatcher(None, 
-                                           str(extracted_data).lower(), 
-                                           reference_template.lower()).ratio()
+        comparison = compare_to_reference(extracted_data, reference_template, text=text)
+        similarity = comparison['similarity']
         
         validation_results['reference_comparison'] = {
             'similarity_score': round(similarity * 100, 2),
-            'compliance': 'High' if similarity > 0.8 else 'Medium' if similarity > 0.5 else 'Low'
+            'compliance': 'High' if similarity > 0.8 else 'Medium' if similarity > 0.5 else 'Low',
+            'field_diffs': comparison['field_diffs'],
+            'section_scores': comparison['section_scores'],
+            'truncated': comparison['truncated']
         }
         
         if similarity < 0.5:
             validation_results['warnings'].append("Low similarity to reference template")
+        if comparison['truncated']:
+            validation_results['warnings'].append("Reference comparison was truncated for a very large document")
     
     # Count errors and warnings
     validation_results['error_count'] = len(validation_results['errors'])
@@ -113,4 +64,59 @@ def validate_term_sheet(extracted_data, reference_template=None):
     if validation_results['errors']:
         validation_results['status'] = 'FAIL'
     
-    return validation_results
\ No newline at end of file
+    return validation_results
+
+def validate_batch(records, rules=None):
+    """
+    Validates many extracted records at once, column by column
+    
+    Each field the rules read is gathered into one NumPy array, and every
+    rule then runs once over the whole column (dates and amounts are
+    parsed once per distinct value). Messages are the same as
+    validate_term_sheet() gives for each record without a reference.
+    
+    Args:
+        records (list or dict): extract_data() results, or columns as a
+            dict of dotted field path (e.g. 'dates.closing_date') -> values
+        rules (list, optional): Rule specs (see models.rules) to use instead
+            of the defaults
+        
+    Returns:
+        dict: Columns with one entry per record - 'status' (array of
+            'PASS'/'FAIL'), 'error_count' and 'warning_count' (int arrays),
+            'errors', 'warnings' and 'missing_fields' (lists of lists)
+    """
+    import numpy as np
+    
+    checks = compile_rules(rules) if rules is not None else DEFAULT_CHECKS
+    if isinstance(records, dict):
+        # Already columnar: field path -> sequence of values
+        count = len(next(iter(records.values()))) if records else 0
+        columns = {}
+        for field in rule_fields(checks):
+            column = records.get(field)
+            columns[field] = np.empty(count, dtype=object)
+            columns[field][:] = None if column is None else list(column)
+    else:
+        count = len(records)
+        columns = gather_columns(records, rule_fields(checks), np)
+    
+    errors = [[] for _ in range(count)]
+    warnings = [[] for _ in range(count)]
+    missing_fields = [[] for _ in range(count)]
+    for rule in checks:
+        for index, severity, message, missing in rule.check_columns(columns, np):
+            (errors if severity == 'error' else warnings)[index].append(message)
+            if missing:
+                missing_fields[index].append(missing)
+    
+    error_count = np.fromiter((len(messages) for messages in errors), dtype=np.int64, count=count)
+    warning_count = np.fromiter((len(messages) for messages in warnings), dtype=np.int64, count=count)
+    return {
+        'status': np.where(error_count > 0, 'FAIL', 'PASS'),
+        'error_count': error_count,
+        'warning_count': warning_count,
+        'errors': errors,
+        'warnings': warnings,
+        'missing_fields': missing_fields,
+    }
\ No newline at end of file
@@ -8,6 +8,20 @@ document.addEventListener('DOMContentLoaded', function() {
     const errorMessage = document.getElementById('error-message');
     const termSheetDropzone = document.getElementById('term-sheet-dropzone');
     const referenceDropzone = document.getElementById('reference-dropzone');
+    const templateSelect = document.getElementById('template-id');
+
+    // Load the saved reference templates
+    fetch('/api/templates')
+        .then(response => response.ok ? response.json() : [])
+        .then(templates => {
+            templates.forEach(template => {
+                const option = document.createElement('option');
+                option.value = template.template_id;
+                option.textContent = template.name;
+                templateSelect.appendChild(option);
+            });
+        })
+        .catch(() => {});
 
     // File selection event for term sheet
     termSheetInput.addEventListener('change', function() {
@@ -131,33 +145,35 @@ document.addEventListener('DOMContentLoaded', function() {
         const formData = new FormData();
         formData.append('termsheet', termSheetInput.files[0]);
         
-        if (referenceInput.files && referenceInput.files.length > 0) {
+        if (templateSelect.value) {
+            formData.append('template_id', templateSelect.value);
+        } else if (referenceInput.files && referenceInput.files.length > 0) {
             formData.append('reference', referenceInput.files[0]);
         }
         
         // Add OCR option
-        const useOCR = document.getElementById('use-ocr').checked;
+        const useOCR = document.getElementById('use-ocr').value;
         formData.append('use_ocr', useOCR);
         
         // Show loading state
         setLoading(true);
         hideError();
         
-        // Send request
-        fetch('/upload', {
-            method: 'POST',
-            body: formData
-        })
-        .then(response => {
-            if (!response.ok) {
-                return response.json().then(data => {
-                    throw new Error(data.error || 'Error processing file');
-                });
-            }
-            return response.json();
-        })
+        // Large files without a reference upload go in resumable chunks
+        const file = termSheetInput.files[0];
+        const hasReference = !templateSelect.value && referenceInput.files && referenceInput.files.length > 0;
+        const request = (file.size > CHUNKED_UPLOAD_THRESHOLD && !hasReference)
+            ? chunkedUpload(file, {use_ocr: useOCR, template_id: templateSelect.value})
+            : fetch('/upload', {
+                method: 'POST',
+                body: formData
+            }).then(checkResponse);
+        
+        request
         .then(data => {
-            if (data.redirect) {
+            if (data.status_url) {
+                return pollJob(data.status_url);
+            } else if (data.redirect) {
                 window.location.href = data.redirect;
             } else {
                 setLoading(false);
@@ -170,6 +186,85 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
+    const CHUNKED_UPLOAD_THRESHOLD = 8 * 1024 * 1024;
+
+    function checkResponse(response) {
+        if (!response.ok) {
+            return response.json().then(data => {
+                throw new Error(data.error || 'Error processing file');
+            });
+        }
+        return response.json();
+    }
+
+    // Upload a file in chunks through /api/uploads; after a dropped
+    // request the server's offset tells us where to resume
+    function chunkedUpload(file, options) {
+        return fetch('/api/uploads', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify(Object.assign({filename: file.name, size: file.size}, options))
+        })
+        .then(checkResponse)
+        .then(session => sendChunk(file, session, session.offset, 0));
+    }
+
+    function sendChunk(file, session, offset, retries) {
+        const chunk = file.slice(offset, offset + session.chunk_size);
+        return fetch(session.upload_url, {
+            method: 'PUT',
+            headers: {'Content-Type': 'application/octet-stream', 'Upload-Offset': String(offset)},
+            body: chunk
+        })
+        .then(response => response.json().then(data => ({response, data})))
+        .then(({response, data}) => {
+            if (response.status === 409 && typeof data.offset === 'number') {
+                return sendChunk(file, session, data.offset, retries);
+            }
+            if (response.status === 429 && typeof data.offset === 'number' && retries < 10) {
+                // The server kept the upload; ask it again to queue the analysis
+                const wait = Number(response.headers.get('Retry-After') || 5) * 1000;
+                return new Promise(resolve => setTimeout(resolve, wait))
+                    .then(() => sendChunk(file, session, data.offset, retries + 1));
+            }
+            if (!response.ok) {
+                throw new Error(data.error || 'Error uploading file');
+            }
+            return data.status_url ? data : sendChunk(file, session, data.offset, 0);
+        }, error => {
+            if (retries >= 3) {
+                throw error;
+            }
+            // Ask the server how much arrived and carry on from there
+            return fetch(session.upload_url)
+                .then(checkResponse)
+                .then(status => sendChunk(file, session, status.offset, retries + 1));
+        });
+    }
+
+    // Poll the background job until the analysis finishes
+    function pollJob(statusUrl) {
+        return fetch(statusUrl)
+            .then(response => {
+                if (!response.ok) {
+                    return response.json().then(data => {
+                        throw new Error(data.error || 'Error checking processing status');
+                    });
+                }
+                return response.json();
+            })
+            .then(job => {
+                if (job.status === 'done') {
+                    window.location.href = job.redirect;
+                } else if (job.status === 'failed') {
+                    throw new Error(job.error || 'Error processing file');
+                } else {
+                    return new Promise(resolve => setTimeout(resolve, 1000))
+                        .then(() => pollJob(statusUrl));
+                }
+            });
+    }
+
     function setLoading(isLoading) {
         if (isLoading) {
             validateText.classList.add('d-none');
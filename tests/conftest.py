@@ -0,0 +1,36 @@
+"""
+Shared fixtures - the Flask app, with its storage in temporary directories
+"""
+import os
+import tempfile
+
+import pytest
+
+# Set before app.py is first imported, so tests don't write to instance/
+_storage = tempfile.mkdtemp(prefix='termsheet-tests-')
+os.environ.setdefault('ANALYSIS_CACHE', 'false')
+os.environ.setdefault('TEMPLATE_LIBRARY_PATH', os.path.join(_storage, 'templates'))
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    import app as app_module
+    from utils.jobs import JobQueue
+    from utils.result_store import create_result_store
+    from utils.uploads import ChunkedUploads
+
+    upload_folder = tmp_path / 'uploads'
+    upload_folder.mkdir()
+    monkeypatch.setitem(app_module.app.config, 'UPLOAD_FOLDER', str(upload_folder))
+    monkeypatch.setitem(app_module.app.config, 'BATCH_WORKERS', 1)
+    monkeypatch.setattr(app_module, 'chunked_uploads',
+                        ChunkedUploads(str(tmp_path / 'partial_uploads'), app_module.app.config['UPLOAD_LIMITS'],
+                                       app_module.app.config['UPLOAD_SESSION_TTL']))
+    monkeypatch.setattr(app_module, 'job_queue', JobQueue(1, 5))
+    monkeypatch.setattr(app_module, 'processed_results', create_result_store('memory'))
+    return app_module
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
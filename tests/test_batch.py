@@ -0,0 +1,56 @@
+"""
+Tests for /api/batch
+"""
+import io
+import json
+import os
+
+TERM_SHEET = """TERM SHEET
+Issuer: {issuer}
+Investor: Northwind Ventures
+Amount: $5,000,000
+"""
+
+
+def _records(response):
+    # Closing the response (as WSGI servers do) ends the batch
+    with response:
+        return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_files_with_the_same_name_are_all_processed(client, app_module):
+    files = [(io.BytesIO(TERM_SHEET.format(issuer=issuer).encode()), 'deal.txt')
+             for issuer in ('Acme Robotics', 'Globex Logistics')]
+
+    response = client.post('/api/batch', data={'files': files}, content_type='multipart/form-data')
+
+    assert response.status_code == 200
+    records = _records(response)
+    assert records[-1]['batch_summary']['ok'] == 2
+    documents = records[:-1]
+    assert [record['name'] for record in documents] == ['deal.txt', 'deal.txt']
+    issuers = sorted(record['extracted_data']['parties']['issuer'] for record in documents)
+    assert issuers == ['Acme Robotics', 'Globex Logistics']
+    # The batch directory is removed once the stream is done
+    assert os.listdir(app_module.app.config['UPLOAD_FOLDER']) == []
+
+
+def test_batches_beyond_the_concurrency_limit_are_rejected(client, app_module):
+    assert app_module.batch_slots.acquire(blocking=False)
+    try:
+        response = client.post('/api/batch', data={'files': [(io.BytesIO(b'TERM SHEET'), 'deal.txt')]},
+                               content_type='multipart/form-data')
+    finally:
+        app_module.batch_slots.release()
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After']
+
+
+def test_rejected_batches_release_their_slot(client, app_module):
+    for _ in range(3):
+        response = client.post('/api/batch', data={'files': [(io.BytesIO(b'notes'), 'notes.exe')]},
+                               content_type='multipart/form-data')
+        assert response.status_code == 400
+
+    assert os.listdir(app_module.app.config['UPLOAD_FOLDER']) == []
@@ -0,0 +1,58 @@
+"""
+Tests for windowed term sheet detection
+"""
+from models.detector import (TERM_SHEET_INDICATORS, WINDOW_OVERLAP, WINDOW_SIZE, HEADER_PATTERN,
+                             detect_term_sheet)
+
+FILLER = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. "
+
+
+def test_matches_every_indicator_like_a_substring_scan():
+    text = ' '.join(TERM_SHEET_INDICATORS).upper() + ' seriesshares'
+
+    result = detect_term_sheet(text, exhaustive=True)
+
+    assert result['matched_indicators'] == TERM_SHEET_INDICATORS
+    assert result['is_term_sheet']
+
+
+def test_finds_contained_and_overlapping_indicators():
+    result = detect_term_sheet("The pre-money valuation is fixed. Seriesshares.", exhaustive=True)
+
+    assert result['matched_indicators'] == ['valuation', 'pre-money valuation', 'shares', 'series']
+
+
+def test_indicators_split_across_windows():
+    text = FILLER * (WINDOW_SIZE // len(FILLER))
+    text = text[:WINDOW_SIZE - 5] + 'governing law, dividends and warranties'
+
+    result = detect_term_sheet(text)
+
+    assert result['is_term_sheet']
+    assert not result['has_header']
+    assert result['matched_indicators'] == ['warranties', 'governing law', 'dividends']
+
+
+def test_no_header_for_a_word_ending_in_term_at_a_window_boundary():
+    # "term" is the first character carried over to the next window
+    first = 'a' * (WINDOW_SIZE - WINDOW_OVERLAP - 1) + 'xterm sheet '
+    first += 'b' * (WINDOW_SIZE - len(first))
+    text = first + 'c' * 100
+    assert HEADER_PATTERN.search(text) is None
+
+    assert not detect_term_sheet(text)['has_header']
+
+
+def test_header_in_a_short_first_chunk():
+    result = detect_term_sheet(['term sheet', '\nMore text follows'])
+
+    assert result['has_header']
+    assert result['is_term_sheet']
+
+
+def test_limits_stop_the_scan():
+    text = FILLER * 100 + 'TERM SHEET'
+
+    assert detect_term_sheet(text)['has_header']
+    assert not detect_term_sheet(text, max_chars=len(FILLER) * 10)['is_term_sheet']
+    assert not detect_term_sheet([FILLER, FILLER, 'TERM SHEET'], max_chunks=2)['is_term_sheet']
@@ -0,0 +1,111 @@
+"""
+Tests for the background job queue
+"""
+import threading
+import time
+
+import pytest
+
+from utils.jobs import JobQueue, QueueFullError
+
+
+def _wait_for(queue, job_id, *statuses):
+    for _ in range(200):
+        job = queue.get(job_id)
+        if job and job['status'] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f'job {job_id} never reached {statuses}')
+
+
+def test_job_goes_from_queued_to_running_to_done():
+    queue = JobQueue(workers=1, max_queued=5)
+    started, release = threading.Event(), threading.Event()
+
+    def job(progress):
+        started.set()
+        progress('extracting', 50)
+        release.wait(5)
+
+    record = queue.submit('a', job)
+    assert record['status'] == 'queued'
+
+    assert started.wait(5)
+    for _ in range(200):
+        running = queue.get('a')
+        if running['stage'] == 'extracting':
+            break
+        time.sleep(0.01)
+    assert (running['status'], running['stage'], running['progress']) == ('running', 'extracting', 50)
+    assert running['started_at'] is not None
+
+    release.set()
+    done = _wait_for(queue, 'a', 'done')
+    assert (done['stage'], done['progress'], done['error']) == (None, 100, None)
+    assert done['finished_at'] >= done['started_at']
+
+
+def test_failing_job_records_the_error():
+    queue = JobQueue(workers=1, max_queued=5)
+
+    def job(progress):
+        raise ValueError('not a term sheet')
+
+    queue.submit('a', job)
+
+    failed = _wait_for(queue, 'a', 'failed', 'done')
+    assert failed['status'] == 'failed'
+    assert failed['error'] == 'not a term sheet'
+    # The worker survives the failure
+    queue.submit('b', lambda progress: None)
+    assert _wait_for(queue, 'b', 'done', 'failed')['status'] == 'done'
+
+
+def test_arguments_are_passed_through():
+    queue = JobQueue(workers=1, max_queued=5)
+    seen = []
+
+    queue.submit('a', lambda first, second=None, progress=None: seen.append((first, second)), 1, second=2)
+
+    _wait_for(queue, 'a', 'done')
+    assert seen == [(1, 2)]
+
+
+def test_full_queue_rejects_jobs():
+    queue = JobQueue(workers=1, max_queued=1)
+    started, release = threading.Event(), threading.Event()
+
+    def blocking(progress):
+        started.set()
+        release.wait(5)
+
+    queue.submit('running', blocking)
+    assert started.wait(5)
+    queue.submit('waiting', lambda progress: None)
+    assert queue.depth() == 1
+
+    with pytest.raises(QueueFullError):
+        queue.submit('rejected', lambda progress: None)
+    assert queue.get('rejected') is None
+
+    release.set()
+    _wait_for(queue, 'waiting', 'done')
+    assert queue.depth() == 0
+
+
+def test_oldest_finished_jobs_are_forgotten():
+    queue = JobQueue(workers=1, max_queued=10, max_finished=2)
+
+    for job_id in ('a', 'b', 'c'):
+        queue.submit(job_id, lambda progress: None)
+        _wait_for(queue, job_id, 'done')
+    # Pruning runs after each job, once it is recorded as done
+    for _ in range(200):
+        if queue.get('a') is None:
+            break
+        time.sleep(0.01)
+
+    assert queue.get('a') is None
+    assert queue.get('b')['status'] == 'done'
+    assert queue.get('c')['status'] == 'done'
+    assert queue.get('unknown') is None
@@ -0,0 +1,114 @@
+"""
+Tests for hybrid PDF reading - OCR only for the pages without a text layer
+"""
+import threading
+import time
+
+import pytest
+
+from utils import file_handler, ocr
+from utils.ocr import iter_hybrid_pdf_pages
+from utils.pipeline import analyze_term_sheet, reading_mode
+
+TEXT_PAGE = "Issuer: Acme Robotics, Investor: Northwind Ventures, Amount: $5,000,000\n"
+
+
+@pytest.fixture
+def pdf(tmp_path, monkeypatch):
+    """
+    A fake PDF: set `pages` to the text layer of each page, and `delays`
+    to how long each page's (fake) OCR takes
+    """
+    class FakePdf:
+        path = str(tmp_path / 'scan.pdf')
+        pages = []
+        delays = {}
+        failing = set()
+        ocr_calls = []
+
+    fake = FakePdf()
+    open(fake.path, 'wb').close()
+    lock = threading.Lock()
+
+    def iter_pdf_pages(file_path, workers=None):
+        for text in fake.pages:
+            yield text + "\n"
+
+    def ocr_page(file_path, page_number, profile=None):
+        with lock:
+            fake.ocr_calls.append(page_number)
+        time.sleep(fake.delays.get(page_number, 0))
+        if page_number in fake.failing:
+            raise RuntimeError('unreadable scan')
+        return {'text': f"OCR text of page {page_number}"}
+
+    monkeypatch.setattr(file_handler, 'iter_pdf_pages', iter_pdf_pages)
+    monkeypatch.setattr(ocr, '_ocr_page', ocr_page)
+    return fake
+
+
+def test_pages_stay_in_order_when_ocr_finishes_out_of_order(pdf):
+    pdf.pages = [TEXT_PAGE, '', '', TEXT_PAGE, '']
+    # Earlier scanned pages take longer than later ones
+    pdf.delays = {2: 0.2, 3: 0.1, 5: 0.0}
+    stats = {}
+
+    pages = list(iter_hybrid_pdf_pages(pdf.path, workers=3, stats=stats))
+
+    assert pages == [TEXT_PAGE + "\n", "OCR text of page 2\n", "OCR text of page 3\n",
+                     TEXT_PAGE + "\n", "OCR text of page 5\n"]
+    assert sorted(pdf.ocr_calls) == [2, 3, 5]
+    assert stats == {'text_pages': 2, 'ocr_pages': 3, 'skipped_pages': 0, 'errors': []}
+
+
+def test_failed_ocr_keeps_the_text_layer(pdf):
+    pdf.pages = [TEXT_PAGE, 'p. 2']
+    pdf.failing = {2}
+    stats = {}
+
+    pages = list(iter_hybrid_pdf_pages(pdf.path, workers=2, stats=stats))
+
+    assert pages == [TEXT_PAGE + "\n", "p. 2\n"]
+    assert stats['errors'] == ['page 2: unreadable scan']
+
+
+def test_pages_past_the_ocr_cap_keep_their_text_layer(pdf):
+    pdf.pages = ['', '', 'p. 3']
+    stats = {}
+
+    pages = list(iter_hybrid_pdf_pages(pdf.path, max_pages=2, workers=2, stats=stats))
+
+    assert pages == ["OCR text of page 1\n", "OCR text of page 2\n", "p. 3\n"]
+    assert stats['skipped_pages'] == 1
+    assert sorted(pdf.ocr_calls) == [1, 2]
+
+
+def test_stopping_early_stops_ocring_ahead(pdf):
+    pdf.pages = [TEXT_PAGE] + [''] * 20
+    pdf.delays = {page: 0.05 for page in range(2, 22)}
+
+    pages = iter_hybrid_pdf_pages(pdf.path, workers=1)
+    assert next(pages) == TEXT_PAGE + "\n"
+    pages.close()
+    time.sleep(0.2)
+
+    assert len(pdf.ocr_calls) < 5
+
+
+def test_auto_mode_reads_pdfs_hybrid():
+    assert reading_mode('deal.pdf', 'auto') == 'hybrid'
+    assert reading_mode('scan.png', 'auto') == 'ocr'
+    assert reading_mode('deal.docx', 'auto') == 'text'
+    assert reading_mode('deal.pdf', True) == 'ocr'
+    assert reading_mode('deal.pdf', False) == 'text'
+
+
+def test_pipeline_analyzes_hybrid_text(pdf):
+    pdf.pages = ["TERM SHEET\n" + TEXT_PAGE, '']
+    stats = {}
+
+    analysis = analyze_term_sheet(pdf.path, use_ocr='auto', stats=stats, keep_text=True)
+
+    assert analysis['text'] == "TERM SHEET\n" + TEXT_PAGE + "\nOCR text of page 2\n"
+    assert analysis['extracted_data']['parties']['issuer']
+    assert (stats['pages'], stats['ocr_pages']) == (2, 1)
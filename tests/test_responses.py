@@ -0,0 +1,134 @@
+"""
+Tests for result responses - ETags, compression and field projection
+"""
+import gzip
+import json
+
+import pytest
+
+from models.extractor import extract_data
+from utils import responses
+from utils.responses import project
+
+TEXT = """TERM SHEET
+Issuer: Acme Robotics
+Investor: Northwind Ventures
+Amount: $5,000,000
+
+LIQUIDATION PREFERENCE
+""" + "The holders of the Series A Preferred receive their original purchase price first. " * 20
+
+
+@pytest.fixture
+def result(app_module):
+    result = {
+        'file_id': 'result-1',
+        'filename': 'deal.txt',
+        'extracted_data': extract_data(TEXT),
+        'validation_results': {'status': 'valid', 'errors': [], 'warnings': []},
+        'summary': 'Series A financing of Acme Robotics.',
+        'degraded': [],
+        'text': TEXT,
+        'timings': {'total': 0.01, 'cached': False, 'pages': 1, 'stages': {'reading': 0.001}},
+    }
+    app_module.processed_results.put('result-1', result)
+    return result
+
+
+def test_unchanged_result_gets_a_304(client, result):
+    first = client.get('/api/results/result-1')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+
+    again = client.get('/api/results/result-1', headers={'If-None-Match': etag})
+
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == etag
+
+
+def test_changed_result_gets_a_new_body(client, app_module, result):
+    etag = client.get('/api/results/result-1').headers['ETag']
+    app_module.processed_results.put('result-1', dict(result, summary='Changed.'))
+
+    response = client.get('/api/results/result-1', headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.get_json()['summary'] == 'Changed.'
+    assert response.headers['ETag'] != etag
+
+
+def test_gzip_when_accepted(client, result, monkeypatch):
+    # Without brotli installed, br falls back to gzip
+    monkeypatch.setattr(responses, '_brotli', lambda: None)
+    plain = client.get('/api/results/result-1')
+    compressed = client.get('/api/results/result-1', headers={'Accept-Encoding': 'br, gzip'})
+
+    assert 'Content-Encoding' not in plain.headers
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.headers['Vary'] == 'Accept-Encoding'
+    assert json.loads(gzip.decompress(compressed.data)) == plain.get_json()
+    # Same JSON, so the same ETag whatever the encoding
+    assert compressed.headers['ETag'] == plain.headers['ETag']
+
+
+def test_brotli_when_available(client, result):
+    brotli = pytest.importorskip('brotli')
+
+    response = client.get('/api/results/result-1', headers={'Accept-Encoding': 'gzip, br'})
+
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(brotli.decompress(response.data))['file_id'] == 'result-1'
+
+
+def test_small_bodies_are_not_compressed(client, result, monkeypatch):
+    monkeypatch.setattr(responses, 'MIN_COMPRESS_BYTES', 10 ** 9)
+
+    response = client.get('/api/results/result-1', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_fields_projection(client, result):
+    response = client.get('/api/results/result-1?fields=summary,validation_results.status,nope.missing')
+
+    assert response.get_json() == {
+        'file_id': 'result-1',
+        'summary': 'Series A financing of Acme Robotics.',
+        'validation_results': {'status': 'valid'},
+    }
+
+
+def test_sections_are_materialized_unless_spans_are_asked_for(client, result):
+    full = client.get('/api/results/result-1?fields=extracted_data').get_json()['extracted_data']
+    spans = client.get('/api/results/result-1?fields=extracted_data&sections=spans').get_json()['extracted_data']
+
+    assert full['raw_sections']['LIQUIDATION PREFERENCE'].startswith('LIQUIDATION PREFERENCE\nThe holders')
+    assert full['sections'] == result['extracted_data']['sections']
+    assert 'raw_sections' not in spans
+    assert spans['sections'] == result['extracted_data']['sections']
+
+
+def test_timings_only_on_request(client, result):
+    assert 'timings' not in client.get('/api/results/result-1').get_json()
+    assert 'text' not in client.get('/api/results/result-1').get_json()
+
+    timings = client.get('/api/results/result-1?timings=true').get_json()['timings']
+    assert timings['stages'] == {'reading': 0.001}
+
+
+def test_bulk_results(client, result):
+    response = client.post('/api/results', json={'ids': ['result-1', 'unknown'], 'fields': 'summary'})
+
+    assert response.get_json() == {
+        'results': {'result-1': {'file_id': 'result-1', 'summary': 'Series A financing of Acme Robotics.'}},
+        'missing': ['unknown'],
+    }
+    assert client.get('/api/results').status_code == 400
+
+
+def test_project_nested_paths():
+    data = {'a': {'b': 1, 'c': 2}, 'd': 3}
+
+    assert project(data, ['a.b', 'd', 'a.x', 'e']) == {'a': {'b': 1}, 'd': 3}
@@ -0,0 +1,49 @@
+"""
+Tests for the SQLite result store
+"""
+import sqlite3
+
+from utils import result_store
+from utils.result_store import SQLiteResultStore
+
+
+def test_every_operation_closes_its_connection(tmp_path, monkeypatch):
+    store = SQLiteResultStore(str(tmp_path / 'results.db'), max_entries=10, ttl=0)
+    opened = []
+    original_connect = sqlite3.connect
+
+    class TrackedConnection(sqlite3.Connection):
+        closed = False
+
+        def close(self):
+            self.closed = True
+            super().close()
+
+    def connect(path, timeout):
+        opened.append(original_connect(path, timeout=timeout, factory=TrackedConnection))
+        return opened[-1]
+
+    monkeypatch.setattr(result_store.sqlite3, 'connect', connect)
+
+    store.put('a', {'value': 1})
+    assert store.get('a') == {'value': 1}
+    assert store.get('missing') is None
+    assert 'a' in store
+    assert len(store) == 1
+    store.stats()
+    store.delete('a')
+
+    assert len(opened) == 7
+    assert all(conn.closed for conn in opened)
+
+
+def test_evicts_least_recently_used(tmp_path):
+    store = SQLiteResultStore(str(tmp_path / 'results.db'), max_entries=2, ttl=0)
+    store.put('a', 1)
+    store.put('b', 2)
+    store.get('a')
+    store.put('c', 3)
+
+    assert 'a' in store
+    assert 'b' not in store
+    assert store.stats()['evictions'] == 1
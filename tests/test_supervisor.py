@@ -0,0 +1,124 @@
+"""
+Tests for stage budgets and the helper processes that enforce them
+"""
+import os
+import time
+
+import pytest
+
+from utils import supervisor
+from utils.pipeline import analyze_term_sheet
+from utils.supervisor import StageBudgetExceeded, configure_stage_budgets, iter_stage, run_stage
+
+TERM_SHEET = """TERM SHEET
+Issuer: Acme Robotics, Inc.
+Investor: Northwind Ventures
+Amount: $5,000,000
+Closing Date: 03/15/2024
+
+The Series A Preferred Stock carries a liquidation preference and dividends.
+"""
+
+
+# Stage functions run in the helper process, so they must be importable
+def process_id():
+    return os.getpid()
+
+
+def pages_then_sleep(count, seconds):
+    for page in range(count):
+        yield f"page {page}"
+    time.sleep(seconds)
+    yield 'too late'
+
+
+@pytest.fixture
+def budgets(monkeypatch):
+    budgets = {stage: dict(budget) for stage, budget in supervisor.STAGE_BUDGETS.items()}
+    monkeypatch.setattr(supervisor, 'STAGE_BUDGETS', budgets)
+    yield budgets
+    worker = getattr(supervisor._local, 'worker', None)
+    if worker is not None:
+        worker.stop()
+
+
+def test_stages_have_no_budgets_by_default():
+    assert not any(supervisor.has_budget(stage) for stage in supervisor.STAGE_BUDGETS)
+
+
+def test_configure_stage_budgets(budgets):
+    configure_stage_budgets("extracting=30s:512mb, summarizing=10,ocr=off,reading=256mb,bogus")
+
+    assert budgets['extracting'] == {'seconds': 30.0, 'memory_mb': 512}
+    assert budgets['summarizing'] == {'seconds': 10.0, 'memory_mb': None}
+    assert budgets['reading'] == {'seconds': None, 'memory_mb': 256}
+
+    configure_stage_budgets("extracting=off")
+
+    assert budgets['extracting'] == {'seconds': None, 'memory_mb': None}
+    assert not supervisor.has_budget('extracting')
+
+
+def test_unbudgeted_stage_runs_in_process(budgets):
+    assert run_stage('summarizing', process_id) == os.getpid()
+
+
+def test_budgeted_stage_runs_in_a_reused_helper(budgets):
+    configure_stage_budgets("summarizing=30s")
+
+    helper = run_stage('summarizing', process_id)
+
+    assert helper != os.getpid()
+    assert run_stage('summarizing', process_id) == helper
+
+
+def test_time_budget_kills_and_replaces_the_helper(budgets):
+    configure_stage_budgets("summarizing=30s")
+    helper = run_stage('summarizing', process_id)
+    budgets['summarizing']['seconds'] = 0.5
+
+    started = time.monotonic()
+    with pytest.raises(StageBudgetExceeded) as exceeded:
+        run_stage('summarizing', time.sleep, 10)
+
+    assert time.monotonic() - started < 5
+    assert (exceeded.value.stage, exceeded.value.kind, exceeded.value.limit) == ('summarizing', 'time', 0.5)
+    replacement = run_stage('summarizing', process_id)
+    assert replacement not in (helper, os.getpid())
+
+
+def test_stage_errors_are_raised_in_the_caller(budgets):
+    configure_stage_budgets("summarizing=30s")
+
+    with pytest.raises(ValueError):
+        run_stage('summarizing', int, 'not a number')
+    assert run_stage('summarizing', int, '7') == 7
+
+
+def test_iter_stage_keeps_items_produced_before_an_overrun(budgets):
+    # Started once first, so the budget below only covers the iteration
+    configure_stage_budgets("reading=30s")
+    run_stage('reading', process_id)
+    budgets['reading']['seconds'] = 1
+
+    pages = []
+    with pytest.raises(StageBudgetExceeded):
+        for page in iter_stage('reading', pages_then_sleep, 2, 10):
+            pages.append(page)
+
+    assert pages == ['page 0', 'page 1']
+
+
+def test_pipeline_degrades_when_a_stage_overruns(tmp_path, budgets):
+    path = tmp_path / 'term_sheet.txt'
+    path.write_text(TERM_SHEET)
+    # Far too little time to even start the helper
+    configure_stage_budgets("summarizing=0.001")
+
+    analysis = analyze_term_sheet(str(path))
+
+    assert analysis['summary'] == ''
+    assert len(analysis['degraded']) == 1
+    assert analysis['degraded'][0].startswith('Summary skipped')
+    assert analysis['degraded'][0] in analysis['validation_results']['warnings']
+    assert analysis['extracted_data']['parties']['issuer']
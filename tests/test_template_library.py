@@ -0,0 +1,83 @@
+"""
+Tests for the template library's closest-template matching
+"""
+from models.comparator import compare_to_reference
+from models.extractor import extract_data
+from utils import template_library
+from utils.template_library import TemplateLibrary
+
+SERIES_A = """TERM SHEET
+Series A Preferred Stock Financing of Acme Robotics, Inc.
+
+Issuer: Acme Robotics, Inc.
+Investors: Northwind Ventures
+Amount of Financing: $5,000,000
+Price Per Share: $1.25
+Pre-Money Valuation: $20,000,000
+Closing Date: March 15, 2024
+
+LIQUIDATION PREFERENCE
+In the event of any liquidation or winding up of the Company, the holders of the
+Series A Preferred shall be entitled to receive in preference to the holders of
+the Common Stock an amount equal to the Original Purchase Price plus declared dividends.
+
+DIVIDENDS
+Dividends will be paid on the Series A Preferred on an as-converted basis when,
+as, and if paid on the Common Stock.
+
+CONVERSION
+The Series A Preferred may be converted at any time, at the option of the holder,
+into shares of Common Stock at an initial conversion rate of one to one.
+"""
+
+VENTURE_DEBT = """LOAN AGREEMENT SUMMARY
+Venture debt facility for Globex Logistics Ltd.
+
+Borrower: Globex Logistics Ltd.
+Lender: Harbor Credit Partners
+Facility Amount: $2,000,000
+Interest Rate: 11% per annum
+Maturity Date: June 30, 2027
+
+COVENANTS
+The Borrower shall maintain minimum liquidity of three months of cash burn and
+deliver monthly financial statements to the Lender within thirty days.
+
+WARRANTS
+The Lender will receive warrants to purchase shares equal to two percent of the
+facility amount, exercisable for ten years.
+"""
+
+
+def test_identical_template_ranks_first_with_section_scores(tmp_path, monkeypatch):
+    library = TemplateLibrary(str(tmp_path))
+    library.register('Venture debt', VENTURE_DEBT)
+    series_a = library.register('Series A', SERIES_A)
+    extracted_data = extract_data(SERIES_A)
+
+    # Record the comparisons closest() ranks the candidates by
+    comparisons = []
+
+    def recording_compare(data, profile, **kwargs):
+        comparisons.append(compare_to_reference(data, profile, **kwargs))
+        return comparisons[-1]
+
+    monkeypatch.setattr(template_library, 'compare_to_reference', recording_compare)
+
+    best = library.closest(SERIES_A, extracted_data)
+
+    assert best['template_id'] == series_a['template_id']
+    best_comparison = max(comparisons, key=lambda comparison: comparison['similarity'])
+    assert any(score > 0 for score in best_comparison['section_scores'].values())
+    assert best_comparison['similarity'] > 0.8
+
+
+def test_no_template_when_nothing_is_similar(tmp_path):
+    library = TemplateLibrary(str(tmp_path))
+    library.register('Venture debt', VENTURE_DEBT)
+    # Shares a few stock phrases with the template, so it is an index candidate
+    text = ("TERM SHEET\nSeries A financing. The Lender will receive warrants to purchase shares.\n"
+            "DIVIDENDS\nPaid when declared.\n")
+    assert library.candidates(text)
+
+    assert library.closest(text, extract_data(text)) is None
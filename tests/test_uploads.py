@@ -0,0 +1,173 @@
+"""
+Tests for resumable chunked uploads through /api/uploads
+"""
+import hashlib
+import json
+import os
+import time
+
+from utils.jobs import QueueFullError
+from utils.uploads import ChunkedUploads, _try_lock
+
+DOCUMENT = b"""TERM SHEET
+Issuer: Acme Robotics
+Investor: Northwind Ventures
+Amount: $5,000,000
+Closing Date: 03/15/2024
+"""
+
+
+def _start(client, data=DOCUMENT, **fields):
+    body = {'filename': 'deal.txt', 'size': len(data), 'sha256': hashlib.sha256(data).hexdigest()}
+    body.update(fields)
+    response = client.post('/api/uploads', json=body)
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()
+
+
+def _put(client, upload, offset, chunk):
+    return client.put(upload['upload_url'], data=chunk, headers={'Upload-Offset': str(offset)})
+
+
+def _wait_for_job(client, job_id):
+    for _ in range(200):
+        job = client.get(f'/api/jobs/{job_id}').get_json()
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+def _restart(app_module, monkeypatch):
+    # A fresh instance over the same directory, as after a restart or in
+    # another worker process - no hash state in memory
+    uploads = app_module.chunked_uploads
+    monkeypatch.setattr(app_module, 'chunked_uploads',
+                        ChunkedUploads(uploads.directory, uploads.limits, uploads.ttl))
+
+
+def test_chunks_are_assembled_and_analyzed(client):
+    upload = _start(client)
+
+    response = _put(client, upload, 0, DOCUMENT[:20])
+    assert response.status_code == 200
+    assert response.get_json()['offset'] == 20
+    assert client.get(upload['upload_url']).get_json()['offset'] == 20
+
+    response = _put(client, upload, 20, DOCUMENT[20:])
+    assert response.status_code == 202
+    job = _wait_for_job(client, response.get_json()['job_id'])
+    assert job['status'] == 'done'
+    results = client.get(f"/api/results/{response.get_json()['file_id']}").get_json()
+    assert results['extracted_data']['parties']['issuer'] == 'Acme Robotics'
+    # The finished upload's session is gone
+    assert client.get(upload['upload_url']).status_code == 404
+
+
+def test_offset_mismatch_is_a_409_with_the_resume_offset(client):
+    upload = _start(client)
+    _put(client, upload, 0, DOCUMENT[:10])
+
+    response = _put(client, upload, 5, DOCUMENT[5:15])
+
+    assert response.status_code == 409
+    assert response.get_json()['offset'] == 10
+    assert client.get(upload['upload_url']).get_json()['offset'] == 10
+
+
+def test_upload_resumes_after_a_restart(client, app_module, monkeypatch):
+    upload = _start(client)
+    _put(client, upload, 0, DOCUMENT[:10])
+    _restart(app_module, monkeypatch)
+    _put(client, upload, 10, DOCUMENT[10:30])
+    _restart(app_module, monkeypatch)
+
+    response = _put(client, upload, 30, DOCUMENT[30:])
+
+    # The hash was rebuilt from the partial file, so the checksum matches
+    assert response.status_code == 202
+
+
+def test_checksum_mismatch_is_a_422_and_drops_the_upload(client):
+    upload = _start(client, sha256=hashlib.sha256(b'something else').hexdigest())
+
+    response = _put(client, upload, 0, DOCUMENT)
+
+    assert response.status_code == 422
+    assert response.get_json()['actual'] == hashlib.sha256(DOCUMENT).hexdigest()
+    assert client.get(upload['upload_url']).status_code == 404
+
+
+def test_size_limits_per_file_type(client, app_module, monkeypatch):
+    uploads = app_module.chunked_uploads
+    monkeypatch.setattr(app_module, 'chunked_uploads',
+                        ChunkedUploads(uploads.directory, {'default': 1000, 'txt': 100}, uploads.ttl))
+
+    response = client.post('/api/uploads', json={'filename': 'deal.txt', 'size': 101})
+    assert response.status_code == 413
+    assert response.get_json()['limit'] == 100
+
+    assert client.post('/api/uploads', json={'filename': 'deal.docx', 'size': 101}).status_code == 201
+    assert client.post('/api/uploads', json={'filename': 'deal.docx', 'size': 1001}).status_code == 413
+
+
+def test_chunk_past_the_declared_size_is_a_413(client):
+    upload = _start(client)
+
+    response = _put(client, upload, 0, DOCUMENT + b'extra')
+
+    assert response.status_code == 413
+    assert response.get_json()['offset'] == 0
+    assert client.get(upload['upload_url']).get_json()['offset'] == 0
+
+
+def test_chunk_while_another_is_written_is_a_409(client, app_module):
+    upload = _start(client)
+    part_path = os.path.join(app_module.chunked_uploads.directory, f"{upload['upload_id']}.part")
+
+    with open(part_path, 'r+b') as f:
+        assert _try_lock(f)
+        response = _put(client, upload, 0, DOCUMENT)
+
+    assert response.status_code == 409
+    assert _put(client, upload, 0, DOCUMENT).status_code == 202
+
+
+def test_full_queue_keeps_the_upload_for_a_retry(client, app_module, monkeypatch):
+    upload = _start(client)
+
+    def queue_full(*args, **kwargs):
+        raise QueueFullError('Job queue is full')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(app_module.job_queue, 'submit', queue_full)
+        response = _put(client, upload, 0, DOCUMENT)
+
+    assert response.status_code == 429
+    assert response.get_json()['offset'] == len(DOCUMENT)
+    assert os.listdir(app_module.app.config['UPLOAD_FOLDER']) == []
+
+    # An empty chunk at the final offset queues it again
+    response = _put(client, upload, len(DOCUMENT), b'')
+    assert response.status_code == 202
+    assert _wait_for_job(client, response.get_json()['job_id'])['status'] == 'done'
+
+
+def test_expired_sessions_are_purged(tmp_path):
+    uploads = ChunkedUploads(str(tmp_path), ttl=60)
+    stale = uploads.create('stale.txt', 10)
+    fresh = uploads.create('fresh.txt', 10)
+    busy = uploads.create('busy.txt', 10)
+    for session in (stale, busy):
+        session['updated_at'] -= 120
+        with open(os.path.join(str(tmp_path), f"{session['upload_id']}.json"), 'w') as f:
+            json.dump(session, f)
+
+    with open(os.path.join(str(tmp_path), f"{busy['upload_id']}.part"), 'r+b') as f:
+        assert _try_lock(f)
+        assert uploads.purge_expired() == 1
+
+    assert uploads.get(stale['upload_id']) is None
+    assert not os.path.exists(os.path.join(str(tmp_path), f"{stale['upload_id']}.part"))
+    assert uploads.get(fresh['upload_id']) is not None
+    assert uploads.get(busy['upload_id']) is not None
@@ -0,0 +1,57 @@
+"""
+Tests for batch validation
+"""
+from models.extractor import extract_data
+from models.validator import validate_batch, validate_term_sheet
+
+
+def _empty_result_of(result):
+    assert len(result['status']) == 0
+    assert len(result['error_count']) == 0
+    assert len(result['warning_count']) == 0
+    assert result['errors'] == []
+    assert result['warnings'] == []
+    assert result['missing_fields'] == []
+
+
+def test_validate_batch_empty_columns():
+    _empty_result_of(validate_batch({}))
+
+
+def test_validate_batch_empty_records():
+    _empty_result_of(validate_batch([]))
+
+
+def test_validate_batch_columns_match_records():
+    records = [
+        extract_data("TERM SHEET\nIssuer: Acme Robotics, Inc.\nInvestor: Northwind Ventures\n"
+                     "Amount: $5,000,000\nClosing Date: 03/15/2024\n"),
+        extract_data("TERM SHEET\nIssuer: Globex Ltd.\n"),
+    ]
+    columns = {
+        'parties.issuer': [record['parties']['issuer'] for record in records],
+        'parties.investor': [record['parties']['investor'] for record in records],
+        'financial_terms.amount': [record['financial_terms']['amount'] for record in records],
+        'dates.closing_date': [record['dates']['closing_date'] for record in records],
+    }
+
+    by_columns = validate_batch(columns)
+    by_records = validate_batch(records)
+
+    assert by_columns['errors'] == by_records['errors']
+    assert by_columns['warnings'] == by_records['warnings']
+    for index, record in enumerate(records):
+        single = validate_term_sheet(record)
+        assert by_records['status'][index] == single['status']
+        assert by_records['errors'][index] == single['errors']
+
+
+def test_dates_accept_runs_of_whitespace_like_strptime():
+    record = extract_data("TERM SHEET\nIssuer: Acme Robotics, Inc.\nInvestor: Northwind Ventures\n"
+                          "Amount: $5,000,000\n")
+    record['dates'] = {'effective_date': '1  Feb 2024', 'closing_date': 'Mar 15,  2024'}
+
+    result = validate_term_sheet(record)
+
+    assert not any('format' in warning.lower() for warning in result['warnings'])
+    assert validate_batch([record])['warnings'] == [result['warnings']]
@@ -0,0 +1,211 @@
+"""
+Batch processing module - runs directories, zip archives or lists of term sheets
+through the pipeline on a process pool and streams the results as JSON Lines
+
+Usage:
+    python -m utils.batch <input>... [--output results.jsonl] [--workers N]
+                          [--reference template.docx] [--ocr [auto]] [--resume]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from models.extractor import with_section_texts
+from utils.pipeline import analyze_term_sheet, NotATermSheetError
+from utils.supervisor import PROCESS_CONTEXT, run_stages_inline
+
+SUPPORTED_EXTENSIONS = {'pdf', 'docx', 'xlsx', 'txt', 'jpg', 'jpeg', 'png'}
+
+
+def _supported(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in SUPPORTED_EXTENSIONS
+
+
+def collect_inputs(sources, extract_dir):
+    """
+    Expands directories and zip archives into the individual files to process
+
+    Args:
+        sources (list): Paths to files, directories or .zip archives
+        extract_dir (str): Directory zip archives are extracted into
+
+    Returns:
+        list: (name, path) pairs. `name` identifies the document in the output
+            (archive members are named "archive.zip:member").
+    """
+    items = []
+    for source in sources:
+        if os.path.isdir(source):
+            for root, _, filenames in os.walk(source):
+                for filename in sorted(filenames):
+                    if _supported(filename):
+                        path = os.path.join(root, filename)
+                        items.append((path, path))
+        elif zipfile.is_zipfile(source):
+            with zipfile.ZipFile(source) as archive:
+                target = tempfile.mkdtemp(dir=extract_dir)
+                for member in archive.infolist():
+                    if member.is_dir() or not _supported(member.filename):
+                        continue
+                    # extract() strips absolute paths and '..' components
+                    path = archive.extract(member, target)
+                    items.append((f"{source}:{member.filename}", path))
+        elif os.path.isfile(source) and _supported(source):
+            items.append((source, source))
+    return items
+
+
+def process_document(name, path, reference_path=None, use_ocr=False):
+    """
+    Runs one document through the pipeline - executed in a worker process
+
+    Returns:
+        dict: JSON-serializable record for the document
+    """
+    start = time.perf_counter()
+    record = {'name': name, 'bytes': os.path.getsize(path)}
+    try:
+        analysis = analyze_term_sheet(path, reference_path, use_ocr, keep_text=True)
+        text = analysis.pop('text')
+        analysis['extracted_data'] = with_section_texts(analysis['extracted_data'], text)
+        record.update(analysis)
+        record['status'] = 'ok'
+    except NotATermSheetError as e:
+        record['status'] = 'not_term_sheet'
+        record['error'] = str(e)
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = str(e)
+    record['seconds'] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def run_batch(items, workers=None, reference_path=None, use_ocr=False, skip=()):
+    """
+    Processes documents on a process pool, yielding records as they finish
+
+    At most two documents per worker are in flight at a time, so memory use
+    doesn't grow with the size of the batch.
+
+    Args:
+        items (list): (name, path) pairs from collect_inputs()
+        workers (int, optional): Worker processes (defaults to the CPU count)
+        reference_path (str, optional): Reference template for every document
+        use_ocr (bool or str): Whether to OCR images and scanned PDFs, or
+            'auto' to OCR only the PDF pages without a text layer
+        skip (set): Names already processed (for resuming)
+
+    Yields:
+        dict: One record per document, in completion order
+    """
+    workers = workers or os.cpu_count() or 1
+    pending = iter([(name, path) for name, path in items if name not in skip])
+    # The workers are isolated processes already, so stages run in them directly
+    with ProcessPoolExecutor(max_workers=workers, mp_context=PROCESS_CONTEXT,
+                             initializer=run_stages_inline) as executor:
+        in_flight = set()
+        while True:
+            while len(in_flight) < workers * 2:
+                item = next(pending, None)
+                if item is None:
+                    break
+                in_flight.add(executor.submit(process_document, item[0], item[1], reference_path, use_ocr))
+            if not in_flight:
+                return
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def summarize(records_seen, bytes_seen, counts, elapsed):
+    """
+    Builds the throughput summary printed at the end of a batch
+    """
+    return {
+        'documents': records_seen,
+        'ok': counts.get('ok', 0),
+        'not_term_sheet': counts.get('not_term_sheet', 0),
+        'errors': counts.get('error', 0),
+        'seconds': round(elapsed, 2),
+        'documents_per_second': round(records_seen / elapsed, 2) if elapsed else None,
+        'mb_per_second': round(bytes_seen / elapsed / (1024 * 1024), 3) if elapsed else None,
+    }
+
+
+def _load_done(output_path):
+    """
+    Reads the names already written to an output file
+
+    A torn last line (from an interrupted run) is cut off so new records
+    start on a line of their own.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    valid_end = 0
+    with open(output_path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            valid_end += len(line)
+            try:
+                done.add(json.loads(line)['name'])
+            except (ValueError, KeyError):
+                continue
+    if valid_end != os.path.getsize(output_path):
+        with open(output_path, 'r+b') as f:
+            f.truncate(valid_end)
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Validate a batch of term sheets')
+    parser.add_argument('inputs', nargs='+', help='Files, directories or .zip archives')
+    parser.add_argument('--output', '-o', help='JSON Lines output file (default: stdout)')
+    parser.add_argument('--workers', '-w', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--reference', help='Reference template used for every document')
+    parser.add_argument('--ocr', nargs='?', const='all', choices=['all', 'auto'],
+                        help="OCR images and scanned PDFs; 'auto' OCRs only PDF pages without a text layer")
+    parser.add_argument('--resume', action='store_true', help='Skip documents already in the output file')
+    args = parser.parse_args(argv)
+
+    if args.resume and not args.output:
+        parser.error('--resume needs --output')
+
+    skip = _load_done(args.output) if args.resume else set()
+    use_ocr = 'auto' if args.ocr == 'auto' else args.ocr is not None
+    out = open(args.output, 'a' if args.resume else 'w', encoding='utf-8') if args.output else sys.stdout
+
+    counts = {}
+    records_seen = 0
+    bytes_seen = 0
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as extract_dir:
+        items = collect_inputs(args.inputs, extract_dir)
+        if skip:
+            print(f"Resuming: {len(skip)} documents already processed", file=sys.stderr)
+        try:
+            for record in run_batch(items, args.workers, args.reference, use_ocr, skip):
+                out.write(json.dumps(record) + '\n')
+                out.flush()
+                records_seen += 1
+                bytes_seen += record['bytes']
+                counts[record['status']] = counts.get(record['status'], 0) + 1
+        except KeyboardInterrupt:
+            print("Interrupted - rerun with --resume to continue", file=sys.stderr)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+    summary = summarize(records_seen, bytes_seen, counts, time.perf_counter() - start)
+    print(json.dumps(summary), file=sys.stderr)
+    return 0 if not counts.get('error') else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,7 +3,31 @@ File handling module - processes different file types
 """
 import os
 import re
-import pandas as pd
+import hashlib
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.supervisor import PROCESS_CONTEXT
+
+# Format libraries (PyPDF2, python-docx, openpyxl, pandas) are imported on first use,
+# so reading plain text never pays for them - see preload_readers()
+READER_MODULES = {
+    'pdf': ['PyPDF2'],
+    'docx': ['docx'],
+    'xlsx': ['openpyxl'],
+    'xls': ['pandas'],
+}
+
+# Formats whose tables/rows are read as label/value pairs, see read_structured_content()
+STRUCTURED_EXTENSIONS = ['docx', 'xlsx']
+
+# Page-parallel PDF text extraction, see configure_pdf_extraction()
+PDF_EXTRACTION = {
+    'workers': 1,       # Processes used for large PDFs (1 disables the parallel mode)
+    'min_pages': 50,    # PDFs with fewer pages are always read serially
+    'batch_pages': 20,  # Minimum pages extracted per task
+}
 
 def get_file_extension(file_path):
     """
@@ -17,6 +41,263 @@ def get_file_extension(file_path):
     """
     return os.path.splitext(file_path)[1][1:].lower()
 
+def preload_readers(formats=None):
+    """
+    Imports the libraries used to read the given formats ahead of first use
+    
+    Args:
+        formats (list, optional): File extensions, e.g. ['pdf', 'docx'] (default: all)
+        
+    Returns:
+        list: Names of the modules that could be imported
+    """
+    loaded = []
+    for file_format in formats or READER_MODULES:
+        for module in READER_MODULES.get(file_format, []):
+            try:
+                __import__(module)
+                loaded.append(module)
+            except ImportError:
+                continue
+    return loaded
+
+def hash_file(file_path, chunk_size=1024 * 1024):
+    """
+    Computes the SHA-256 digest of a file without loading it into memory
+    
+    Args:
+        file_path (str): Path to the file
+        chunk_size (int): Bytes read at a time
+        
+    Returns:
+        str: Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def configure_pdf_extraction(workers=1, min_pages=50, batch_pages=20):
+    """
+    Sets up page-parallel text extraction for large PDFs
+    
+    Args:
+        workers (int): Number of processes (1 keeps extraction serial)
+        min_pages (int): Minimum page count before the parallel mode is used
+        batch_pages (int): Minimum pages extracted per task
+    """
+    PDF_EXTRACTION['workers'] = max(1, int(workers))
+    PDF_EXTRACTION['min_pages'] = min_pages
+    PDF_EXTRACTION['batch_pages'] = max(1, int(batch_pages))
+
+def _extract_pdf_page_range(file_path, start, end):
+    """
+    Extracts the text of pages [start, end) - runs in a worker process
+    """
+    import PyPDF2
+    with open(file_path, 'rb') as f:
+        pdf_reader = PyPDF2.PdfReader(f)
+        return [pdf_reader.pages[page_num].extract_text() for page_num in range(start, end)]
+
+def iter_pdf_pages(file_path, workers=None):
+    """
+    Yields the text of each PDF page, followed by a newline, as it is extracted
+    
+    Joining the pages gives the same text as read_file_content(). Large PDFs
+    are split into page batches extracted by a process pool when more than
+    one worker is configured; pages are still yielded in order.
+    
+    Args:
+        file_path (str): Path to the PDF file
+        workers (int, optional): Worker processes (defaults to the configured count)
+        
+    Yields:
+        str: Page text
+    """
+    import PyPDF2
+    workers = workers or PDF_EXTRACTION['workers']
+    with open(file_path, 'rb') as f:
+        pdf_reader = PyPDF2.PdfReader(f)
+        page_count = len(pdf_reader.pages)
+        # Daemon processes can't start a process pool - e.g. the stage helper
+        # that reads documents when the reading stage has a budget
+        if workers <= 1 or page_count < PDF_EXTRACTION['min_pages'] or multiprocessing.current_process().daemon:
+            for page_num in range(page_count):
+                yield pdf_reader.pages[page_num].extract_text() + "\n"
+            return
+    
+    # Every task re-opens the PDF, so use large batches - but enough of them
+    # that only part of the document is in flight at any time
+    batch = max(PDF_EXTRACTION['batch_pages'], -(-page_count // (workers * 8)))
+    starts = iter(range(0, page_count, batch))
+    pending = deque()
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=PROCESS_CONTEXT)
+
+    def submit():
+        start = next(starts, None)
+        if start is not None:
+            pending.append(executor.submit(_extract_pdf_page_range, file_path, start,
+                                           min(start + batch, page_count)))
+
+    try:
+        # Batches are submitted as earlier ones are consumed, so a caller
+        # that stops early (e.g. detection) doesn't extract the whole PDF
+        for _ in range(workers * 2):
+            submit()
+        while pending:
+            pages = pending.popleft().result()
+            submit()
+            for text in pages:
+                yield text + "\n"
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def iter_file_pages(file_path):
+    """
+    Yields the text content of a file in page-sized chunks
+    
+    PDFs are streamed page by page; other file types are returned as a
+    single chunk. Joining the chunks gives read_file_content(file_path).
+    
+    Args:
+        file_path (str): Path to the file
+        
+    Yields:
+        str: Text chunk
+    """
+    if get_file_extension(file_path) == 'pdf' and os.path.exists(file_path):
+        try:
+            yield from iter_pdf_pages(file_path)
+            return
+        except ImportError:
+            pass
+        except Exception as e:
+            yield f"Error reading file: {str(e)}"
+            return
+    yield read_file_content(file_path)
+
+def _format_cell(value):
+    """
+    Renders a spreadsheet cell compactly (whole floats without '.0', dates as '01 Feb 2024')
+    """
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if hasattr(value, 'day') and hasattr(value, 'strftime'):
+        return value.strftime('%d %b %Y')
+    return str(value).strip()
+
+def iter_workbook_rows(file_path):
+    """
+    Streams the non-empty cells of every row of every sheet of an .xlsx workbook
+    
+    The workbook is opened read-only, so only one row is held in memory at a time.
+    
+    Args:
+        file_path (str): Path to the workbook
+        
+    Yields:
+        list: Rendered cell values of one row (empty rows are skipped)
+    """
+    from openpyxl import load_workbook
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            for row in sheet.iter_rows(values_only=True):
+                cells = [_format_cell(value) for value in row if value is not None]
+                cells = [cell for cell in cells if cell]
+                if cells:
+                    yield cells
+    finally:
+        workbook.close()
+
+def iter_excel_lines(file_path):
+    """
+    Turns workbook rows into compact text lines and label/value pairs
+    
+    A row whose first cell is a label followed by values becomes
+    "label: value" plus a (label, value) pair; single-cell rows (titles,
+    headings) are emitted as they are.
+    
+    Args:
+        file_path (str): Path to the workbook
+        
+    Yields:
+        tuple: (text line, (label, value) pair or None)
+    """
+    for cells in iter_workbook_rows(file_path):
+        yield _row_line(cells)
+
+def _row_line(cells):
+    """
+    Renders one table row as "label: value" text and a (label, value) pair
+    """
+    if len(cells) == 1:
+        return cells[0], None
+    label = cells[0].rstrip(':').strip()
+    value = " ".join(cells[1:])
+    return f"{label}: {value}", (label, value)
+
+def iter_docx_lines(file_path):
+    """
+    Walks a Word document's paragraphs and tables in document order
+    
+    Paragraphs are yielded as they are; every table row is rendered like a
+    workbook row, so two-column "label | value" tables give label/value pairs.
+    
+    Args:
+        file_path (str): Path to the .docx file
+        
+    Yields:
+        tuple: (text line, (label, value) pair or None)
+    """
+    import docx
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
+    
+    document = docx.Document(file_path)
+    for child in document.element.body.iterchildren():
+        tag = child.tag.rsplit('}', 1)[-1]
+        if tag == 'p':
+            yield Paragraph(child, document).text, None
+        elif tag == 'tbl':
+            for row in Table(child, document).rows:
+                cells = []
+                seen = set()
+                for cell in row.cells:
+                    # Merged cells are repeated once per grid column
+                    if id(cell._tc) in seen:
+                        continue
+                    seen.add(id(cell._tc))
+                    text = " ".join(cell.text.split())
+                    if text:
+                        cells.append(text)
+                if cells:
+                    yield _row_line(cells)
+
+def read_structured_content(file_path):
+    """
+    Reads a .docx or .xlsx file as text plus the label/value pairs of its tables
+    
+    Other file types (or files the structured readers can't open) fall
+    back to read_file_content() with no pairs.
+    
+    Args:
+        file_path (str): Path to the file
+        
+    Returns:
+        tuple: (text content, list of (label, value) pairs)
+    """
+    readers = {'docx': iter_docx_lines, 'xlsx': iter_excel_lines}
+    reader = readers.get(get_file_extension(file_path))
+    if reader is None or not os.path.exists(file_path):
+        return read_file_content(file_path), []
+    try:
+        lines = list(reader(file_path))
+    except Exception:
+        return read_file_content(file_path), []
+    return "\n".join(line for line, _ in lines), [pair for _, pair in lines if pair]
+
 def read_file_content(file_path):
     """
     Reads and extracts text content from various file types
@@ -41,28 +322,31 @@ def read_file_content(file_path):
         # PDF files - use PyPDF2 if available
         elif file_ext == 'pdf':
             try:
-                import PyPDF2
-                with open(file_path, 'rb') as f:
-                    pdf_reader = PyPDF2.PdfReader(f)
-                    text = ""
-                    for page_num in range(len(pdf_reader.pages)):
-                        text += pdf_reader.pages[page_num].extract_text() + "\n"
-                    return text
+                import PyPDF2  # noqa: F401
+                return "".join(iter_pdf_pages(file_path))
             except ImportError:
                 return "PDF processing requires PyPDF2. Install with: pip install PyPDF2"
         
-        # Word documents - use python-docx if available
+        # Word documents - paragraphs and tables, use python-docx if available
         elif file_ext in ['doc', 'docx']:
             try:
-                import docx
-                doc = docx.Document(file_path)
-                return "\n".join([para.text for para in doc.paragraphs])
+                return "\n".join(line for line, _ in iter_docx_lines(file_path))
             except ImportError:
                 return "Word document processing requires python-docx. Install with: pip install python-docx"
         
-        # Excel files - use pandas
-        elif file_ext in ['xls', 'xlsx']:
+        # Excel workbooks - streamed row by row with openpyxl
+        elif file_ext == 'xlsx':
+            try:
+                return "\n".join(line for line, _ in iter_excel_lines(file_path))
+            except ImportError:
+                return "Excel processing requires openpyxl. Install with: pip install openpyxl"
+            except Exception as e:
+                return f"Error processing Excel file: {str(e)}"
+        
+        # Legacy Excel files - openpyxl can't read them, use pandas
+        elif file_ext == 'xls':
             try:
+                import pandas as pd
                 df = pd.read_excel(file_path)
                 # Convert DataFrame to a string representation
                 return df.to_string()
@@ -0,0 +1,125 @@
+"""
+Job queue module - runs uploads through the pipeline on background workers
+"""
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+
+class JobQueue:
+    """
+    Bounded queue of jobs drained by a fixed pool of worker threads.
+
+    Each job is a callable that receives a `progress(stage, percent)`
+    keyword argument. Job records (status, stage, progress, error) can be
+    polled with get() while the job runs and for a while after it finishes.
+    """
+
+    def __init__(self, workers=2, max_queued=20, max_finished=1000):
+        self.workers = max(1, int(workers))
+        self.max_queued = max(1, int(max_queued))
+        self.max_finished = max_finished
+        self._queue = queue.Queue(maxsize=self.max_queued)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _start_workers(self):
+        # Workers are started on first use so importing the app stays cheap
+        if self._threads:
+            return
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'job-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, job_id, func, *args, **kwargs):
+        """
+        Enqueues a job
+
+        Args:
+            job_id (str): Identifier used to poll the job
+            func (callable): Work to run; called as func(*args, progress=..., **kwargs)
+
+        Returns:
+            dict: The new job record
+
+        Raises:
+            QueueFullError: If the queue is already holding `max_queued` jobs
+        """
+        record = {
+            'job_id': job_id,
+            'status': QUEUED,
+            'stage': None,
+            'progress': 0,
+            'error': None,
+            'submitted_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+        }
+        with self._lock:
+            self._start_workers()
+            try:
+                self._queue.put_nowait((job_id, func, args, kwargs))
+            except queue.Full:
+                raise QueueFullError(f'Job queue is full ({self.max_queued} jobs waiting)')
+            self._jobs[job_id] = record
+            return dict(record)
+
+    def get(self, job_id):
+        """
+        Returns a copy of a job record, or None if the job is unknown
+        """
+        with self._lock:
+            record = self._jobs.get(job_id)
+            return dict(record) if record else None
+
+    def depth(self):
+        """
+        Returns the number of jobs waiting to be picked up by a worker
+        """
+        return self._queue.qsize()
+
+    def _update(self, job_id, **changes):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(changes)
+
+    def _prune(self):
+        # Forget the oldest finished jobs once there are too many
+        with self._lock:
+            finished = [job_id for job_id, record in self._jobs.items()
+                        if record['status'] in (DONE, FAILED)]
+            for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            job_id, func, args, kwargs = self._queue.get()
+            self._update(job_id, status=RUNNING, started_at=time.time())
+
+            def progress(stage, percent, job_id=job_id):
+                self._update(job_id, stage=stage, progress=percent)
+
+            try:
+                func(*args, progress=progress, **kwargs)
+                self._update(job_id, status=DONE, stage=None, progress=100, finished_at=time.time())
+            except Exception as e:
+                logger.exception("Job %s failed", job_id)
+                self._update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+            finally:
+                self._queue.task_done()
+                self._prune()
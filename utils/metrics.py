@@ -0,0 +1,187 @@
+"""
+Metrics module - in-process counters, gauges and histograms exposed in the
+Prometheus text format
+"""
+import bisect
+import threading
+
+# Upper bounds (seconds) for stage and request latency histograms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+PAGE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [(self.name, key, None, value) for key, value in values]
+
+
+class Gauge:
+    """Value read from a callback each time the metrics are collected"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, callback):
+        self.name = name
+        self.documentation = documentation
+        self.labels = ()
+        self.callback = callback
+
+    def samples(self):
+        try:
+            value = self.callback()
+        except Exception:
+            return []
+        return [] if value is None else [(self.name, (), None, value)]
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally split by labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            series = sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self._series.items())
+        samples = []
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                samples.append((self.name + '_bucket', key, ('le', _format_value(float(bound))), cumulative))
+            samples.append((self.name + '_sum', key, None, total))
+            samples.append((self.name + '_count', key, None, count))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered together by render()
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self._add(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, callback):
+        return self._add(Gauge(name, documentation, callback))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, documentation, labels, buckets))
+
+    def render(self):
+        """
+        Renders every metric in the Prometheus text exposition format
+
+        Returns:
+            str: The exposition text
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, key, extra, value in metric.samples():
+                lines.append(f'{name}{_format_labels(metric.labels, key, extra)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# Metrics for the upload pipeline, shared by the whole process
+registry = MetricsRegistry()
+STAGE_SECONDS = registry.histogram(
+    'termsheet_stage_duration_seconds', 'Time spent in each pipeline stage',
+    labels=('stage', 'file_type', 'ocr'))
+ANALYSIS_SECONDS = registry.histogram(
+    'termsheet_analysis_duration_seconds', 'End-to-end time to analyze a document',
+    labels=('file_type', 'ocr'))
+DOCUMENTS = registry.counter(
+    'termsheet_documents_total', 'Documents analyzed, by outcome',
+    labels=('file_type', 'ocr', 'status'))
+BYTES_PROCESSED = registry.counter(
+    'termsheet_bytes_processed_total', 'Bytes of uploaded documents analyzed',
+    labels=('file_type',))
+DOCUMENT_PAGES = registry.histogram(
+    'termsheet_document_pages', 'Pages read per document',
+    labels=('file_type',), buckets=PAGE_BUCKETS)
+
+
+def record_analysis(file_type, use_ocr, status, elapsed, stats, size=None):
+    """
+    Records one pipeline run
+
+    Args:
+        file_type (str): Document extension
+        use_ocr (bool or str): Whether OCR was requested, or 'auto'
+        status (str): Outcome, e.g. 'done', 'degraded', 'rejected' or 'failed'
+        elapsed (float): End-to-end seconds
+        stats (dict): Filled in by analyze_term_sheet(stats=...)
+        size (int, optional): Document size in bytes
+    """
+    ocr = 'auto' if use_ocr == 'auto' else 'true' if use_ocr else 'false'
+    ANALYSIS_SECONDS.observe(elapsed, file_type=file_type, ocr=ocr)
+    DOCUMENTS.inc(file_type=file_type, ocr=ocr, status=status)
+    for stage, seconds in stats.get('stages', {}).items():
+        STAGE_SECONDS.observe(seconds, stage=stage, file_type=file_type, ocr=ocr)
+    if size is not None:
+        BYTES_PROCESSED.inc(size, file_type=file_type)
+    if stats.get('pages'):
+        DOCUMENT_PAGES.observe(stats['pages'], file_type=file_type)
@@ -2,18 +2,596 @@
 OCR module - extracts text from images and scanned documents using EasyOCR
 """
 import os
-import tempfile
 import re
-import cv2
-import numpy as np
-from PIL import Image
+import queue
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
-def perform_ocr(file_path):
+# OpenCV, NumPy and Pillow are imported inside the functions that use them,
+# so importing this module (and the app) doesn't pay for them until the
+# first OCR request - see preload_imaging()
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANGUAGES = ['en']
+DEFAULT_MAX_PAGES = 100
+DEFAULT_PAGE_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_MIN_TEXT_CHARS = 20
+
+# Multi-page PDF settings, see configure_page_pipeline(). In hybrid mode a
+# page counts as having a text layer once it has `min_text_chars` letters
+# or digits.
+PAGE_PIPELINE = {
+    'max_pages': DEFAULT_MAX_PAGES,
+    'workers': DEFAULT_PAGE_WORKERS,
+    'min_text_chars': DEFAULT_MIN_TEXT_CHARS,
+}
+
+# Image preprocessing profiles, cheapest first. `target_dpi` downscales
+# larger images before any other work; `denoise` is the noise filter applied
+# after Otsu thresholding; `deskew` rotates skewed scans upright.
+PREPROCESS_PROFILES = {
+    'fast': {'target_dpi': 200, 'denoise': None, 'deskew': False},
+    'balanced': {'target_dpi': 250, 'denoise': 'median', 'deskew': True},
+    'quality': {'target_dpi': None, 'denoise': 'nlmeans', 'deskew': True},
+}
+
+# Preprocessing settings, see configure_preprocessing()
+PREPROCESSING = {
+    'profile': 'auto',
+    'target_dpi': None,  # Overrides the profile's target DPI when set
+    'pdf_dpi': 200,      # Resolution PDF pages are rasterized at
+}
+
+# Thresholds used by select_preprocess_profile()
+NOISE_LOW = 4.0
+NOISE_HIGH = 10.0
+SKEW_TOLERANCE = 1.0  # degrees
+ASSUMED_PAGE_INCHES = 11.0  # Used to estimate DPI when the image doesn't report it
+
+
+class ReaderPool:
+    """
+    Process-wide pool of warm EasyOCR readers.
+
+    Readers are expensive to build (model weights are loaded from disk), so
+    they are created once, kept resident and lent out to one caller at a
+    time. At most `pool_size` readers are ever built; extra callers wait
+    for a reader to be returned.
+    """
+
+    def __init__(self, languages=None, pool_size=1, gpu=False):
+        self.languages = list(languages or DEFAULT_LANGUAGES)
+        self.pool_size = max(1, int(pool_size))
+        self.gpu = gpu
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._stats = {
+            'readers_loaded': 0,
+            'load_seconds': [],
+            'borrows': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+            'wait_seconds': 0.0,
+        }
+
+    def _load_reader(self):
+        # Import easyocr here so the module can still be imported
+        # even if easyocr isn't installed yet
+        import easyocr
+
+        start = time.perf_counter()
+        # First time will download language models
+        reader = easyocr.Reader(self.languages, gpu=self.gpu)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self._stats['readers_loaded'] += 1
+            self._stats['load_seconds'].append(round(elapsed, 3))
+        return reader
+
+    def _reserve_slot(self):
+        """Claims the right to build a new reader, if the pool is not full yet"""
+        with self._lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                return True
+            return False
+
+    def _release_slot(self):
+        with self._lock:
+            self._created -= 1
+
+    def warm_up(self):
+        """
+        Loads every reader in the pool up front (e.g. at app startup)
+
+        Returns:
+            dict: Pool statistics after loading
+        """
+        while self._reserve_slot():
+            try:
+                self._idle.put(self._load_reader())
+            except Exception:
+                self._release_slot()
+                raise
+        return self.stats()
+
+    @contextmanager
+    def reader(self, timeout=None):
+        """
+        Lends a reader to the caller for the duration of the `with` block
+
+        Args:
+            timeout (float, optional): Seconds to wait for a free reader
+
+        Yields:
+            easyocr.Reader: A loaded reader, used exclusively by the caller
+        """
+        start = time.perf_counter()
+        try:
+            reader = self._idle.get_nowait()
+            hit = True
+        except queue.Empty:
+            if self._reserve_slot():
+                try:
+                    reader = self._load_reader()
+                except Exception:
+                    self._release_slot()
+                    raise
+                hit = False
+            else:
+                # Every reader is loaded and busy - wait for one to come back
+                reader = self._idle.get(timeout=timeout)
+                hit = True
+        waited = time.perf_counter() - start
+
+        with self._lock:
+            self._stats['borrows'] += 1
+            self._stats['cache_hits' if hit else 'cache_misses'] += 1
+            if hit:
+                self._stats['wait_seconds'] += waited
+
+        try:
+            yield reader
+        finally:
+            self._idle.put(reader)
+
+    def stats(self):
+        """
+        Reports load times and cache hits so residency can be confirmed
+
+        Returns:
+            dict: Pool configuration and counters
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['load_seconds'] = list(self._stats['load_seconds'])
+            stats['wait_seconds'] = round(self._stats['wait_seconds'], 3)
+            stats['readers_created'] = self._created
+        stats['readers_idle'] = self._idle.qsize()
+        stats['languages'] = self.languages
+        stats['pool_size'] = self.pool_size
+        return stats
+
+
+# Reader pool settings, see configure_reader_pool()
+READER_POOL = {
+    'languages': DEFAULT_LANGUAGES,
+    'pool_size': 1,
+    'gpu': False,
+}
+
+_reader_pool = None
+_reader_pool_lock = threading.Lock()
+
+
+def configure_reader_pool(languages=None, pool_size=1, gpu=False):
+    """
+    Replaces the process-wide reader pool with a newly configured one
+
+    Args:
+        languages (list, optional): EasyOCR language codes (default: English)
+        pool_size (int): Maximum number of readers kept resident
+        gpu (bool): Whether EasyOCR should use the GPU
+
+    Returns:
+        ReaderPool: The new pool
+    """
+    global _reader_pool
+    READER_POOL.update(languages=list(languages or DEFAULT_LANGUAGES), pool_size=pool_size, gpu=gpu)
+    with _reader_pool_lock:
+        _reader_pool = ReaderPool(languages, pool_size, gpu)
+        return _reader_pool
+
+
+def get_reader_pool():
+    """
+    Returns the process-wide reader pool, creating one from READER_POOL if needed
+    """
+    global _reader_pool
+    with _reader_pool_lock:
+        if _reader_pool is None:
+            _reader_pool = ReaderPool(READER_POOL['languages'], READER_POOL['pool_size'], READER_POOL['gpu'])
+        return _reader_pool
+
+
+def warm_up_ocr():
+    """
+    Loads the OCR models ahead of the first request
+
+    Returns:
+        dict: Pool statistics, or an 'error' entry if the models can't be loaded
+    """
+    try:
+        return get_reader_pool().warm_up()
+    except ImportError:
+        return {'error': 'EasyOCR is not installed. Please install it with: pip install easyocr'}
+
+
+def preload_imaging():
+    """
+    Imports OpenCV, NumPy and Pillow ahead of the first OCR request
+
+    Returns:
+        list: Names of the modules that could be imported
+    """
+    loaded = []
+    for module in ('numpy', 'cv2', 'PIL.Image'):
+        try:
+            __import__(module)
+            loaded.append(module)
+        except ImportError:
+            continue
+    return loaded
+
+
+def get_ocr_stats():
+    """
+    Returns load time and cache hit statistics for the OCR reader pool
+    """
+    return get_reader_pool().stats()
+
+def configure_page_pipeline(max_pages=DEFAULT_MAX_PAGES, workers=DEFAULT_PAGE_WORKERS,
+                            min_text_chars=DEFAULT_MIN_TEXT_CHARS):
+    """
+    Sets the page cap and worker count used when OCRing multi-page PDFs
+
+    Args:
+        max_pages (int, optional): Maximum number of pages to OCR (None for no cap)
+        workers (int): Number of pages processed concurrently
+        min_text_chars (int): Letters or digits a PDF page's text layer needs
+            before hybrid reading skips OCR for it
+    """
+    PAGE_PIPELINE['max_pages'] = max_pages
+    PAGE_PIPELINE['workers'] = max(1, int(workers))
+    PAGE_PIPELINE['min_text_chars'] = max(1, int(min_text_chars))
+
+
+def _count_pdf_pages(file_path):
+    from pdf2image import pdfinfo_from_path
+    return int(pdfinfo_from_path(file_path)['Pages'])
+
+
+def configure_preprocessing(profile='auto', target_dpi=None, pdf_dpi=200):
+    """
+    Sets the image preprocessing profile used before recognition
+
+    Args:
+        profile (str): 'fast', 'balanced', 'quality' or 'auto'
+        target_dpi (int, optional): Downscale images above this resolution
+            (overrides the profile's own target)
+        pdf_dpi (int): Resolution PDF pages are rasterized at
+    """
+    if profile != 'auto' and profile not in PREPROCESS_PROFILES:
+        raise ValueError(f"Unknown preprocessing profile: {profile}")
+    PREPROCESSING['profile'] = profile
+    PREPROCESSING['target_dpi'] = target_dpi
+    PREPROCESSING['pdf_dpi'] = pdf_dpi
+
+
+def _rasterize_pdf_page(file_path, page_number):
+    """
+    Renders a single PDF page straight to a grayscale NumPy array
+
+    Returns:
+        tuple: (grayscale image, DPI it was rendered at)
+    """
+    import numpy as np
+
+    from pdf2image import convert_from_path
+
+    dpi = PREPROCESSING['pdf_dpi']
+    pages = convert_from_path(file_path, dpi=dpi, first_page=page_number,
+                              last_page=page_number, grayscale=True)
+    if not pages:
+        raise ValueError(f"Failed to extract image from PDF page {page_number}")
+
+    return np.asarray(pages[0].convert('L')), dpi
+
+
+def _load_image(image_path):
+    """
+    Reads an image file into a grayscale NumPy array
+
+    Returns:
+        tuple: (grayscale image, DPI reported by the file or None)
+    """
+    import cv2
+    from PIL import Image
+
+    image = cv2.imread(image_path)
+    if image is None:
+        raise ValueError(f"Could not read image: {os.path.basename(image_path)}")
+
+    # Only the header is read here, not the pixel data
+    try:
+        with Image.open(image_path) as header:
+            dpi = header.info.get('dpi', (None,))[0]
+    except Exception:
+        dpi = None
+
+    # Convert to grayscale
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), (float(dpi) if dpi else None)
+
+
+def _estimate_dpi(gray, reported_dpi=None):
+    if reported_dpi and reported_dpi > 1:
+        return reported_dpi
+    # Assume a letter/A4 sized page when the file doesn't say
+    return max(gray.shape) / ASSUMED_PAGE_INCHES
+
+
+def _estimate_noise(gray):
+    """
+    Fast noise estimate (Immerkaer's method) on a central crop of the image
+
+    Returns:
+        float: Estimated noise standard deviation in grey levels
+    """
+    import cv2
+    import numpy as np
+
+    height, width = gray.shape
+    crop_h, crop_w = min(height, 512), min(width, 512)
+    top, left = (height - crop_h) // 2, (width - crop_w) // 2
+    crop = gray[top:top + crop_h, left:left + crop_w].astype(np.float32)
+    if crop_h < 3 or crop_w < 3:
+        return 0.0
+
+    kernel = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+    response = np.abs(cv2.filter2D(crop, -1, kernel)[1:-1, 1:-1])
+    return float(response.sum() * np.sqrt(0.5 * np.pi) / (6 * (crop_w - 2) * (crop_h - 2)))
+
+
+def _estimate_skew(gray):
+    """
+    Estimates the text skew angle from a downsampled copy of the image
+
+    Returns:
+        float: Rotation in degrees that brings the text upright
+    """
+    import cv2
+
+    scale = min(1.0, 800.0 / max(gray.shape))
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+    _, inverted = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    coords = cv2.findNonZero(inverted)
+    if coords is None or len(coords) < 50:
+        return 0.0
+
+    angle = cv2.minAreaRect(coords)[-1]
+    # Normalize the rectangle angle to the smallest rotation
+    if angle > 45:
+        angle -= 90
+    elif angle < -45:
+        angle += 90
+    return float(angle)
+
+
+def analyze_image(gray, reported_dpi=None):
+    """
+    Computes the cheap image statistics used to pick a preprocessing profile
+
+    Args:
+        gray (numpy.ndarray): Grayscale image
+        reported_dpi (float, optional): Resolution reported by the source
+
+    Returns:
+        dict: Estimated DPI, noise level and skew angle
+    """
+    return {
+        'dpi': round(_estimate_dpi(gray, reported_dpi), 1),
+        'noise': round(_estimate_noise(gray), 2),
+        'skew': round(_estimate_skew(gray), 2),
+    }
+
+
+def select_preprocess_profile(image_stats):
+    """
+    Picks the cheapest preprocessing profile that suits the image
+
+    Clean, upright images only need thresholding; noisy or skewed scans get
+    the more expensive filters.
+
+    Args:
+        image_stats (dict): Output of analyze_image()
+
+    Returns:
+        str: Profile name
+    """
+    if image_stats['noise'] >= NOISE_HIGH:
+        return 'quality'
+    if image_stats['noise'] >= NOISE_LOW or abs(image_stats['skew']) > SKEW_TOLERANCE:
+        return 'balanced'
+    return 'fast'
+
+
+def _deskew(gray, angle):
+    import cv2
+
+    height, width = gray.shape
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(gray, matrix, (width, height), flags=cv2.INTER_LINEAR,
+                          borderMode=cv2.BORDER_REPLICATE)
+
+
+def _preprocess_image(gray, reported_dpi=None, profile=None):
+    """
+    Enhances text readability of a grayscale image, entirely in memory
+
+    Args:
+        gray (numpy.ndarray): Grayscale image
+        reported_dpi (float, optional): Resolution reported by the source
+        profile (str, optional): Profile name or 'auto' (defaults to the configured profile)
+
+    Returns:
+        tuple: (processed image, dict with the profile used, image stats and stage timings)
+    """
+    import cv2
+
+    profile = profile or PREPROCESSING['profile']
+    timings = {}
+
+    stage_start = time.perf_counter()
+    image_stats = analyze_image(gray, reported_dpi)
+    if profile == 'auto':
+        profile = select_preprocess_profile(image_stats)
+    settings = PREPROCESS_PROFILES[profile]
+    timings['analyze'] = time.perf_counter() - stage_start
+
+    # Downscale to the target DPI - everything after this runs on fewer pixels
+    target_dpi = PREPROCESSING['target_dpi'] or settings['target_dpi']
+    if target_dpi and image_stats['dpi'] > target_dpi:
+        stage_start = time.perf_counter()
+        scale = target_dpi / image_stats['dpi']
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        timings['downscale'] = time.perf_counter() - stage_start
+
+    if settings['deskew'] and abs(image_stats['skew']) > SKEW_TOLERANCE:
+        stage_start = time.perf_counter()
+        gray = _deskew(gray, image_stats['skew'])
+        timings['deskew'] = time.perf_counter() - stage_start
+
+    # Apply thresholding to handle variations in brightness
+    stage_start = time.perf_counter()
+    _, processed = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    timings['threshold'] = time.perf_counter() - stage_start
+
+    # Noise removal
+    if settings['denoise']:
+        stage_start = time.perf_counter()
+        if settings['denoise'] == 'median':
+            processed = cv2.medianBlur(processed, 3)
+        else:
+            processed = cv2.fastNlMeansDenoising(processed, None, 10, 7, 21)
+        timings['denoise'] = time.perf_counter() - stage_start
+
+    return processed, {'profile': profile, 'image': image_stats, 'timings': timings}
+
+
+def _ocr_page(file_path, page_number, profile=None):
+    """
+    Runs rasterize -> preprocess -> recognize for one page
+
+    Images are passed between stages as NumPy arrays, so nothing is
+    written to disk.
+
+    Args:
+        file_path (str): Path to the image or PDF file
+        page_number (int): 1-based page number (ignored for images)
+        profile (str, optional): Preprocessing profile or 'auto'
+
+    Returns:
+        dict: Page number, recognized text, preprocessing profile and
+            per-stage timings in seconds
+    """
+    timings = {}
+    start = time.perf_counter()
+    if file_path.lower().endswith('.pdf'):
+        gray, dpi = _rasterize_pdf_page(file_path, page_number)
+    else:
+        gray, dpi = _load_image(file_path)
+    timings['rasterize'] = time.perf_counter() - start
+
+    processed, preprocessing = _preprocess_image(gray, dpi, profile)
+    timings.update(preprocessing['timings'])
+
+    # Perform OCR with a warm reader borrowed from the pool
+    stage_start = time.perf_counter()
+    with get_reader_pool().reader() as reader:
+        results = reader.readtext(processed, detail=0, paragraph=True)
+    timings['recognize'] = time.perf_counter() - stage_start
+
+    timings['total'] = time.perf_counter() - start
+    return {
+        'page': page_number,
+        'text': '\n'.join(results),
+        'profile': preprocessing['profile'],
+        'image': preprocessing['image'],
+        'timings': {stage: round(seconds, 3) for stage, seconds in timings.items()},
+    }
+
+
+def perform_ocr_pages(file_path, max_pages=None, workers=None, profile=None):
+    """
+    OCRs every page of an image or PDF across a bounded worker pool
+
+    Pages are processed concurrently (rasterization, OpenCV preprocessing and
+    recognition of different pages overlap) and returned in page order.
+
+    Args:
+        file_path (str): Path to the image or PDF file
+        max_pages (int, optional): Page cap (defaults to the configured cap)
+        workers (int, optional): Concurrent pages (defaults to the configured count)
+        profile (str, optional): Preprocessing profile (defaults to the configured profile)
+
+    Returns:
+        dict: Per-page results with timings, page counts and whether the cap was hit
+    """
+    if max_pages is None:
+        max_pages = PAGE_PIPELINE['max_pages']
+    workers = workers or PAGE_PIPELINE['workers']
+
+    start = time.perf_counter()
+    if file_path.lower().endswith('.pdf'):
+        page_count = _count_pdf_pages(file_path)
+    else:
+        page_count = 1
+
+    pages_to_process = page_count if max_pages is None else min(page_count, max_pages)
+    if pages_to_process < page_count:
+        logger.warning("OCR page cap reached: processing %d of %d pages of %s",
+                       pages_to_process, page_count, os.path.basename(file_path))
+
+    page_numbers = range(1, pages_to_process + 1)
+    with ThreadPoolExecutor(max_workers=min(workers, pages_to_process) or 1) as executor:
+        # map() keeps the results in page order
+        pages = list(executor.map(lambda page: _ocr_page(file_path, page, profile), page_numbers))
+
+    return {
+        'pages': pages,
+        'page_count': page_count,
+        'pages_processed': pages_to_process,
+        'truncated': pages_to_process < page_count,
+        'elapsed': round(time.perf_counter() - start, 3),
+    }
+
+
+def perform_ocr(file_path, max_pages=None, profile=None):
     """
     Extracts text from images and scanned documents using OCR
     
     Args:
         file_path (str): Path to the image or PDF file
+        max_pages (int, optional): Page cap for PDFs (defaults to the configured cap)
+        profile (str, optional): Preprocessing profile - 'fast', 'balanced',
+            'quality' or 'auto' (defaults to the configured profile)
         
     Returns:
         str: Extracted text
@@ -25,66 +603,17 @@ def perform_ocr(file_path):
     file_ext = os.path.splitext(file_path)[-1].lower()
     
     try:
-        # Import easyocr here so the module can still be imported
-        # even if easyocr isn't installed yet
-        import easyocr
-        
-        # Create a reader instance (first time will download language models)
-        reader = easyocr.Reader(['en'])
-        
-        # For PDFs, we would need to convert to images first
+        # For PDFs, we need to convert pages to images first
         if file_ext == '.pdf':
             try:
-                # Try to use pdf2image if available
-                from pdf2image import convert_from_path
-                
-                # Convert first page of PDF to image
-                pages = convert_from_path(file_path, first_page=1, last_page=1)
-                if not pages:
-                    return "Failed to extract image from PDF"
-                
-                # Save first page to temp file
-                temp_img_path = tempfile.NamedTemporaryFile(suffix='.png', delete=False).name
-                pages[0].save(temp_img_path, 'PNG')
-                
-                # Use the temp image for OCR
-                image_path = temp_img_path
+                import pdf2image  # noqa: F401
             except ImportError:
                 return "PDF processing requires pdf2image library. Please install it with: pip install pdf2image"
-        else:
-            # Use the original file path for image files
-            image_path = file_path
-        
-        # Preprocess the image to enhance text readability
-        image = cv2.imread(image_path)
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Apply thresholding to handle variations in brightness
-        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        
-        # Additional preprocessing for better results
-        # Noise removal
-        denoised = cv2.fastNlMeansDenoising(thresh, None, 10, 7, 21)
-        
-        # Save processed image to a temporary file
-        temp_path = tempfile.NamedTemporaryFile(suffix='.png', delete=False).name
-        cv2.imwrite(temp_path, denoised)
         
-        # Perform OCR
-        results = reader.readtext(temp_path, detail=0, paragraph=True)
+        ocr_result = perform_ocr_pages(file_path, max_pages=max_pages, profile=profile)
         
-        # Clean up temporary files
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
-        
-        if file_ext == '.pdf' and 'temp_img_path' in locals():
-            if os.path.exists(temp_img_path):
-                os.unlink(temp_img_path)
-        
-        # Combine results into a single string
-        text = '\n'.join(results)
+        # Combine page results into a single string
+        text = '\n\n'.join(page['text'] for page in ocr_result['pages'])
         
         # Post-process the text to fix common OCR issues
         text = post_process_text(text)
@@ -96,6 +625,97 @@ def perform_ocr(file_path):
     except Exception as e:
         return f"OCR processing error: {str(e)}"
 
+def has_text_layer(text, min_chars=None):
+    """
+    Returns whether text extracted from a PDF page is usable as is
+
+    Scanned pages come back empty or with a few stray characters, so a page
+    needs some minimum number of letters or digits.
+    """
+    min_chars = min_chars or PAGE_PIPELINE['min_text_chars']
+    count = 0
+    for char in text:
+        if char.isalnum():
+            count += 1
+            if count >= min_chars:
+                return True
+    return False
+
+
+def iter_hybrid_pdf_pages(file_path, max_pages=None, workers=None, profile=None, stats=None):
+    """
+    Yields the text of each PDF page in order, OCRing only the pages without a text layer
+
+    Pages with a usable text layer are taken as they are. Image-only pages
+    are rasterized and recognized concurrently (up to `workers` at a time)
+    while the text layer of the following pages is read; each page is
+    yielded as soon as it and every page before it are done. A page whose
+    OCR fails, or that is past the OCR page cap, keeps whatever text layer
+    it had.
+
+    Args:
+        file_path (str): Path to the PDF file
+        max_pages (int, optional): Most pages to OCR (defaults to the configured cap)
+        workers (int, optional): Concurrent OCR pages (defaults to the configured count)
+        profile (str, optional): Preprocessing profile (defaults to the configured profile)
+        stats (dict, optional): Filled in with 'text_pages', 'ocr_pages',
+            'skipped_pages' (over the cap) and 'errors' (OCR error messages)
+
+    Yields:
+        str: Page text, followed by a newline
+    """
+    from utils.file_handler import iter_pdf_pages
+
+    if max_pages is None:
+        max_pages = PAGE_PIPELINE['max_pages']
+    workers = workers or PAGE_PIPELINE['workers']
+    if stats is None:
+        stats = {}
+    stats.update(text_pages=0, ocr_pages=0, skipped_pages=0, errors=[])
+
+    def ocr_text(page_number, fallback):
+        try:
+            return post_process_text(_ocr_page(file_path, page_number, profile)['text']) + "\n"
+        except Exception as e:
+            logger.warning("OCR failed for page %d of %s: %s", page_number, os.path.basename(file_path), e)
+            stats['errors'].append(f"page {page_number}: {e}")
+            return fallback
+
+    # Pages in order: text, or a future for a page being OCR'd
+    pending = deque()
+    in_flight = 0
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        for page_number, text in enumerate(iter_pdf_pages(file_path), 1):
+            if has_text_layer(text):
+                stats['text_pages'] += 1
+                pending.append(text)
+            elif max_pages is not None and stats['ocr_pages'] >= max_pages:
+                stats['skipped_pages'] += 1
+                pending.append(text)
+            else:
+                stats['ocr_pages'] += 1
+                in_flight += 1
+                pending.append(executor.submit(ocr_text, page_number, text))
+            # Hand over finished pages; once every worker is busy, wait for
+            # the oldest OCR page before reading further
+            while pending and (isinstance(pending[0], str) or pending[0].done() or in_flight > workers):
+                page = pending.popleft()
+                if not isinstance(page, str):
+                    in_flight -= 1
+                    page = page.result()
+                yield page
+        while pending:
+            page = pending.popleft()
+            yield page if isinstance(page, str) else page.result()
+    finally:
+        # Stop OCRing ahead if the caller stopped reading (e.g. detection gave up)
+        executor.shutdown(wait=False, cancel_futures=True)
+        if stats['skipped_pages']:
+            logger.warning("OCR page cap reached: %d image-only pages of %s not OCR'd",
+                           stats['skipped_pages'], os.path.basename(file_path))
+
+
 def post_process_text(text):
     """
     Clean up the OCR output to make it more usable for term sheets
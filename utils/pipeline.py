@@ -0,0 +1,352 @@
+"""
+Analysis pipeline module - runs a term sheet through every processing stage
+"""
+import time
+from itertools import islice
+
+from models.detector import is_term_sheet
+from models.extractor import extract_data
+from models.validator import validate_term_sheet
+from models.summarizer import generate_summary
+from utils.ocr import perform_ocr, iter_hybrid_pdf_pages
+from utils.file_handler import (read_file_content, read_structured_content, iter_file_pages,
+                                get_file_extension, hash_file, STRUCTURED_EXTENSIONS)
+from utils.supervisor import run_stage, iter_stage, StageBudgetExceeded
+
+OCR_EXTENSIONS = ['jpg', 'jpeg', 'png', 'pdf']
+
+# Bump when a stage's output changes so stale cache entries are ignored
+CACHE_VERSION = 3
+
+# How much of a document term sheet detection looks at, see
+# configure_detection(); a document without a header or enough indicators
+# in its first pages is rejected without reading the rest
+DETECTION = {
+    'max_pages': 10,
+    'max_chars': 200000,
+}
+
+
+class NotATermSheetError(Exception):
+    """Raised when an uploaded document does not look like a term sheet"""
+
+
+def configure_detection(max_pages=10, max_chars=200000):
+    """
+    Sets how much of a document is read before deciding it isn't a term sheet
+
+    Args:
+        max_pages (int, optional): Pages (text chunks) looked at (None for all)
+        max_chars (int, optional): Characters looked at (None for all)
+    """
+    DETECTION['max_pages'] = max_pages
+    DETECTION['max_chars'] = max_chars
+
+
+def _report(progress, stage, percent):
+    if progress:
+        progress(stage, percent)
+
+
+def _lap(stats, stage, started):
+    """
+    Adds the time since `started` to the stage's total and returns the current time
+    """
+    now = time.perf_counter()
+    if stats is not None:
+        stages = stats.setdefault('stages', {})
+        stages[stage] = stages.get(stage, 0.0) + now - started
+    return now
+
+
+def _cached(cache, key, compute):
+    """
+    Returns the cached value for `key`, computing and storing it on a miss
+    """
+    if cache is None:
+        return compute()
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.put(key, value)
+    return value
+
+
+def reading_mode(file_path, use_ocr):
+    """
+    Returns how a document is read: 'ocr' (every page), 'hybrid' (OCR only
+    for PDF pages without a text layer) or 'text'
+
+    Args:
+        file_path (str): Path to the document
+        use_ocr (bool or str): True, False or 'auto' - images are always
+            OCR'd in auto mode, since they have no text layer
+    """
+    file_ext = get_file_extension(file_path)
+    if not use_ocr or file_ext not in OCR_EXTENSIONS:
+        return 'text'
+    if use_ocr == 'auto' and file_ext == 'pdf':
+        return 'hybrid'
+    return 'ocr'
+
+
+def _iter_document(file_path, mode):
+    """
+    Yields ('text', chunk), ('pairs', label/value pairs) and ('ocr_stats',
+    hybrid OCR stats) items for a document, text in page-sized chunks
+    """
+    if mode == 'ocr':
+        yield 'text', perform_ocr(file_path)
+    elif mode == 'hybrid':
+        ocr_stats = {}
+        for page in iter_hybrid_pdf_pages(file_path, stats=ocr_stats):
+            yield 'text', page
+        yield 'ocr_stats', ocr_stats
+    elif get_file_extension(file_path) in STRUCTURED_EXTENSIONS:
+        text, pairs = read_structured_content(file_path)
+        yield 'pairs', pairs
+        yield 'text', text
+    else:
+        for page in iter_file_pages(file_path):
+            yield 'text', page
+
+
+def _read_pages(file_path, mode, pairs, ocr_stats, degraded):
+    """
+    Yields the document's text; label/value pairs from Word and Excel
+    tables are appended to `pairs`, and hybrid reading fills in
+    `ocr_stats`, as side effects
+
+    Reading runs under its stage budget, still streaming page by page. If
+    the budget runs out, the pages read so far are kept and the reason is
+    noted in `degraded` (StageBudgetExceeded is only raised when nothing
+    was read); a PDF whose OCR runs out carries on with the text layer of
+    the remaining pages.
+    """
+    stage = 'reading' if mode == 'text' else 'ocr'
+    pages_read = 0
+    try:
+        for kind, value in iter_stage(stage, _iter_document, file_path, mode):
+            if kind == 'text':
+                pages_read += 1
+                yield value
+            elif kind == 'pairs':
+                pairs.extend(value)
+            else:
+                ocr_stats.update(value)
+    except StageBudgetExceeded as e:
+        if stage == 'ocr' and get_file_extension(file_path) == 'pdf':
+            degraded.append(f"OCR stopped ({e}); the remaining pages were read from the PDF's text layer only")
+            # OCR mode yields the whole text at the end, hybrid mode one chunk per page
+            yield from islice(iter_file_pages(file_path), pages_read if mode == 'hybrid' else 0, None)
+        elif pages_read:
+            degraded.append(f"Reading stopped ({e}); only the first {pages_read} pages were analyzed")
+        else:
+            # Nothing to carry on with
+            raise
+
+
+def _extract(file_path, text_content, pairs):
+    # Pairs are only collected while reading; re-read them if the text came from the cache
+    if pairs is None and get_file_extension(file_path) in STRUCTURED_EXTENSIONS:
+        pairs = read_structured_content(file_path)[1]
+    return extract_data(text_content, pairs=pairs)
+
+
+def _recording(pages, consumed):
+    for page in pages:
+        consumed.append(page)
+        yield page
+
+
+def _budgeted(cache, key, degraded, stage, fallback, note, func, *args):
+    """
+    Like _cached(), but runs the stage under its budget. When the budget
+    runs out, the reason is noted in `degraded` and fallback() is returned
+    (and not cached) instead.
+    """
+    def compute():
+        try:
+            return run_stage(stage, func, *args)
+        except StageBudgetExceeded as e:
+            degraded.append(f"{note} ({e})")
+            return fallback()
+    if cache is None:
+        return compute()
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        if not degraded:
+            cache.put(key, value)
+    return value
+
+
+def _validate(extracted_data, reference, template=None, text=None):
+    validation_results = validate_term_sheet(extracted_data, reference, text=text)
+    if template and validation_results['reference_comparison']:
+        validation_results['reference_comparison']['template'] = {
+            'template_id': template['template_id'],
+            'name': template['name']
+        }
+    return validation_results
+
+
+def analyze_term_sheet(file_path, reference_path=None, use_ocr=False, progress=None, cache=None,
+                       template=None, template_library=None, stats=None, file_hash=None,
+                       keep_text=False):
+    """
+    Reads a document and runs detection, extraction, validation and summarization
+
+    When a cache is given, results are keyed by the SHA-256 of the document
+    (plus the OCR flag) and of the reference template, so re-uploads are
+    answered without re-running any stage and a new reference only re-runs
+    validation.
+
+    Args:
+        file_path (str): Path to the term sheet file
+        reference_path (str, optional): Path to a reference template file
+        use_ocr (bool or str): Whether to OCR images and scanned PDFs, or
+            'auto' to OCR only the PDF pages without a text layer
+        progress (callable, optional): Called as progress(stage, percent)
+        cache (optional): Result store used as a content-hash cache
+        template (dict or str, optional): Template record from the template
+            library to validate against, or 'auto' for the closest one
+        template_library (TemplateLibrary, optional): Library searched when
+            template is 'auto'
+        stats (dict, optional): Filled in with 'stages' (seconds per stage),
+            'pages' (text chunks read), 'ocr_pages' (pages OCR'd in hybrid
+            mode), 'cached' (answered from the cache) and 'degraded'
+            (messages for stages that ran out of budget)
+        file_hash (str, optional): SHA-256 of the document if already known
+            (e.g. computed while it was uploaded), saves hashing it again
+        keep_text (bool): Also return the document 'text', which the section
+            spans in extracted_data point into
+
+    Stages that run out of their budget (see utils.supervisor) are skipped
+    or cut short rather than failing the analysis; the reason is added to
+    the validation warnings and to 'degraded', and nothing from a degraded
+    run is cached.
+
+    Returns:
+        dict: extracted_data, validation_results and summary, plus
+            'degraded' (list of messages) when a stage ran out of budget
+
+    Raises:
+        NotATermSheetError: If the document doesn't look like a term sheet
+    """
+    document_key = None
+    reference_key = None
+    mode = reading_mode(file_path, use_ocr)
+    if stats is not None:
+        stats.update(stages={}, pages=0, ocr_pages=0, cached=False)
+    started = time.perf_counter()
+    if cache is not None:
+        _report(progress, 'hashing', 2)
+        document_key = f"v{CACHE_VERSION}:{file_hash or hash_file(file_path)}:{mode}"
+        if isinstance(template, dict):
+            reference_key = f"template:{template['template_id']}:{template['checksum']}"
+        elif reference_path:
+            reference_key = f"v{CACHE_VERSION}:{hash_file(reference_path)}:text"
+        else:
+            reference_key = 'none'
+
+        # The closest template isn't known until the text has been read
+        if template != 'auto':
+            cached = cache.get(f"analysis:{document_key}:{reference_key}")
+            # The text is cached separately, so it isn't stored twice
+            cached_text = cache.get(f"text:{document_key}") if cached is not None and keep_text else None
+            if cached is not None and (cached_text is not None or not keep_text):
+                if stats is not None:
+                    stats['cached'] = True
+                _lap(stats, 'hashing', started)
+                return dict(cached, text=cached_text) if keep_text else cached
+        started = _lap(stats, 'hashing', started)
+
+    # Extract text content
+    _report(progress, 'reading', 5)
+    text_content = cache.get(f"text:{document_key}") if cache is not None else None
+    text_cached = text_content is not None
+    pairs = None
+    degraded = []
+
+    reference_template = None
+    if isinstance(template, dict):
+        reference_template = template['profile']
+    elif reference_path:
+        reference_template = _cached(cache, f"text:{reference_key}", lambda: read_file_content(reference_path))
+        started = _lap(stats, 'reference', started)
+
+    # Validate if it's a term sheet
+    _report(progress, 'detecting', 40)
+    if text_cached:
+        is_valid = is_term_sheet(text_content, max_chars=DETECTION['max_chars'])
+        started = _lap(stats, 'detecting', started)
+    else:
+        # Detection reads pages only until it is sure, then the rest of
+        # the document is read for extraction - reading and detection are
+        # interleaved, so they're timed together
+        pairs = []
+        ocr_stats = {}
+        pages = _read_pages(file_path, mode, pairs, ocr_stats, degraded)
+        consumed = []
+        is_valid = is_term_sheet(_recording(pages, consumed), DETECTION['max_chars'], DETECTION['max_pages'])
+        if is_valid:
+            consumed.extend(pages)
+            text_content = "".join(consumed)
+        if ocr_stats.get('errors'):
+            degraded.append(f"OCR failed for {len(ocr_stats['errors'])} of {ocr_stats['ocr_pages']} "
+                            f"image-only pages, their text may be missing ({ocr_stats['errors'][0]})")
+        if stats is not None:
+            stats['pages'] = len(consumed)
+            stats['ocr_pages'] = ocr_stats.get('ocr_pages', 0)
+        started = _lap(stats, 'reading' if mode == 'text' else 'ocr', started)
+    if not is_valid:
+        raise NotATermSheetError('The uploaded file does not appear to be a valid term sheet')
+    # Only cache text that passed detection - read errors (e.g. a missing
+    # OCR dependency) come back as text and must not stick
+    if cache is not None and not text_cached and not degraded:
+        cache.put(f"text:{document_key}", text_content)
+
+    # Process the term sheet
+    _report(progress, 'extracting', 50)
+    extracted_data = _budgeted(cache, f"extract:{document_key}", degraded, 'extracting',
+                               lambda: extract_data(''), 'Field extraction skipped',
+                               _extract, file_path, text_content, pairs)
+    started = _lap(stats, 'extracting', started)
+
+    if template == 'auto':
+        _report(progress, 'matching template', 60)
+        template = template_library.closest(text_content, extracted_data) if template_library else None
+        if template:
+            reference_template = template['profile']
+            reference_key = f"template:{template['template_id']}:{template['checksum']}"
+        started = _lap(stats, 'matching', started)
+
+    _report(progress, 'validating', 65)
+    # Without the reference comparison the rule checks are cheap, so they still run
+    validation_results = _budgeted(cache, f"validate:{document_key}:{reference_key}", degraded, 'validating',
+                                   lambda: _validate(extracted_data, None), 'Reference comparison skipped',
+                                   _validate, extracted_data, reference_template, template, text_content)
+    started = _lap(stats, 'validating', started)
+
+    _report(progress, 'summarizing', 80)
+    summary = _budgeted(cache, f"summary:{document_key}", degraded, 'summarizing',
+                        lambda: '', 'Summary skipped', generate_summary, text_content)
+    _lap(stats, 'summarizing', started)
+
+    analysis = {
+        'extracted_data': extracted_data,
+        'validation_results': validation_results,
+        'summary': summary
+    }
+    if degraded:
+        warnings = validation_results['warnings'] + degraded
+        analysis['validation_results'] = dict(validation_results, warnings=warnings, warning_count=len(warnings))
+        analysis['degraded'] = degraded
+        if stats is not None:
+            stats['degraded'] = list(degraded)
+    elif cache is not None:
+        cache.put(f"analysis:{document_key}:{reference_key}", analysis)
+    if keep_text:
+        analysis = dict(analysis, text=text_content)
+    return analysis
@@ -0,0 +1,96 @@
+"""
+HTTP response helpers - cacheable, compressed JSON responses
+"""
+import gzip
+import hashlib
+import json
+
+from flask import Response
+
+# Bodies smaller than this aren't worth compressing
+MIN_COMPRESS_BYTES = 1024
+
+
+def _brotli():
+    # Brotli is optional; without it responses fall back to gzip
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+
+def _encoding(request):
+    accepted = request.accept_encodings
+    if accepted['br'] and _brotli() is not None:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def project(data, fields):
+    """
+    Keeps only the requested keys of a result
+
+    Args:
+        data (dict): The full result
+        fields (list): Top-level keys or dotted paths, e.g. 'summary' or
+            'validation_results.status'; unknown paths are left out
+
+    Returns:
+        dict: The projected result
+    """
+    projected = {}
+    for path in fields:
+        parts = [part for part in path.strip().split('.') if part]
+        source, target = data, projected
+        for depth, part in enumerate(parts):
+            if not isinstance(source, dict) or part not in source:
+                break
+            if depth == len(parts) - 1:
+                target[part] = source[part]
+            else:
+                source = source[part]
+                target = target.setdefault(part, {})
+    return projected
+
+
+def json_response(payload, request, status=200):
+    """
+    Serializes a payload to JSON with an ETag, compressing it when the client accepts it
+
+    A request whose If-None-Match carries the same ETag gets an empty 304,
+    so clients polling an unchanged result don't download it again.
+
+    Args:
+        payload: JSON-serializable data
+        request: The current Flask request
+        status (int): Status code for the full response
+
+    Returns:
+        Response: The 200 (or `status`) or 304 response
+    """
+    body = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    # Weak, since the same JSON may be sent with different encodings
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    if status == 200 and request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
+
+    encoding = _encoding(request) if len(body) >= MIN_COMPRESS_BYTES else None
+    if encoding == 'br':
+        body = _brotli().compress(body)
+    elif encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=6)
+
+    response = Response(body, status=status, mimetype='application/json')
+    response.set_etag(etag, weak=True)
+    response.headers['Vary'] = 'Accept-Encoding'
+    # Clients may keep the body but must revalidate it with the ETag
+    response.headers['Cache-Control'] = 'no-cache'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
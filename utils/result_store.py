@@ -0,0 +1,258 @@
+"""
+Result store module - bounded storage for processed term sheet results
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+def _encode(value):
+    return json.dumps(value, separators=(',', ':'), default=str)
+
+
+class MemoryResultStore:
+    """
+    In-process result store with LRU, TTL and memory-budget eviction.
+
+    Entry sizes are measured as the length of their JSON encoding, which is
+    what the results cost to serve and a reasonable proxy for their RAM use.
+    """
+
+    def __init__(self, max_entries=1000, ttl=3600, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    def get(self, key, default=None):
+        """
+        Returns the stored value for `key`, or `default` if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] <= time.time():
+                self._remove(key)
+                self._counters['expirations'] += 1
+                entry = None
+            if entry is None:
+                self._counters['misses'] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return entry[2]
+
+    def put(self, key, value):
+        """
+        Stores `value` under `key`, evicting old entries to stay within budget
+        """
+        size = len(_encode(value))
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, size, value)
+            self._bytes += size
+            self._evict()
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (entry[0] is None or entry[0] > time.time())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _evict(self):
+        now = time.time()
+        for key in [key for key, entry in self._entries.items() if entry[0] is not None and entry[0] <= now]:
+            self._remove(key)
+            self._counters['expirations'] += 1
+
+        # Least recently used entries are at the front
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self._counters['evictions'] += 1
+
+    def stats(self):
+        """
+        Returns entry counts, size and hit/miss/eviction counters
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats.update({
+                'backend': 'memory',
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+            })
+            return stats
+
+
+class SQLiteResultStore:
+    """
+    Result store backed by a SQLite file, shared by every worker process.
+
+    Uses the same LRU, TTL and size-budget eviction as MemoryResultStore.
+    Hit/miss/eviction counters are kept per process.
+    """
+
+    def __init__(self, path, max_entries=1000, ttl=3600, max_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                ' key TEXT PRIMARY KEY,'
+                ' value TEXT NOT NULL,'
+                ' size INTEGER NOT NULL,'
+                ' expires_at REAL,'
+                ' accessed_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)')
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per operation keeps this safe across
+        # threads. It commits (or rolls back) and is closed when the block ends.
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def get(self, key, default=None):
+        """
+        Returns the stored value for `key`, or `default` if missing or expired
+        """
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute('SELECT value, expires_at FROM results WHERE key = ?', (key,)).fetchone()
+            if row is not None and row[1] is not None and row[1] <= now:
+                conn.execute('DELETE FROM results WHERE key = ?', (key,))
+                self._count('expirations')
+                row = None
+            if row is None:
+                self._count('misses')
+                return default
+            conn.execute('UPDATE results SET accessed_at = ? WHERE key = ?', (now, key))
+        self._count('hits')
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        """
+        Stores `value` under `key`, evicting old entries to stay within budget
+        """
+        encoded = _encode(value)
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO results (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)',
+                (key, encoded, len(encoded), expires_at, now)
+            )
+            self._evict(conn, now)
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM results WHERE key = ?', (key,))
+
+    def __contains__(self, key):
+        with self._connect() as conn:
+            row = conn.execute('SELECT expires_at FROM results WHERE key = ?', (key,)).fetchone()
+        return row is not None and (row[0] is None or row[0] > time.time())
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def _evict(self, conn, now):
+        expired = conn.execute('DELETE FROM results WHERE expires_at IS NOT NULL AND expires_at <= ?', (now,)).rowcount
+        if expired:
+            self._count('expirations', expired)
+
+        count, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        # Walk from least to most recently used until back within budget
+        victims = []
+        for key, size in conn.execute('SELECT key, size FROM results ORDER BY accessed_at'):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size
+        conn.executemany('DELETE FROM results WHERE key = ?', victims)
+        self._count('evictions', len(victims))
+
+    def stats(self):
+        """
+        Returns entry counts, size and hit/miss/eviction counters
+        """
+        with self._connect() as conn:
+            count, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+        with self._lock:
+            stats = dict(self._counters)
+        stats.update({
+            'backend': 'sqlite',
+            'path': self.path,
+            'entries': count,
+            'bytes': total,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'ttl': self.ttl,
+        })
+        return stats
+
+
+def create_result_store(backend='memory', path=None, **options):
+    """
+    Creates a result store
+
+    Args:
+        backend (str): 'memory' (per process) or 'sqlite' (shared between processes)
+        path (str, optional): Database file for the sqlite backend
+        **options: max_entries, ttl (seconds, 0 for no expiry) and max_bytes
+
+    Returns:
+        MemoryResultStore or SQLiteResultStore
+    """
+    if backend == 'memory':
+        return MemoryResultStore(**options)
+    if backend == 'sqlite':
+        if not path:
+            raise ValueError("The sqlite result store needs a database path")
+        return SQLiteResultStore(path, **options)
+    raise ValueError(f"Unknown result store backend: {backend}")
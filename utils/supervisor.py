@@ -0,0 +1,331 @@
+"""
+Stage supervisor module - runs pipeline stages under wall-clock and memory budgets
+
+A stage with a budget runs in a long-lived helper process owned by the
+calling thread. If the stage overruns its time budget the helper is killed
+(and replaced on the next call); if it needs more memory than its budget,
+the allocation fails inside the helper. Either way the caller gets a
+StageBudgetExceeded and can degrade instead of pinning the worker.
+"""
+import importlib
+import logging
+import multiprocessing
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Budgets per pipeline stage, see configure_stage_budgets(). None disables
+# that limit; a stage with no limits runs in-process, which is the default:
+# a budget costs a round-trip of the stage's input and output to the
+# helper. A budgeted OCR stage loads its own models in the helper instead of
+# using the reader pool of the calling process, and a budgeted reading
+# stage extracts PDF pages serially (helpers can't start page workers).
+STAGE_BUDGETS = {
+    'reading': {'seconds': None, 'memory_mb': None},
+    'ocr': {'seconds': None, 'memory_mb': None},
+    'extracting': {'seconds': None, 'memory_mb': None},
+    'validating': {'seconds': None, 'memory_mb': None},
+    'summarizing': {'seconds': None, 'memory_mb': None},
+}
+
+# Settings dicts filled in by the configure_* functions. Helpers start from
+# a fresh interpreter, so these are copied into each one when it starts.
+HELPER_SETTINGS = [
+    ('utils.file_handler', 'PDF_EXTRACTION'),
+    ('utils.ocr', 'PAGE_PIPELINE'),
+    ('utils.ocr', 'PREPROCESSING'),
+    ('utils.ocr', 'READER_POOL'),
+]
+
+# Helpers (and the batch and PDF page worker pools) are started by a fork
+# server, or spawned where there is none: forking the multi-threaded app
+# process directly could copy locks held by other threads into the child.
+# Either way the child imports the main script again as __mp_main__, so
+# app.py only starts its services when it isn't imported under that name.
+PROCESS_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+
+# Set in processes that must run every stage in-process, see run_stages_inline()
+_inline = False
+
+
+class StageBudgetExceeded(Exception):
+    """Raised when a stage runs out of time or memory"""
+
+    def __init__(self, stage, kind, limit):
+        unit = 's' if kind == 'time' else ' MB'
+        super().__init__(f"{stage} exceeded its {kind} budget ({limit}{unit})")
+        self.stage = stage
+        self.kind = kind
+        self.limit = limit
+
+
+def configure_stage_budgets(spec):
+    """
+    Sets stage budgets from a spec such as "extracting=30s:512mb,summarizing=10s,ocr=off"
+
+    Args:
+        spec (str): Comma-separated stage=limits entries; limits are
+            seconds ('30s' or '30'), megabytes ('512mb'), both joined by
+            ':', or 'off' to remove the stage's limits
+
+    Returns:
+        dict: The resulting STAGE_BUDGETS
+    """
+    for item in (spec or '').split(','):
+        if '=' not in item:
+            continue
+        stage, limits = (part.strip().lower() for part in item.split('=', 1))
+        budget = STAGE_BUDGETS.setdefault(stage, {'seconds': None, 'memory_mb': None})
+        if limits in ('off', 'none', '0'):
+            budget.update(seconds=None, memory_mb=None)
+            continue
+        for limit in limits.split(':'):
+            if limit.endswith('mb'):
+                budget['memory_mb'] = int(limit[:-2])
+            elif limit:
+                budget['seconds'] = float(limit.rstrip('s'))
+    return STAGE_BUDGETS
+
+
+def run_stages_inline():
+    """
+    Makes every stage of this process run in-process, without helpers
+
+    Used as the initializer of batch worker processes, which are already
+    isolated from the app and would otherwise start one helper each.
+    """
+    global _inline
+    _inline = True
+
+
+def _snapshot_settings():
+    snapshot = []
+    for module_name, attribute in HELPER_SETTINGS:
+        module = sys.modules.get(module_name)
+        if module is not None:
+            snapshot.append((module_name, attribute, dict(getattr(module, attribute))))
+    return snapshot
+
+
+def _virtual_memory_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            import resource
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except (OSError, ImportError, ValueError):
+        return 0
+
+
+def _limit_memory(memory_mb):
+    # Address-space limits are Unix only; elsewhere memory budgets are ignored
+    try:
+        import resource
+    except ImportError:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if memory_mb:
+        soft = _virtual_memory_bytes() + memory_mb * 1024 * 1024
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+    else:
+        soft = hard
+    resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def _serve(conn, settings):
+    """
+    Helper process loop: run each task sent over the pipe and send back the
+    outcome - for streaming tasks, each item as it is produced
+    """
+    for module_name, attribute, values in settings:
+        getattr(importlib.import_module(module_name), attribute).update(values)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        func, args, kwargs, memory_mb, streaming = task
+        try:
+            _limit_memory(memory_mb)
+            if streaming:
+                for item in func(*args, **kwargs):
+                    conn.send(('item', item))
+                outcome = ('done', None)
+            else:
+                outcome = ('ok', func(*args, **kwargs))
+        except MemoryError:
+            outcome = ('memory', None)
+        except Exception as e:
+            outcome = ('error', e)
+        finally:
+            _limit_memory(None)
+        try:
+            conn.send(outcome)
+        except Exception as e:
+            # e.g. an unpicklable result or exception
+            conn.send(('error', RuntimeError(str(e))))
+
+
+class SupervisedWorker:
+    """
+    A helper process that runs one task at a time and can be killed mid-task
+    """
+
+    def __init__(self):
+        self._process = None
+        self._conn = None
+
+    def _start(self):
+        parent, child = PROCESS_CONTEXT.Pipe()
+        self._process = PROCESS_CONTEXT.Process(target=_serve, args=(child, _snapshot_settings()),
+                                         name='stage-worker', daemon=True)
+        self._process.start()
+        child.close()
+        self._conn = parent
+
+    def stop(self):
+        """
+        Kills the helper process; the next run() starts a fresh one
+        """
+        if self._process is not None:
+            self._process.kill()
+            self._process.join(5)
+            self._conn.close()
+        self._process = None
+        self._conn = None
+
+    def _send(self, func, args, kwargs, memory_mb, streaming):
+        if self._process is None or not self._process.is_alive():
+            self._start()
+        self._conn.send((func, args, kwargs, memory_mb, streaming))
+
+    def _receive(self, stage, deadline, seconds, memory_mb):
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        if not self._conn.poll(timeout):
+            logger.warning("Stage %s exceeded %ss, restarting its worker", stage, seconds)
+            self.stop()
+            raise StageBudgetExceeded(stage, 'time', seconds)
+        try:
+            status, value = self._conn.recv()
+        except (EOFError, OSError):
+            # The helper died - when it has a memory budget, most likely
+            # killed for running out of memory
+            self.stop()
+            if memory_mb:
+                raise StageBudgetExceeded(stage, 'memory', memory_mb)
+            raise RuntimeError(f"The {stage} worker process exited unexpectedly")
+        if status == 'memory':
+            raise StageBudgetExceeded(stage, 'memory', memory_mb)
+        if status == 'error':
+            raise value
+        return status, value
+
+    def run(self, stage, func, args, kwargs, seconds=None, memory_mb=None):
+        """
+        Runs func(*args, **kwargs) in the helper process within the budget
+
+        Raises:
+            StageBudgetExceeded: If the time or memory budget ran out
+        """
+        self._send(func, args, kwargs, memory_mb, False)
+        deadline = None if seconds is None else time.monotonic() + seconds
+        return self._receive(stage, deadline, seconds, memory_mb)[1]
+
+    def iterate(self, stage, func, args, kwargs, seconds=None, memory_mb=None):
+        """
+        Iterates over func(*args, **kwargs) in the helper process, yielding
+        items as they arrive; the time budget covers the whole iteration
+
+        Raises:
+            StageBudgetExceeded: If the time or memory budget ran out, after
+                the items produced in time
+        """
+        self._send(func, args, kwargs, memory_mb, True)
+        deadline = None if seconds is None else time.monotonic() + seconds
+        finished = False
+        try:
+            while True:
+                try:
+                    status, value = self._receive(stage, deadline, seconds, memory_mb)
+                except Exception:
+                    # The helper was stopped, or reported the error and is idle again
+                    finished = True
+                    raise
+                if status == 'done':
+                    finished = True
+                    return
+                yield value
+        finally:
+            # The caller stopped early; the helper is still producing
+            if not finished:
+                self.stop()
+
+
+_local = threading.local()
+
+
+def has_budget(stage):
+    """
+    Returns whether a stage has a time or memory budget
+    """
+    budget = STAGE_BUDGETS.get(stage) or {}
+    return bool(budget.get('seconds') or budget.get('memory_mb'))
+
+
+def _supervised(stage):
+    # Daemon processes (such as the helpers themselves) can't start helpers
+    return has_budget(stage) and not _inline and not multiprocessing.current_process().daemon
+
+
+def _worker():
+    worker = getattr(_local, 'worker', None)
+    if worker is None:
+        worker = _local.worker = SupervisedWorker()
+    return worker
+
+
+def run_stage(stage, func, *args, **kwargs):
+    """
+    Runs a pipeline stage under its configured budget
+
+    Stages without a budget run directly in the calling thread, as does
+    everything in a process set up with run_stages_inline(). Otherwise
+    func and its arguments must be picklable (module-level functions).
+
+    Args:
+        stage (str): Key of STAGE_BUDGETS
+        func (callable): The stage
+
+    Returns:
+        The stage's result
+
+    Raises:
+        StageBudgetExceeded: If the stage ran out of time or memory
+    """
+    if not _supervised(stage):
+        return func(*args, **kwargs)
+    budget = STAGE_BUDGETS[stage]
+    return _worker().run(stage, func, args, kwargs, budget.get('seconds'), budget.get('memory_mb'))
+
+
+def iter_stage(stage, func, *args, **kwargs):
+    """
+    Runs a pipeline stage that produces items (e.g. pages) under its budget
+
+    Like run_stage(), but func returns an iterable whose items are yielded
+    as they are produced, so whatever came before an overrun is kept.
+
+    Yields:
+        The stage's items
+
+    Raises:
+        StageBudgetExceeded: If the stage ran out of time or memory
+    """
+    if not _supervised(stage):
+        yield from func(*args, **kwargs)
+        return
+    budget = STAGE_BUDGETS[stage]
+    yield from _worker().iterate(stage, func, args, kwargs, budget.get('seconds'), budget.get('memory_mb'))
@@ -0,0 +1,233 @@
+"""
+Template library module - named reference templates, pre-parsed and indexed
+
+Templates are parsed once when registered (fields, sections and shingle
+signatures, see models.comparator.parse_reference) and stored as JSON files.
+An inverted index over each template's MinHash sketch finds the closest
+templates to a document without comparing it against every template.
+
+Usage:
+    python -m utils.template_library add <path> [--name NAME]
+    python -m utils.template_library list
+    python -m utils.template_library remove <template_id>
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from models.comparator import parse_reference, signature, compare_to_reference, SKETCH_SIZE
+
+
+# Below this similarity the best candidate is not considered a match, so an
+# unrelated template (sharing only a few stock phrases) is never picked
+MIN_SIMILARITY = 0.1
+
+
+def _sketch(template_signature):
+    # The index always works on bottom-k hashes, even for exact signatures
+    return template_signature['hashes'][:SKETCH_SIZE]
+
+
+class TemplateLibrary:
+    """
+    Directory-backed store of pre-parsed reference templates.
+
+    Every worker process can open the same directory; the in-memory index is
+    reloaded when another process adds or removes a template.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._templates = {}
+        self._index = {}  # sketch hash -> set of template ids
+        self._loaded_mtime = None
+        self._refresh()
+
+    def _path(self, template_id):
+        return os.path.join(self.directory, f"{template_id}.json")
+
+    def _refresh(self):
+        """
+        Reloads the templates if the directory changed since the last load
+        """
+        mtime = os.stat(self.directory).st_mtime_ns
+        with self._lock:
+            if mtime == self._loaded_mtime:
+                return
+            templates = {}
+            for filename in os.listdir(self.directory):
+                if not filename.endswith('.json'):
+                    continue
+                try:
+                    with open(os.path.join(self.directory, filename), 'r', encoding='utf-8') as f:
+                        record = json.load(f)
+                    templates[record['template_id']] = record
+                except (OSError, ValueError, KeyError):
+                    continue
+
+            index = {}
+            for template_id, record in templates.items():
+                for value in _sketch(record['profile']['signature']):
+                    index.setdefault(value, set()).add(template_id)
+
+            self._templates = templates
+            self._index = index
+            self._loaded_mtime = mtime
+
+    def register(self, name, text, source_filename=None):
+        """
+        Parses a reference template and adds it to the library
+
+        Args:
+            name (str): Display name of the template
+            text (str): Template text
+            source_filename (str, optional): File the text was read from
+
+        Returns:
+            dict: Template summary (without the parsed profile)
+        """
+        record = {
+            'template_id': uuid.uuid4().hex[:12],
+            'name': name,
+            'source_filename': source_filename,
+            'created_at': time.time(),
+            'checksum': hashlib.sha256(text.encode('utf-8')).hexdigest(),
+            'profile': parse_reference(text),
+        }
+        # Write to a temp file first so other processes never read half a template
+        temp_path = self._path(record['template_id']) + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f)
+        os.replace(temp_path, self._path(record['template_id']))
+        self._refresh()
+        return self.summary(record)
+
+    def remove(self, template_id):
+        """
+        Deletes a template
+
+        Returns:
+            bool: True if the template existed
+        """
+        if not re.fullmatch(r'[0-9a-f]+', template_id or '') or not os.path.exists(self._path(template_id)):
+            return False
+        os.unlink(self._path(template_id))
+        self._refresh()
+        return True
+
+    def get(self, template_id):
+        """
+        Returns the full template record (including its profile), or None
+        """
+        self._refresh()
+        with self._lock:
+            return self._templates.get(template_id)
+
+    def list(self):
+        """
+        Returns summaries of every template, oldest first
+        """
+        self._refresh()
+        with self._lock:
+            records = sorted(self._templates.values(), key=lambda record: record['created_at'])
+        return [self.summary(record) for record in records]
+
+    @staticmethod
+    def summary(record):
+        return {key: value for key, value in record.items() if key != 'profile'}
+
+    def candidates(self, text, limit=5):
+        """
+        Looks up the templates sharing the most sketch hashes with a text
+
+        Only index buckets for the text's own sketch are visited, so the cost
+        does not grow with the number of templates stored.
+
+        Args:
+            text (str): Document text
+            limit (int): Maximum number of candidates
+
+        Returns:
+            list: (template_id, shared hash count) pairs, best first
+        """
+        self._refresh()
+        votes = Counter()
+        with self._lock:
+            for value in _sketch(signature(text)):
+                for template_id in self._index.get(value, ()):
+                    votes[template_id] += 1
+        return votes.most_common(limit)
+
+    def closest(self, text, extracted_data, limit=5, min_similarity=MIN_SIMILARITY):
+        """
+        Finds the template most similar to a document
+
+        Index candidates are re-ranked with the full comparison.
+
+        Args:
+            text (str): Document text
+            extracted_data (dict): Output of extract_data() for the document
+            limit (int): Number of index candidates to re-rank
+            min_similarity (float): Lowest similarity accepted as a match
+
+        Returns:
+            dict: The best template record, or None if no template is similar
+        """
+        best, best_score = None, 0.0
+        for template_id, _ in self.candidates(text, limit):
+            record = self.get(template_id)
+            if record is None:
+                continue
+            score = compare_to_reference(extracted_data, record['profile'], text=text)['similarity']
+            if score >= min_similarity and (best is None or score > best_score):
+                best, best_score = record, score
+        return best
+
+
+def main(argv=None):
+    from utils.file_handler import read_file_content
+
+    parser = argparse.ArgumentParser(description='Manage reference templates')
+    parser.add_argument('--library', default=os.environ.get('TEMPLATE_LIBRARY_PATH', os.path.join('instance', 'templates')),
+                        help='Template library directory')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help='Register a template file')
+    add.add_argument('path')
+    add.add_argument('--name', help='Template name (defaults to the file name)')
+    commands.add_parser('list', help='List registered templates')
+    remove = commands.add_parser('remove', help='Delete a template')
+    remove.add_argument('template_id')
+
+    args = parser.parse_args(argv)
+    library = TemplateLibrary(args.library)
+
+    if args.command == 'add':
+        if not os.path.exists(args.path):
+            print(f"Error: File {args.path} not found")
+            return 1
+        name = args.name or os.path.splitext(os.path.basename(args.path))[0]
+        template = library.register(name, read_file_content(args.path), os.path.basename(args.path))
+        print(f"Registered {template['name']} as {template['template_id']}")
+    elif args.command == 'list':
+        for template in library.list():
+            print(f"{template['template_id']}  {template['name']}  ({template['source_filename'] or '-'})")
+    elif args.command == 'remove':
+        if not library.remove(args.template_id):
+            print(f"Error: Template {args.template_id} not found")
+            return 1
+        print(f"Removed {args.template_id}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
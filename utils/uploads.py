@@ -0,0 +1,308 @@
+"""
+Chunked upload module - resumable uploads streamed to disk and hashed on the fly
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+# Bytes read from the request stream per write, so memory stays flat
+# whatever the chunk size
+READ_SIZE = 1024 * 1024
+
+
+def _try_lock(f):
+    """
+    Takes an exclusive, non-blocking lock on an open file; it is released
+    when the file is closed. Returns False if someone else holds it.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        # Windows: lock the first byte instead
+        import msvcrt
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+
+class UploadError(Exception):
+    """Raised when an upload request can't be accepted; carries an HTTP status"""
+
+    def __init__(self, message, status=400, **details):
+        super().__init__(message)
+        self.status = status
+        self.details = details
+
+
+def parse_size_limits(spec, default_mb=16):
+    """
+    Parses per-file-type size limits such as "pdf=512,png=64,default=16"
+
+    Args:
+        spec (str): Comma-separated extension=megabytes pairs
+        default_mb (int): Limit for types that aren't listed
+
+    Returns:
+        dict: extension -> bytes, plus 'default'
+    """
+    limits = {'default': default_mb * 1024 * 1024}
+    for item in (spec or '').split(','):
+        if '=' not in item:
+            continue
+        extension, megabytes = item.split('=', 1)
+        limits[extension.strip().lower().lstrip('.')] = int(float(megabytes) * 1024 * 1024)
+    return limits
+
+
+class ChunkedUploads:
+    """
+    Resumable uploads: a session is created with the final size (and
+    optionally the SHA-256), then chunks are appended at the current offset
+    until the file is complete.
+
+    Chunks are streamed to a partial file and fed to a running SHA-256, so
+    a multi-GB upload never sits in memory. Session metadata is kept next
+    to the partial file, so an upload can be resumed after a restart or by
+    another worker process: the partial file is locked while a chunk is
+    written, and a hash that doesn't cover the current offset is rebuilt
+    from what is on disk.
+    """
+
+    def __init__(self, directory, limits=None, ttl=86400):
+        self.directory = directory
+        self.limits = limits or parse_size_limits(None)
+        self.ttl = ttl
+        # upload_id -> (running SHA-256, offset it covers)
+        self._hashers = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _meta_path(self, upload_id):
+        return os.path.join(self.directory, f"{upload_id}.json")
+
+    def _data_path(self, upload_id):
+        return os.path.join(self.directory, f"{upload_id}.part")
+
+    def _save(self, session):
+        temp_path = self._meta_path(session['upload_id']) + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(session, f)
+        os.replace(temp_path, self._meta_path(session['upload_id']))
+
+    def limit_for(self, extension):
+        """
+        Returns the size limit in bytes for a file extension
+        """
+        return self.limits.get(extension.lower(), self.limits['default'])
+
+    def create(self, filename, size, sha256=None, options=None):
+        """
+        Starts an upload session
+
+        Args:
+            filename (str): Name of the file being uploaded (already sanitized)
+            size (int): Total size in bytes
+            sha256 (str, optional): Expected hex digest, checked on completion
+            options (dict, optional): Stored with the session, e.g. analysis flags
+
+        Returns:
+            dict: The session record
+
+        Raises:
+            UploadError: If the size is missing or over the limit for the file type
+        """
+        self.purge_expired()
+        extension = os.path.splitext(filename)[1][1:].lower()
+        limit = self.limit_for(extension)
+        if not isinstance(size, int) or size <= 0:
+            raise UploadError('size must be a positive number of bytes')
+        if size > limit:
+            raise UploadError(f'{extension or "File"} uploads are limited to {limit // (1024 * 1024)} MB',
+                              status=413, limit=limit)
+        now = time.time()
+        session = {
+            'upload_id': uuid.uuid4().hex,
+            'filename': filename,
+            'size': size,
+            'offset': 0,
+            'sha256': sha256.lower() if sha256 else None,
+            'options': options or {},
+            'created_at': now,
+            'updated_at': now,
+        }
+        open(self._data_path(session['upload_id']), 'wb').close()
+        self._save(session)
+        with self._lock:
+            self._hashers[session['upload_id']] = (hashlib.sha256(), 0)
+        return session
+
+    def get(self, upload_id):
+        """
+        Returns the session record, or None if it doesn't exist
+        """
+        if not all(c in '0123456789abcdef' for c in upload_id):
+            return None
+        try:
+            with open(self._meta_path(upload_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _hasher(self, session):
+        # The hash state lives in memory; rebuild it from the partial file
+        # when it doesn't cover exactly the bytes on disk - the session was
+        # started, or its last chunks written, by another worker process
+        # (or before a restart)
+        with self._lock:
+            hasher, covered = self._hashers.get(session['upload_id'], (None, None))
+        if hasher is not None and covered == session['offset']:
+            return hasher
+        hasher = hashlib.sha256()
+        with open(self._data_path(session['upload_id']), 'rb') as f:
+            remaining = session['offset']
+            while remaining > 0:
+                block = f.read(min(READ_SIZE, remaining))
+                if not block:
+                    break
+                hasher.update(block)
+                remaining -= len(block)
+        return hasher
+
+    def append(self, upload_id, offset, stream):
+        """
+        Appends a chunk read from `stream` at `offset`
+
+        Args:
+            upload_id (str): Session id
+            offset (int): Offset the client believes the upload is at
+            stream: File-like object with the chunk bytes (e.g. request.stream)
+
+        Returns:
+            dict: The updated session; when the last byte arrived it also has
+                'complete': True and the verified 'digest'. An empty chunk at
+                the final offset completes the upload again, e.g. to retry
+                queueing its analysis.
+
+        Raises:
+            UploadError: 404 for unknown sessions, 409 when the offset doesn't
+                match (details carry the current offset) or another chunk is
+                being written, 413 when the chunk runs past the declared size,
+                422 when the finished file doesn't match its SHA-256
+        """
+        if self.get(upload_id) is None:
+            raise UploadError('Upload not found', status=404)
+        try:
+            f = open(self._data_path(upload_id), 'r+b')
+        except FileNotFoundError:
+            raise UploadError('Upload not found', status=404)
+
+        with f:
+            # The lock is on the file, so it holds across worker processes
+            if not _try_lock(f):
+                session = self.get(upload_id) or {}
+                raise UploadError('Another chunk is being written', status=409, offset=session.get('offset'))
+            # Re-read the session now that nobody else can move it on
+            session = self.get(upload_id)
+            if session is None:
+                raise UploadError('Upload not found', status=404)
+            if offset != session['offset']:
+                raise UploadError(f"Expected offset {session['offset']}", status=409, offset=session['offset'])
+            hasher = self._hasher(session)
+
+            f.seek(session['offset'])
+            try:
+                while True:
+                    block = stream.read(READ_SIZE)
+                    if not block:
+                        break
+                    if session['offset'] + len(block) > session['size']:
+                        raise UploadError('Chunk runs past the declared upload size', status=413,
+                                          offset=session['offset'])
+                    f.write(block)
+                    hasher.update(block)
+                    session['offset'] += len(block)
+            finally:
+                # Whatever was written (even by a dropped connection)
+                # becomes the new resume point
+                f.truncate(session['offset'])
+                session['updated_at'] = time.time()
+                self._save(session)
+                with self._lock:
+                    self._hashers[upload_id] = (hasher, session['offset'])
+
+        if session['offset'] < session['size']:
+            return session
+
+        digest = hasher.hexdigest()
+        if session['sha256'] and digest != session['sha256']:
+            self.discard(upload_id)
+            raise UploadError('Checksum mismatch - the upload was corrupted, please start again',
+                              status=422, expected=session['sha256'], actual=digest)
+        return dict(session, complete=True, digest=digest)
+
+    def complete(self, upload_id, destination):
+        """
+        Moves a finished upload to its final path
+
+        The session is kept until discard(), so the file can be handed back
+        with restore() if it can't be used yet.
+        """
+        os.replace(self._data_path(upload_id), destination)
+
+    def restore(self, upload_id, source):
+        """
+        Moves a completed file back into its session, undoing complete()
+        """
+        os.replace(source, self._data_path(upload_id))
+        session = self.get(upload_id)
+        if session is not None:
+            session['updated_at'] = time.time()
+            self._save(session)
+
+    def discard(self, upload_id):
+        """
+        Deletes a session and its partial file
+        """
+        with self._lock:
+            self._hashers.pop(upload_id, None)
+        for path in (self._data_path(upload_id), self._meta_path(upload_id)):
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def purge_expired(self):
+        """
+        Drops sessions that haven't received a chunk within the TTL
+
+        Returns:
+            int: Number of sessions removed
+        """
+        if not self.ttl:
+            return 0
+        removed = 0
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            session = self.get(name[:-len('.json')])
+            if session and session['updated_at'] < cutoff and not self._writing(session['upload_id']):
+                self.discard(session['upload_id'])
+                removed += 1
+        return removed
+
+    def _writing(self, upload_id):
+        # Whether some process holds the partial file's lock
+        try:
+            with open(self._data_path(upload_id), 'r+b') as f:
+                return not _try_lock(f)
+        except FileNotFoundError:
+            return False